@@ -0,0 +1,8 @@
+# Корень репозитория в sys.path: тесты импортируют пакет src так же, как main.py
+import os
+
+# Бюджет запросов (tests/test_query_budget.py) проверяется на отдельной
+# базе: DATABASE_URL подменяется до первого импорта src.core.config
+if os.getenv("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+    os.environ["DATABASE_REPLICA_URLS"] = ""
@@ -10,6 +10,11 @@ from src.core import config
 from src.core.logger import LOGGING
 from src.db import redis, elastic
 from src.db.database import db_session_manager
+from src.grpc.client import user_rpc
+from src.services.category_tree import get_category_tree
+from src.services import suggest, views
+from src.utils import l1_cache
+from src.tasks import article_indexer, publication_watcher
 from contextlib import asynccontextmanager
 from src.routers.urls import router as app_route
 from src.routers.urls import http_exception_handler, request_validation_exception_handler, generic_exception_handler
@@ -41,12 +46,31 @@ app.add_middleware(
 async def startup_event():
     redis.redis = Redis(host=config.REDIS_HOST, port=config.REDIS_PORT, password=config.REDIS_PASSWORD)
     elastic.es = AsyncElasticsearch(hosts=[f'{config.ELASTIC_URL}'])
+    await user_rpc.connect()
+    try:
+        await get_category_tree()
+    except Exception as e:
+        # не критично: дерево загрузится при первом обращении
+        logging.error(f"Category tree preload failed: {e}")
+    l1_cache.start_listener(redis.redis)
+    db_session_manager.start_health_checks()
+    publication_watcher.start(redis.redis)
+    suggest.start(redis.redis)
+    views.start(redis.redis)
+    if config.SEARCH_BACKEND == "elastic":
+        article_indexer.start(elastic.es, redis.redis)
 
 
 @app.on_event('shutdown')
 async def shutdown_event():
+    await article_indexer.stop()
+    await publication_watcher.stop()
+    await suggest.stop()
+    await views.stop(redis.redis)
+    await l1_cache.stop_listener()
     await db_session_manager.close()
     await elastic.es.close()
+    await user_rpc.close()
 
 
 app.add_exception_handler(HTTPException, http_exception_handler)
@@ -0,0 +1,102 @@
+"""
+Аллокации карточек ленты: сущности Article (ARTICLE_CARD) против
+Core-карточек со __slots__ (src/services/cards.py).
+
+    python -m src.bench.card_allocations --limit 500 --runs 10
+
+Оба варианта выбирают одни и те же последние опубликованные статьи из
+базы DATABASE_URL. Для каждого печатается число SQL-запросов, медиана
+времени, пиковая память tracemalloc и число живых блоков после
+выборки (пока результат удерживается), а также размер одной карточки.
+"""
+import argparse
+import asyncio
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import and_
+from sqlalchemy.future import select
+
+from src.db.database import db_session_manager
+from src.db.query_counter import count_queries
+from src.models.article import Article
+from src.services.cards import ArticleCard, card_query, hydrate_cards
+from src.services.category_tree import get_category_tree
+from src.services.index import TZ_SHIFT
+from src.services.loading import ARTICLE_CARD
+
+
+def _filters():
+    return and_(Article.published_date <= datetime.now() + TZ_SHIFT, Article.article_status == "P")
+
+
+async def _orm(db, limit: int) -> List[Any]:
+    q = select(Article).filter(_filters()).options(*ARTICLE_CARD).order_by(Article.published_date.desc()).limit(limit)
+    items = (await db.execute(q)).scalars().all()
+    for a in items:
+        # как делали сервисы до карточек
+        a.badge_category = a.categories[-1].title if a.categories else "Новости"
+    return items
+
+
+async def _cards(db, limit: int) -> List[Any]:
+    q = card_query().filter(_filters()).order_by(Article.published_date.desc()).limit(limit)
+    items = [ArticleCard.from_row(row) for row in await db.execute(q)]
+    await hydrate_cards(items)
+    return items
+
+
+async def _measure(name: str, runs: int, limit: int, fetch) -> Dict[str, Any]:
+    timings, peaks, blocks = [], [], []
+    queries, sample = 0, None
+    for _ in range(runs):
+        async with db_session_manager.session() as db:
+            gc.collect()
+            tracemalloc.start()
+            with count_queries() as counter:
+                started = time.perf_counter()
+                items = await fetch(db, limit)
+                timings.append((time.perf_counter() - started) * 1000)
+            snapshot = tracemalloc.take_snapshot()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            blocks.append(sum(stat.count for stat in snapshot.statistics("filename")))
+            queries = counter.count
+            sample = items[0] if items else None
+            del items
+    return {
+        "name": name,
+        "queries": queries,
+        "median_ms": statistics.median(timings),
+        "peak_kb": statistics.median(peaks) / 1024,
+        "blocks": int(statistics.median(blocks)),
+        "item_bytes": sys.getsizeof(sample) + (sys.getsizeof(sample.__dict__) if hasattr(sample, "__dict__") else 0),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="List card allocation benchmark")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    # дерево — общее для процесса, в замер не входит
+    await get_category_tree()
+
+    for fetch, name in ((_orm, "ORM Article + ARTICLE_CARD"), (_cards, "Core ArticleCard")):
+        r = await _measure(name, args.runs, args.limit, fetch)
+        print(
+            f"{r['name']:<28} queries={r['queries']:<2} median={r['median_ms']:.1f}ms "
+            f"peak={r['peak_kb']:.0f}KiB blocks={r['blocks']} item={r['item_bytes']}B"
+        )
+
+    await db_session_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""
+Бенчмарк рубрик главной: запрос на каждую рубрику против общего запроса
+(src/services/index.py::_get_sections).
+
+    python -m src.bench.index_sections --runs 20
+
+Работает с базой из DATABASE_URL. Для каждого варианта печатает число
+SQL-запросов за прогон, медиану и p95 времени; для get_index целиком —
+то же самое, чтобы видеть итоговое число обращений к БД на промахе.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import and_
+from sqlalchemy.future import select
+from sqlalchemy.orm import load_only, selectinload
+
+from src.db.database import db_session_manager
+from src.db.query_counter import count_queries
+from src.models.article import Article
+from src.models.category import Category
+from src.services.index import SECTIONS, TZ_SHIFT, _get_sections, get_index
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Прежняя схема: отдельные запросы на каждую рубрику
+# ─────────────────────────────────────────────────────────────────────────────
+async def _legacy_section(db, base_filters, slug: str, limit: int, with_children: bool) -> List[Article]:
+    if with_children:
+        parent_q = (
+            select(Category)
+            .filter(Category.slug == slug, Category.is_active.is_(True))
+            .options(selectinload(Category.children))
+            .limit(1)
+        )
+        parent = (await db.execute(parent_q)).scalar_one_or_none()
+        if not parent:
+            return []
+        category_filter = Category.id.in_([parent.id] + [c.id for c in parent.children if c.is_active])
+    else:
+        category_filter = Category.slug == slug
+
+    q = (
+        select(Article)
+        .join(Article.categories)
+        .filter(base_filters, category_filter)
+        .options(
+            selectinload(Article.categories),
+            load_only(
+                Article.alias,
+                Article.title,
+                Article.image,
+                Article.published_date,
+                Article.description,
+                Article.author_ids,
+                Article.quote,
+            ),
+        )
+        .order_by(Article.published_date.desc())
+        .limit(limit)
+    )
+    return (await db.execute(q)).scalars().all()
+
+
+async def _legacy_sections(db, base_filters) -> Dict[str, List[Article]]:
+    return {
+        name: await _legacy_section(db, base_filters, slug, limit, with_children)
+        for name, (slug, limit, with_children) in SECTIONS.items()
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Прогон
+# ─────────────────────────────────────────────────────────────────────────────
+def _base_filters():
+    return and_(
+        Article.published_date <= datetime.now() + TZ_SHIFT,
+        Article.article_status == "P",
+        Article.public_params == 0,
+    )
+
+
+async def _measure(name: str, runs: int, make_call) -> Dict[str, Any]:
+    timings, queries = [], []
+    for _ in range(runs):
+        async with db_session_manager.session() as db:
+            with count_queries() as counter:
+                started = time.perf_counter()
+                await make_call(db)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count)
+    timings.sort()
+    return {
+        "name": name,
+        "queries": max(queries),
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(int(len(timings) * 0.95), len(timings) - 1)],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Homepage sections query benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    results = [
+        await _measure("sections: per-section queries", args.runs, lambda db: _legacy_sections(db, _base_filters())),
+        await _measure("sections: combined query", args.runs, lambda db: _get_sections(db, _base_filters())),
+        await _measure("get_index", args.runs, get_index),
+    ]
+    for r in results:
+        print(f"{r['name']:<32} queries={r['queries']:<3} median={r['median_ms']:.1f}ms p95={r['p95_ms']:.1f}ms")
+
+    await db_session_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Сколько соединений берётся из пула на запрос.
+
+    python -m src.bench.pool_checkouts / /about/ /allnews/
+
+Поднимает приложение (как при старте uvicorn) и отправляет каждый путь
+дважды напрямую в ASGI: первый запрос может собрать страницу, второй
+должен прийти из кеша страниц и не взять ни одного соединения (сессия
+из DBSessionDep ленивая, src/db/database.py::LazySession). Печатает
+статус и число checkout по всем движкам для каждого запроса.
+Те же счётчики в работе — в /health/db/.
+"""
+import argparse
+import asyncio
+from typing import List, Tuple
+
+import main
+from src.db.database import db_session_manager
+from src.tasks import publication_watcher
+
+
+def _checkouts() -> int:
+    return sum(engine["checkouts"] for engine in db_session_manager.stats().values())
+
+
+async def _get(path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await main.app(scope, receive, send)
+    return status
+
+
+async def run(paths: List[str]) -> List[Tuple[str, int, int]]:
+    results = []
+    for path in paths:
+        for attempt in ("first", "repeat"):
+            before = _checkouts()
+            status = await _get(path)
+            results.append((f"{path} ({attempt})", status, _checkouts() - before))
+    return results
+
+
+async def amain():
+    parser = argparse.ArgumentParser(description="Pool checkouts per request")
+    parser.add_argument("paths", nargs="*", default=["/", "/allnews/", "/about/", "/contacts/"])
+    args = parser.parse_args()
+
+    await main.startup_event()
+    # наблюдатель публикаций ходит в БД сам по себе и исказил бы счёт
+    await publication_watcher.stop()
+    try:
+        for name, status, checkouts in await run(args.paths):
+            print(f"{name:<32} status={status} checkouts={checkouts}")
+    finally:
+        await main.shutdown_event()
+
+
+if __name__ == "__main__":
+    asyncio.run(amain())
@@ -0,0 +1,131 @@
+"""
+Бюджет SQL-запросов по страницам.
+
+    python -m src.bench.query_budget
+
+Для каждого маршрута вызывает его сервис так, как это происходит при
+промахе кеша страницы, и считает SQL-запросы (src/db/query_counter.py).
+Если число запросов превышает бюджет, печатает выполненные запросы и
+завершается с кодом 1. В CI те же бюджеты проверяет
+tests/test_query_budget.py на тестовой базе (TEST_DATABASE_URL).
+
+Кеши снимков (article_*, podcast_*) на время прогона отключены, дерево
+категорий загружается заранее: оно общее для процесса и в бюджет
+страницы не входит. Шаблоны не рендерятся: связи, не указанные в
+профиле загрузки (src/services/loading.py), закрыты raiseload и при
+обращении из шаблона дают ошибку, а не лишний запрос. Ленты строятся
+из карточек (src/services/cards.py): индекс страниц и сама страница.
+"""
+import argparse
+import asyncio
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.future import select
+
+from src.db.database import db_session_manager
+from src.db.query_counter import count_queries
+from src.models.article import Article
+from src.models.podcast import Podcast
+from src.models.tags import Tag
+from src.services import article as article_service
+from src.services import podcast as podcast_service
+from src.services.author import author_detail
+from src.services.base import get_base
+from src.services.category import get_category
+from src.services.category_tree import get_category_tree
+from src.services.error import get_articles_404
+from src.services.index import get_index
+from src.services.search import search_results
+from src.services.tag import get_tag
+from src.utils.l1_cache import local_cache
+
+
+class _NoCache:
+    """Redis без данных: сервисы снимков всегда идут в БД."""
+
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, ex=None):
+        return None
+
+
+async def _samples(db) -> Dict[str, Optional[str]]:
+    """Реальные slug/id из базы для параметризованных маршрутов."""
+    article = (await db.execute(
+        select(Article)
+        .filter(Article.article_status == "P", Article.author_ids.isnot(None))
+        .order_by(Article.published_date.desc())
+        .limit(1)
+    )).scalars().first()
+    tree = await get_category_tree()
+    parent = next((tree.by_slug(s) for s in ("ekonomika", "geopolitika") if tree.by_slug(s)), None)
+    child = tree.children(parent)[0] if parent and tree.children(parent) else None
+    return {
+        "article": article.alias if article else None,
+        "author": article.author_ids[0] if article and article.author_ids else None,
+        "parent_category": parent.slug if parent else None,
+        "child_category": child.slug if child else None,
+        "tag": (await db.execute(select(Tag.slug).limit(1))).scalar(),
+        "podcast": (await db.execute(select(Podcast.alias).order_by(Podcast.published_date.desc()).limit(1))).scalar(),
+    }
+
+
+def _routes(s: Dict[str, Optional[str]]) -> List[Tuple[str, int, Optional[Callable[[Any], Awaitable]]]]:
+    """(маршрут, бюджет запросов, вызов сервиса); None — нет данных для проверки."""
+    redis = _NoCache()
+
+    def need(key: str, call):
+        return call if s[key] else None
+
+    return [
+        ("base", 2, lambda db: get_base(db)),
+        ("/", 7, lambda db: get_index(db)),
+        ("/allnews/", 2, lambda db: article_service.get_all_articles(db, page=1)),
+        ("/news/{slug}/", 4, need("article", lambda db: article_service.article_detail(db, s["article"], redis))),
+        ("/category/{parent}/", 2, need("parent_category", lambda db: get_category(db, 1, s["parent_category"]))),
+        ("/category/{child}/", 2, need("child_category", lambda db: get_category(db, 1, s["child_category"]))),
+        ("/tag/{slug}/", 3, need("tag", lambda db: get_tag(db, 1, s["tag"]))),
+        ("/authors/{slug}/", 2, need("author", lambda db: author_detail(db, 1, s["author"]))),
+        ("/search", 2, lambda db: search_results(db, 1, q="а")),
+        ("/podcasts/{slug}/", 4, need("podcast", lambda db: podcast_service.podcast_detail(db, s["podcast"], redis))),
+        ("404", 1, lambda db: get_articles_404(db)),
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SQL statements budget per route")
+    parser.add_argument("-v", "--verbose", action="store_true", help="печатать запросы всех маршрутов")
+    args = parser.parse_args()
+
+    async with db_session_manager.session() as db:
+        samples = await _samples(db)
+
+    failed = False
+    for route, budget, call in _routes(samples):
+        if call is None:
+            print(f"SKIP {route:<24} нет данных")
+            continue
+        local_cache.clear()
+        error = None
+        async with db_session_manager.session() as db:
+            with count_queries() as counter:
+                try:
+                    await call(db)
+                except Exception as e:
+                    error = e
+        ok = error is None and counter.count <= budget
+        failed = failed or not ok
+        status = "OK  " if ok else "FAIL"
+        print(f"{status} {route:<24} queries={counter.count} budget={budget}" + (f" error={error!r}" if error else ""))
+        if not ok or args.verbose:
+            for statement in counter.statements:
+                print(f"     {' '.join(statement.split())[:200]}")
+
+    await db_session_manager.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+"""
+Бенчмарк поиска: прежний ILIKE по заголовку против полнотекстового
+поиска Postgres (src/services/search.py).
+
+    python -m src.bench.search_backends seed --count 200000
+    python -m src.bench.search_backends run --runs 20
+    python -m src.bench.search_backends cleanup
+
+seed добавляет в news_article синтетические опубликованные статьи
+(alias bench-search-N) из словаря экономических слов; генерация идёт
+на стороне сервера одним INSERT ... SELECT generate_series. Перед run
+должна быть применена схема create_search_index.py. cleanup удаляет
+только добавленные строки. Только для dev/stage базы.
+
+run для каждого запроса из QUERIES печатает медиану и p95 времени и
+число SQL-запросов: ILIKE + count(*) + OFFSET (как было), поиск по
+релевантности и по дате.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import and_, func, select, text
+
+from src.db.database import db_session_manager
+from src.db.query_counter import count_queries
+from src.models.article import Article
+from src.services.category_tree import get_category_tree
+from src.services.search import SORT_DATE, TZ_SHIFT, search_results
+
+ALIAS_PREFIX = "bench-search-"
+
+WORDS = [
+    "курс", "доллара", "рубль", "тенге", "нефть", "газ", "банк", "инфляция", "ставка", "бюджет",
+    "экспорт", "импорт", "компания", "рынок", "акции", "облигации", "инвестиции", "налог", "кредит",
+    "ипотека", "биржа", "прибыль", "выручка", "дивиденды", "санкции", "торговля", "зерно", "уголь",
+    "металл", "золото", "энергетика", "транспорт", "логистика", "стартап", "технологии", "регулятор",
+    "правительство", "министерство", "реформа", "экономика", "рост", "спад", "прогноз", "аналитики",
+    "отчёт", "квартал", "год", "миллиард", "миллион", "сделка", "слияние", "банкротство",
+]
+
+QUERIES = ["курс доллара", "нефть", "ставка инфляция", "дивидендв", "ипотека банк", "санкции экспорт зерно"]
+
+SEED_SQL = text(f"""
+INSERT INTO news_article (id, title, alias, description, content, published_date, article_status, public_params)
+SELECT
+    gen_random_uuid(),
+    (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ') FROM generate_series(1, 6 + g % 4)),
+    '{ALIAS_PREFIX}' || g,
+    (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ') FROM generate_series(1, 20 + g % 7)),
+    '<p>' || (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ') FROM generate_series(1, 300 + g % 200)) || '</p>',
+    now() - (g || ' minutes')::interval,
+    'P',
+    0
+FROM generate_series(1, :count) AS g, (SELECT CAST(:words AS text[]) AS w) AS dict
+""")
+
+
+async def seed(count: int) -> None:
+    async with db_session_manager.connect() as connection:
+        await connection.execute(SEED_SQL, {"count": count, "words": WORDS})
+        await connection.execute(text("ANALYZE news_article"))
+    print(f"seeded {count} articles")
+
+
+async def cleanup() -> None:
+    async with db_session_manager.connect() as connection:
+        result = await connection.execute(text("DELETE FROM news_article WHERE alias LIKE :prefix"), {"prefix": f"{ALIAS_PREFIX}%"})
+    print(f"deleted {result.rowcount} articles")
+
+
+async def _legacy(db, q: str) -> None:
+    """Прежний search_results: ILIKE по заголовку, count(*) и OFFSET."""
+    filters = and_(
+        Article.published_date <= datetime.now() + TZ_SHIFT,
+        Article.article_status == "P",
+        Article.public_params.in_([0, 1]),
+        Article.title.ilike(f"%{q.lower()}%"),
+    )
+    query = select(Article.id, Article.alias, Article.title).filter(filters)
+    await db.execute(select(func.count()).select_from(query.subquery()))
+    await db.execute(query.order_by(Article.published_date.desc()).offset(0).limit(6))
+
+
+async def _measure(runs: int, call) -> Dict[str, Any]:
+    timings, queries = [], 0
+    for _ in range(runs):
+        async with db_session_manager.session() as db:
+            with count_queries() as counter:
+                started = time.perf_counter()
+                await call(db)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = counter.count
+    timings.sort()
+    return {
+        "queries": queries,
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(int(len(timings) * 0.95), len(timings) - 1)],
+    }
+
+
+async def run(runs: int, queries: List[str]) -> None:
+    await get_category_tree()
+    for q in queries:
+        for name, call in (
+            ("ilike", lambda db: _legacy(db, q)),
+            ("fts relevance", lambda db: search_results(db, 1, q=q)),
+            ("fts date", lambda db: search_results(db, 1, q=q, sort=SORT_DATE)),
+        ):
+            r = await _measure(runs, call)
+            print(f"{q:<24} {name:<14} queries={r['queries']} median={r['median_ms']:.1f}ms p95={r['p95_ms']:.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Search backends benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed_parser = sub.add_parser("seed")
+    seed_parser.add_argument("--count", type=int, default=200_000)
+    run_parser = sub.add_parser("run")
+    run_parser.add_argument("--runs", type=int, default=20)
+    run_parser.add_argument("queries", nargs="*", default=QUERIES)
+    sub.add_parser("cleanup")
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        await seed(args.count)
+    elif args.command == "run":
+        await run(args.runs, args.queries)
+    else:
+        await cleanup()
+
+    await db_session_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,48 +1,139 @@
+import asyncio
+import itertools
+import logging
 from collections.abc import AsyncGenerator, AsyncIterator
 from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import URL
+from sqlalchemy import URL, event, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
-from src.core.config import DATABASE_URL
+from src.core import config
+from src.core.config import DATABASE_REPLICA_URLS, DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики в секундах; 0, если она проиграла всё полученное
+# (иначе простаивающий primary выглядел бы как растущее отставание)
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+def _create_engine(db_uri: str | URL) -> AsyncEngine:
+    return create_async_engine(
+        url=db_uri,
+        connect_args={
+        #     "ssl": settings.DB_SSL_CONTEXT,
+        "server_settings": {
+                "application_name": f"besmedia_web_prod",
+            },
+	    },
+        pool_size=config.DATABASE_POOL_SIZE,
+        pool_recycle=3600,
+        max_overflow=config.DATABASE_MAX_OVERFLOW,
+    )
+
+
+def _create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        autoflush=False,
+        expire_on_commit=False,
+        bind=engine,
+        autocommit=False,
+    )
+
+
+class _CheckoutCounter:
+    """Сколько раз соединение выдавалось из пула (событие checkout)."""
+
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.value += 1
+
+
+def _count_checkouts(engine: AsyncEngine) -> _CheckoutCounter:
+    counter = _CheckoutCounter()
+    event.listen(engine.sync_engine, "checkout", counter)
+    return counter
+
+
+def _is_disconnect(e: Exception) -> bool:
+    return isinstance(e, OSError) or (isinstance(e, DBAPIError) and e.connection_invalidated)
+
+
+class _Replica:
+    def __init__(self, name: str, db_uri: str | URL):
+        self.name = name
+        self.engine = _create_engine(db_uri)
+        self.sessionmaker = _create_sessionmaker(self.engine)
+        self.checkouts = _count_checkouts(self.engine)
+        # до первой проверки реплика считается рабочей
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
 
 
 class DatabaseSessionManager:
+    """
+    Сессии к primary и (необязательно) к репликам только для чтения.
+
+    session() отдаёт сессию на здоровую реплику по кругу, а если реплик
+    нет или все отстают/недоступны — на primary; session(primary=True)
+    всегда идёт на primary (предпросмотр черновиков, наблюдатель
+    публикаций). Здоровье реплик проверяет фоновая задача
+    (start_health_checks): реплика выводится из ротации при ошибке
+    соединения или отставании больше REPLICA_MAX_LAG секунд.
+    """
     _engine = None
     _sessionmaker = None
 
-    def __init__(self, db_uri: str | URL):
-        self._engine = create_async_engine(
-            url=db_uri,
-            connect_args={
-            #     "ssl": settings.DB_SSL_CONTEXT,
-            "server_settings": {
-                    "application_name": f"besmedia_web_prod",
-                },
-	    },
-            pool_size=100,
-            pool_recycle=3600,
-            max_overflow=5,
-        )
-        self._sessionmaker = async_sessionmaker(
-            autoflush=False,
-            expire_on_commit=False,
-            bind=self._engine,
-            autocommit=False,
-        )
+    def __init__(self, db_uri: str | URL, replica_uris: Sequence[str | URL] = ()):
+        self._engine = _create_engine(db_uri)
+        self._sessionmaker = _create_sessionmaker(self._engine)
+        self._checkouts = _count_checkouts(self._engine)
+        self._replicas: List[_Replica] = [
+            _Replica(f"replica{i}", uri) for i, uri in enumerate(replica_uris, start=1)
+        ]
+        self._rotation = itertools.cycle(self._replicas) if self._replicas else None
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            raise Exception("DatabaseSessionManager is not initialized")
+        return self._engine
+
+    @property
+    def engines(self) -> List[AsyncEngine]:
+        """Все движки: primary и реплики."""
+        return [self.engine] + [r.engine for r in self._replicas]
 
     async def close(self) -> None:
         if self._engine is None:
             raise Exception("DatabaseSessionManager is not initialized")
+        await self.stop_health_checks()
+        for replica in self._replicas:
+            await replica.engine.dispose()
         await self._engine.dispose()
 
         self._engine = None
         self._sessionmaker = None
+        self._replicas = []
+        self._rotation = None
 
     @asynccontextmanager
     async def connect(self) -> AsyncIterator[AsyncConnection]:
@@ -56,26 +147,164 @@ class DatabaseSessionManager:
                 await connection.rollback()
                 raise
 
-    @asynccontextmanager
-    async def session(self) -> AsyncIterator[AsyncSession]:
+    def _pick_replica(self) -> Optional[_Replica]:
+        for _ in range(len(self._replicas)):
+            replica = next(self._rotation)
+            if replica.healthy:
+                return replica
+        return None
+
+    def _open(self, primary: bool) -> Tuple[AsyncSession, Optional[_Replica]]:
         if self._sessionmaker is None:
             raise Exception("DatabaseSessionManager is not initialized")
+        replica = None if primary else self._pick_replica()
+        return (replica.sessionmaker if replica else self._sessionmaker)(), replica
 
-        session = self._sessionmaker()
+    async def _fail(self, session: AsyncSession, replica: Optional[_Replica], e: Exception) -> None:
+        await session.rollback()
+        if replica is not None and _is_disconnect(e):
+            # соединение потеряно: до следующей проверки реплика вне ротации
+            replica.healthy, replica.error = False, str(e) or type(e).__name__
+            logger.error(f"Database {replica.name} is unavailable, removed from rotation: {e}")
+
+    @asynccontextmanager
+    async def session(self, primary: bool = False) -> AsyncIterator[AsyncSession]:
+        session, replica = self._open(primary)
         try:
             yield session
-        except Exception:
-            await session.rollback()
+        except Exception as e:
+            await self._fail(session, replica, e)
             raise
         finally:
             await session.close()
 
+    @asynccontextmanager
+    async def lazy_session(self, primary: bool = False) -> AsyncIterator["LazySession"]:
+        """
+        Как session(), но сессия создаётся при первом обращении к ней.
+        Если view так и не тронул БД (страница из кеша), не выбирается
+        реплика и не берётся соединение из пула.
+        """
+        lazy = LazySession(self, primary)
+        try:
+            yield lazy
+        except Exception as e:
+            if lazy.started:
+                await self._fail(lazy._session, lazy._replica, e)
+            raise
+        finally:
+            if lazy.started:
+                await lazy._session.close()
+
+    # ------------------------------------------------------------------ #
+    #  Проверка реплик
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    async def _replica_lag(replica: _Replica) -> float:
+        async with replica.engine.connect() as connection:
+            return float(await connection.scalar(REPLICA_LAG_QUERY) or 0)
+
+    async def check_replicas(self) -> None:
+        for replica in self._replicas:
+            try:
+                replica.lag = await asyncio.wait_for(self._replica_lag(replica), timeout=config.REPLICA_CHECK_TIMEOUT)
+                replica.error = None
+                healthy = replica.lag <= config.REPLICA_MAX_LAG
+            except Exception as e:
+                replica.lag, replica.error = None, str(e) or type(e).__name__
+                healthy = False
+            if healthy != replica.healthy:
+                state = "back in rotation" if healthy else f"removed from rotation (lag={replica.lag}, error={replica.error})"
+                logger.warning(f"Database {replica.name} {state}")
+            replica.healthy = healthy
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_replicas()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Replica health check failed: {e}")
+            await asyncio.sleep(config.REPLICA_CHECK_INTERVAL)
+
+    def start_health_checks(self) -> None:
+        if self._replicas and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop_health_checks(self) -> None:
+        if self._health_task is None:
+            return
+        self._health_task.cancel()
+        try:
+            await self._health_task
+        except asyncio.CancelledError:
+            pass
+        self._health_task = None
+
+    # ------------------------------------------------------------------ #
+    #  Мониторинг
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _pool_stats(engine: AsyncEngine) -> Dict[str, Any]:
+        pool = engine.sync_engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Пулы соединений и состояние реплик для мониторинга."""
+        stats: Dict[str, Any] = {
+            "primary": {"pool": self._pool_stats(self.engine), "checkouts": self._checkouts.value},
+        }
+        for replica in self._replicas:
+            stats[replica.name] = {
+                "pool": self._pool_stats(replica.engine),
+                "checkouts": replica.checkouts.value,
+                "healthy": replica.healthy,
+                "lag": replica.lag,
+                "error": replica.error,
+            }
+        return stats
+
+
+class LazySession:
+    """
+    Прокси AsyncSession для DI: настоящая сессия открывается при первом
+    обращении к любому её атрибуту (execute, scalars, get, ...).
+    """
+    __slots__ = ("_manager", "_primary", "_session", "_replica")
+
+    def __init__(self, manager: DatabaseSessionManager, primary: bool = False):
+        self._manager = manager
+        self._primary = primary
+        self._session: Optional[AsyncSession] = None
+        self._replica: Optional[_Replica] = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session, self._replica = self._manager._open(self._primary)
+        return getattr(self._session, name)
+
 
 db_session_manager = DatabaseSessionManager(
     db_uri=DATABASE_URL,
+    replica_uris=DATABASE_REPLICA_URLS,
 )
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with db_session_manager.session() as session:
+    async with db_session_manager.lazy_session() as session:
+        yield session
+
+
+async def get_primary_db() -> AsyncGenerator[AsyncSession, None]:
+    async with db_session_manager.lazy_session(primary=True) as session:
         yield session
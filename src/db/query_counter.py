@@ -0,0 +1,42 @@
+"""
+Счётчик SQL-запросов для бенчмарков и профилирования.
+
+    with count_queries() as counter:
+        await get_index(db)
+    print(counter.count, counter.statements)
+
+Считаются все запросы за время блока — на primary и на репликах, —
+включая выполненные параллельными задачами на других соединениях пула.
+"""
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.db.database import db_session_manager
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine: Optional[AsyncEngine] = None) -> Iterator[QueryCounter]:
+    engines = [engine] if engine is not None else db_session_manager.engines
+    counter = QueryCounter()
+    for e in engines:
+        event.listen(e.sync_engine, "before_cursor_execute", counter._on_execute)
+    try:
+        yield counter
+    finally:
+        for e in engines:
+            event.remove(e.sync_engine, "before_cursor_execute", counter._on_execute)
@@ -1,59 +1,111 @@
 from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
 
 class BaseImprovedSearch:
-    # index = None
-    # query_param = {"bool": {"must": []}}
-    # filter_param = []
+    """
+    Построитель запросов к индексу. Экземпляр хранит только настройки
+    (индекс, поля, сортировку), запрос собирается заново на каждый вызов:
+    один объект можно переиспользовать и делить между задачами.
+    """
+    index = None
     sort_param = 'published_date:desc'
     per_param = 5
     search_fields = []
+    highlight_fields = []
+
+    def __init__(self, index=None, sort_param=None):
+        self.index = index or self.index
+        self.sort_param = sort_param or self.sort_param
+
+    def match(self, search_val) -> Optional[Dict[str, Any]]:
+        if not search_val:
+            return None
+        return {
+            "multi_match": {
+                "query": search_val,
+                "fields": self.search_fields,
+                "type": "phrase_prefix",
+                "operator": "or"
+            }
+        }
 
-    def __init__(self, index, sort_param):
-        self.index = index
-        self.sort_param = sort_param
-        self.query_param = {"bool": {"must": []}}
-        self.filter_param = []
-
-    async def search(self, search_val):
-        if search_val:
-            self.query_param['bool']['must'].append(
-                {
-                    "multi_match": {
-                        "query": search_val,
-                        "fields": self.search_fields,
-                        "type": "phrase_prefix",
-                        "operator": "or"
-                    }
-                }
-            )
-        # return self
-
-    async def get(self, elastic_session, from_, per_page, author=None):
-        self.query_param['bool']['must'].append(
-            {"term": {"status.keyword": "P"}}
-        )
-        if self.filter_param:
-            self.query_param['bool']['must'].append({"bool": {"must": self.filter_param}})
-        if author:
-            self.query_param['bool']['must'].append(
-                {"term": {"author_ids.keyword": author}}
-            )
+    def filters(self) -> List[Dict[str, Any]]:
+        """Постоянные условия индекса: опубликовано и уже наступило."""
         current_date = (datetime.now() + timedelta(hours=5)).strftime('%Y-%m-%dT%H:%M:%SZ')
-        date_filter = {
-            "range": {
-                "published_date": {
-                    "lte": current_date
-                }
-            }
+        return [
+            {"term": {"status.keyword": "P"}},
+            {"range": {"published_date": {"lte": current_date}}},
+        ]
+
+    def build_query(self, search_val=None, filters: Sequence[Dict[str, Any]] = (), author=None) -> Dict[str, Any]:
+        must = []
+        match = self.match(search_val)
+        if match:
+            must.append(match)
+        filter_ = self.filters() + list(filters)
+        if author:
+            filter_.append({"term": {"author_ids.keyword": author}})
+        return {"bool": {"must": must, "filter": filter_}}
+
+    def highlight(self) -> Optional[Dict[str, Any]]:
+        if not self.highlight_fields:
+            return None
+        return {
+            "pre_tags": ["<mark>"],
+            "post_tags": ["</mark>"],
+            "fields": {field: {"fragment_size": 150, "number_of_fragments": 2} for field in self.highlight_fields},
         }
-        self.query_param['bool']['must'].append(date_filter)
-        print(self.query_param)
+
+    async def get(self, elastic_session, from_, per_page, author=None, search_val=None, filters=()):
+        """Страница from_ (с 1) по sort_param."""
         return await elastic_session.search(
             index=self.index,
             sort=self.sort_param,
             from_=(from_ - 1) * per_page,
             size=per_page,
-            query=self.query_param
+            query=self.build_query(search_val, filters, author),
+        )
+
+    async def get_after(
+        self,
+        elastic_session,
+        per_page,
+        search_val=None,
+        filters=(),
+        author=None,
+        sort=None,
+        search_after=None,
+        highlight=True,
+        source=True,
+        track_total_hits=None,
+        timeout=None,
+        preference=None,
+    ):
+        """
+        Страница после search_after — значений sort последнего документа
+        предыдущей страницы. sort должен заканчиваться уникальным полем.
+        timeout — предел запроса на клиенте, секунды (на сервере — тот же
+        бюджет для шардов).
+        """
+        params = {}
+        if timeout is not None:
+            elastic_session = elastic_session.options(request_timeout=timeout)
+            params["timeout"] = f"{int(timeout * 1000)}ms"
+        if search_after is not None:
+            params["search_after"] = search_after
+        if highlight and self.highlight():
+            params["highlight"] = self.highlight()
+        if track_total_hits is not None:
+            params["track_total_hits"] = track_total_hits
+        if preference is not None:
+            params["preference"] = preference
+        return await elastic_session.search(
+            index=self.index,
+            sort=sort or self.sort_param,
+            size=per_page,
+            query=self.build_query(search_val, filters, author),
+            source=source,
+            **params,
         )
 
 
@@ -70,10 +122,44 @@ class TagsImprovedSearch(BaseImprovedSearch):
 
 
 class ArticlesImprovedSearch(BaseImprovedSearch):
-    search_fields = ['title', 'description', 'content']
+    search_fields = ['title^3', 'description^2', 'content']
+    highlight_fields = ['description', 'content']
     index = 'articles'
     # sort_param = ['title.keyword', 'description.keyword', 'content.keyword']
 
+    # alias уникален и замыкает сортировку — нужно для search_after
+    SORT_RELEVANCE = ["_score", {"published_date": "desc"}, {"alias.keyword": "asc"}]
+    SORT_DATE = [{"published_date": "desc"}, {"alias.keyword": "asc"}]
+
+    def match(self, search_val):
+        if not search_val:
+            return None
+        return {
+            "bool": {
+                "should": [
+                    # слова целиком, с опечатками
+                    {"multi_match": {
+                        "query": search_val,
+                        "fields": self.search_fields,
+                        "type": "best_fields",
+                        "operator": "and",
+                        "fuzziness": "AUTO",
+                    }},
+                    # недописанное последнее слово
+                    {"multi_match": {
+                        "query": search_val,
+                        "fields": ['title^3', 'description'],
+                        "type": "phrase_prefix",
+                    }},
+                ],
+                "minimum_should_match": 1,
+            }
+        }
+
+    def filters(self):
+        # в выдаче, как и на сайте, только public_params 0 и 1
+        return super().filters() + [{"terms": {"public_params": [0, 1]}}]
+
 # class BlogsImprovedSearch(BaseImprovedSearch):
 #     search_fields = ['title', 'description', 'content']
 #     index = 'blogs'
@@ -84,13 +170,11 @@ class RatingImprovedSearch(BaseImprovedSearch):
     search_fields = ['name']
     index = 'rating'
 
-    async def filter_by_authors(self, authors):
-        if authors:
-            self.filter_param.append({"terms": {"author_ids.keyword": authors}})
+    def filter_by_authors(self, authors):
+        return [{"terms": {"author_ids.keyword": authors}}] if authors else []
 
-    async def filter_by_status(self, status_val):
-        if status_val:
-            self.filter_param.append({"term": {"status.keyword": status_val}})
+    def filter_by_status(self, status_val):
+        return [{"term": {"status.keyword": status_val}}] if status_val else []
 
 
 class ObjectImprovedSearch(BaseImprovedSearch):
@@ -98,9 +182,8 @@ class ObjectImprovedSearch(BaseImprovedSearch):
     index = 'object'
     sort_param = 'name.keyword'
 
-    async def filter_by_group(self, group_id):
-        if group_id:
-            self.filter_param.append({"term": {"group_id.keyword": str(group_id)}})
+    def filter_by_group(self, group_id):
+        return [{"term": {"group_id.keyword": str(group_id)}}] if group_id else []
 
 
 class AnouncImprovedSearch(BaseImprovedSearch):
@@ -113,6 +196,5 @@ class FieldImprovedSearch(BaseImprovedSearch):
     index = 'field_rating'
     sort_param = 'order'
 
-    async def filter_by_rating(self, rating_id):
-        if rating_id:
-            self.filter_param.append({"term": {"rating_id.keyword": str(rating_id)}})
+    def filter_by_rating(self, rating_id):
+        return [{"term": {"rating_id.keyword": str(rating_id)}}] if rating_id else []
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонён без обращения к сервису: цепь разомкнута."""
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для внешней зависимости.
+
+    closed    — вызовы проходят, результаты копятся в скользящем окне;
+                при failure_rate >= порога (и не менее min_calls вызовов
+                в окне) цепь размыкается.
+    open      — вызовы сразу падают с CircuitOpenError, пока не пройдёт
+                open_timeout.
+    half_open — пропускается один пробный вызов: успех замыкает цепь,
+                ошибка снова размыкает.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: float = 30.0,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        open_timeout: float = 15.0,
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_timeout = open_timeout
+        self.is_failure = is_failure or (lambda exc: True)
+
+        self.state = self.CLOSED
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._calls: Deque[Tuple[float, bool]] = deque()
+        self.counters: Dict[str, int] = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "opened": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window:
+            self._calls.popleft()
+
+    def _current_failure_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for _, ok in self._calls if not ok) / len(self._calls)
+
+    def _open(self, now: float) -> None:
+        self.state = self.OPEN
+        self.opened_at = now
+        self.counters["opened"] += 1
+
+    def _close(self) -> None:
+        self.state = self.CLOSED
+        self.opened_at = None
+        self._calls.clear()
+
+    def _before_call(self, now: float) -> None:
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.open_timeout:
+                self.counters["rejected"] += 1
+                raise CircuitOpenError(self.name)
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.counters["rejected"] += 1
+                raise CircuitOpenError(self.name)
+            self._probe_in_flight = True
+
+    def _record(self, ok: bool, probe: bool) -> None:
+        now = time.monotonic()
+        self.counters["calls"] += 1
+        self.counters["successes" if ok else "failures"] += 1
+
+        if probe:
+            self._probe_in_flight = False
+            if ok:
+                self._close()
+            else:
+                self._open(now)
+            return
+
+        self._calls.append((now, ok))
+        self._trim(now)
+        if (
+            self.state == self.CLOSED
+            and len(self._calls) >= self.min_calls
+            and self._current_failure_rate() >= self.failure_rate
+        ):
+            self._open(now)
+
+    # ------------------------------------------------------------------ #
+    @property
+    def allows_calls(self) -> bool:
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.open_timeout
+        if self.state == self.HALF_OPEN:
+            return not self._probe_in_flight
+        return True
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        self._before_call(time.monotonic())
+        probe = self.state == self.HALF_OPEN
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            # отмена вызывающей стороной ничего не говорит о здоровье сервиса
+            if probe:
+                self._probe_in_flight = False
+            raise
+        except Exception as exc:
+            self._record(ok=not self.is_failure(exc), probe=probe)
+            raise
+        self._record(ok=True, probe=probe)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._trim(now)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "window_calls": len(self._calls),
+            "window_failure_rate": round(self._current_failure_rate(), 3),
+            "open_for": round(now - self.opened_at, 3) if self.opened_at is not None else None,
+            **self.counters,
+        }
@@ -1,105 +1,273 @@
 import json
-from fastapi import Depends
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
 import grpc
 from src.grpc import user_pb2
 from src.grpc import user_pb2_grpc
+from src.grpc.breaker import CircuitBreaker, CircuitOpenError
+from src.grpc.loader import UserLoader, get_user_loader
 from google.protobuf.json_format import MessageToDict, MessageToJson
 from src.db.redis import get_redis
 from redis.asyncio import Redis
 from src.core import config
+from src.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Ответы, которые говорят о запросе, а не о здоровье users-сервиса
+_CLIENT_ERROR_CODES = (
+    grpc.StatusCode.NOT_FOUND,
+    grpc.StatusCode.INVALID_ARGUMENT,
+)
+
+
+def _is_rpc_failure(exc: BaseException) -> bool:
+    if isinstance(exc, grpc.aio.AioRpcError):
+        return exc.code() not in _CLIENT_ERROR_CODES
+    return True
+
 
 class UserRpcService:
     API_RPC_HOST = config.API_RPC_HOST
+    API_RPC_TIMEOUT = config.API_RPC_TIMEOUT
+    # Дедлайны по методам
+    TIMEOUTS = {
+        "GetUsersById": config.API_RPC_TIMEOUT,
+        "GetUsersBySlug": config.API_RPC_TIMEOUT,
+        "GetUsersByIds": config.API_RPC_BATCH_TIMEOUT,
+        "GetUserList": config.API_RPC_LIST_TIMEOUT,
+        "GetUserListByRole": config.API_RPC_LIST_TIMEOUT,
+    }
 
-    def __init__(self):
-        channel = grpc.insecure_channel(self.API_RPC_HOST)
-        self.stub = user_pb2_grpc.UsersStub(channel=channel)
+    CACHE_TTL = config.USER_CACHE_TTL
+    CACHE_STALE_TTL = config.USER_CACHE_STALE_TTL
+    LOCAL_CACHE_TTL = config.USER_LOCAL_CACHE_TTL
 
-    async def _put_to_cache(self, key, data, expire):
-        redis: Redis = await get_redis()
-        print('Set Object To Cache')
-        data_json = json.dumps(data)
-        await redis.set(
-            key,
-            data_json,
-            expire
+    def __init__(self):
+        # Канал grpc.aio привязан к event loop, поэтому создаётся
+        # при старте приложения (connect), а не при импорте модуля.
+        self.channel: Optional[grpc.aio.Channel] = None
+        self.stub: Optional[user_pb2_grpc.UsersStub] = None
+        # key -> (value, fetched_at, checked_at)
+        self._local = LRUCache(maxsize=config.USER_LOCAL_CACHE_SIZE)
+        self.breaker = CircuitBreaker(
+            name="users_rpc",
+            window=config.API_RPC_BREAKER_WINDOW,
+            min_calls=config.API_RPC_BREAKER_MIN_CALLS,
+            failure_rate=config.API_RPC_BREAKER_FAILURE_RATE,
+            open_timeout=config.API_RPC_BREAKER_OPEN_TIMEOUT,
+            is_failure=_is_rpc_failure,
         )
 
-    async def _object_from_cache(self, key: str):
-        redis: Redis = await get_redis()
-        print('Get Object From Cache')
-        data = await redis.get(key)
+    async def connect(self):
+        if self.channel is not None:
+            return
+        self.channel = grpc.aio.insecure_channel(self.API_RPC_HOST)
+        self.stub = user_pb2_grpc.UsersStub(channel=self.channel)
+
+    async def close(self):
+        if self.channel is None:
+            return
+        await self.channel.close()
+        self.channel = None
+        self.stub = None
 
+    async def _get_stub(self) -> user_pb2_grpc.UsersStub:
+        if self.stub is None:
+            await self.connect()
+        return self.stub
 
-        if not data:
-            return None
-        data = json.loads(data)
-        return data
+    async def _call(self, method: str, request):
+        """
+        Вызов метода stub через предохранитель с дедлайном метода.
+        При разомкнутой цепи сразу бросает CircuitOpenError — вызывающий
+        код отдаёт кеш (в т.ч. устаревший) или рендерит страницу без авторов.
+        """
+        stub = await self._get_stub()
+        return await self.breaker.call(
+            getattr(stub, method),
+            request,
+            timeout=self.TIMEOUTS.get(method, self.API_RPC_TIMEOUT),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние предохранителя и кеша для мониторинга."""
+        return {
+            "breaker": self.breaker.snapshot(),
+            "local_cache_entries": len(self._local),
+        }
 
+    # ------------------------------------------------------------------ #
+    #  Кеш: in-process LRU -> Redis -> users-сервис
+    #  В Redis лежит {"v": value, "t": fetched_at} со сроком CACHE_STALE_TTL;
+    #  запись свежая CACHE_TTL секунд, дальше отдаётся только при сбое RPC.
+    # ------------------------------------------------------------------ #
     async def _delete_object_from_cache(self, key: str):
+        self._local.pop(key)
         redis: Redis = await get_redis()
         await redis.delete(key)
 
-    async def user_by_uid(self, uid):
-        # user_json = await self._object_from_cache(f"user_{uid}")
-        # if user_json:
-        #     return user_json
-        user_by_uid_request = user_pb2.GetUserByIdRequest()
-        user_by_uid_request.id = uid
+    async def _cache_lookup(self, keys: List[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Возвращает (fresh, stale): свежие значения и устаревшие кандидаты
+        для отдачи при недоступности users-сервиса.
+        """
+        now = time.time()
+        fresh: Dict[str, Any] = {}
+        stale: Dict[str, Tuple[Any, float]] = {}
+        remote_keys: List[str] = []
+
+        for key in keys:
+            entry = self._local.get(key)
+            if entry is None:
+                remote_keys.append(key)
+                continue
+            value, fetched_at, checked_at = entry
+            if now - checked_at < self.LOCAL_CACHE_TTL and now - fetched_at < self.CACHE_TTL:
+                fresh[key] = value
+            else:
+                stale[key] = (value, fetched_at)
+                remote_keys.append(key)
+
+        if remote_keys:
+            try:
+                redis: Redis = await get_redis()
+                raw_values = await redis.mget(remote_keys)
+            except Exception as e:
+                logger.error(f"User cache MGET failed: {e}")
+                raw_values = [None] * len(remote_keys)
+
+            for key, raw in zip(remote_keys, raw_values):
+                if not raw:
+                    continue
+                try:
+                    cached = json.loads(raw)
+                except ValueError:
+                    continue
+                if not isinstance(cached, dict) or "t" not in cached:
+                    # старый формат (голый user_json) — считаем устаревшим
+                    cached = {"v": cached, "t": 0}
+                value, fetched_at = cached["v"], cached["t"]
+                if now - fetched_at < self.CACHE_TTL:
+                    fresh[key] = value
+                    stale.pop(key, None)
+                    self._local.set(key, (value, fetched_at, now))
+                elif key not in stale or stale[key][1] < fetched_at:
+                    stale[key] = (value, fetched_at)
 
+        return fresh, {key: value for key, (value, _) in stale.items()}
+
+    async def _cache_put_many(self, values: Dict[str, Any]) -> None:
+        if not values:
+            return
+        now = time.time()
+        for key, value in values.items():
+            self._local.set(key, (value, now, now))
         try:
-            rsp: user_pb2.UserInfoResponce = self.stub.GetUsersById(
-                user_by_uid_request
-            )
-            user_json = MessageToDict(rsp)
-            if not user_json:
-                return None
-            await self._put_to_cache(f"user_{uid}", user_json, 60*15)
-            return user_json
+            redis: Redis = await get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.set(key, json.dumps({"v": value, "t": now}), ex=self.CACHE_STALE_TTL)
+                await pipe.execute()
         except Exception as e:
-            print('An error occurred:', e)
-            return None
-
-    async def user_by_slug(self, slug):
-        # user_json = await self._object_from_cache(f"user_{slug}")
-        # if user_json:
-        #     return user_json
-        user_by_uid_request = user_pb2.GetUserBySlugRequest()
-        user_by_uid_request.slug = slug
+            logger.error(f"User cache write failed: {e}")
 
+    async def _read_through(self, key: str, fetch: Callable[[], Awaitable[Any]], default=None):
+        fresh, stale = await self._cache_lookup([key])
+        if key in fresh:
+            return fresh[key]
         try:
-            rsp: user_pb2.UserInfoResponce = self.stub.GetUsersBySlug(
-                user_by_uid_request
-            )
-            user_json = MessageToDict(rsp)
-            if not user_json:
-                return None
-            await self._put_to_cache(f"user_{slug}", user_json, 60*15)
-            return user_json
+            value = await fetch()
+        except CircuitOpenError:
+            # быстрый путь: users-сервис заведомо недоступен
+            return stale.get(key, default)
         except Exception as e:
-            print('An error occurred:', e)
-            return None
+            if not _is_rpc_failure(e):
+                # NOT_FOUND и т.п. — ответ сервиса, а не сбой
+                return default
+            if key in stale:
+                logger.warning(f"Users service failed for {key}, serving stale entry: {e}")
+                return stale[key]
+            logger.error(f"Users service failed for {key}: {e}")
+            return default
+        if value:
+            await self._cache_put_many({key: value})
+        return value
 
+    # ------------------------------------------------------------------ #
+    #  Публичные методы
+    # ------------------------------------------------------------------ #
+    async def user_by_uid(self, uid):
+        async def fetch():
+            user_by_uid_request = user_pb2.GetUserByIdRequest()
+            user_by_uid_request.id = uid
+            rsp: user_pb2.UserInfoResponce = await self._call("GetUsersById", user_by_uid_request)
+            return MessageToDict(rsp) or None
 
-    async def get_users(self, page = 1, search=''):
-        # user_json = await self._object_from_cache(f"users_{page}_{search}")
-        # if user_json:
-        #     return user_json
-        users_request = user_pb2.GetUsersRequest()
-        users_request.page = page
-        users_request.search = search
+        return await self._read_through(f"user_{uid}", fetch)
+
+    async def users_by_ids(self, uids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Пакетный запрос авторов: кеш (локальный + MGET в Redis), остальное —
+        одним вызовом GetUsersByIds. Возвращает словарь uid -> user_json
+        (отсутствующих uid в нём нет).
+        """
+        keys = {uid: f"user_{uid}" for uid in dict.fromkeys(uids) if uid}
+        if not keys:
+            return {}
+
+        fresh, stale = await self._cache_lookup(list(keys.values()))
+        users = {uid: fresh[key] for uid, key in keys.items() if key in fresh}
+        missing = [uid for uid, key in keys.items() if key not in fresh]
+        if not missing:
+            return users
+
+        users_request = user_pb2.GetUsersByIdsRequest()
+        users_request.ids.extend(missing)
         try:
-            rsp: user_pb2.GetUserListResponce = self.stub.GetUserList(
-                users_request
-            )
-            user_json = MessageToDict(rsp, including_default_value_fields=True)
-            if not user_json:
-                return None
-            await self._put_to_cache(f"users_{page}_{search}", user_json, 60*15)
-            return user_json
+            rsp: user_pb2.GetUserListResponce = await self._call("GetUsersByIds", users_request)
         except Exception as e:
-            print('efeAn error occurred:', e)
-            return {'message': 'error'}
+            if not isinstance(e, CircuitOpenError):
+                logger.error(f"GetUsersByIds({len(missing)} ids) failed, serving stale entries: {e}")
+            for uid in missing:
+                if keys[uid] in stale:
+                    users[uid] = stale[keys[uid]]
+            return users
+
+        fetched = {}
+        for user in rsp.users:
+            user_json = MessageToDict(user)
+            if user_json.get("id"):
+                fetched[user_json["id"]] = user_json
+        await self._cache_put_many({f"user_{uid}": user_json for uid, user_json in fetched.items()})
+        users.update(fetched)
+        return users
+
+    def loader(self) -> UserLoader:
+        """DataLoader текущего запроса (см. src/grpc/loader.py)."""
+        return get_user_loader(self)
+
+    async def user_by_slug(self, slug):
+        async def fetch():
+            user_by_uid_request = user_pb2.GetUserBySlugRequest()
+            user_by_uid_request.slug = slug
+            rsp: user_pb2.UserInfoResponce = await self._call("GetUsersBySlug", user_by_uid_request)
+            return MessageToDict(rsp) or None
+
+        return await self._read_through(f"user_{slug}", fetch)
+
+
+    async def get_users(self, page = 1, search=''):
+        async def fetch():
+            users_request = user_pb2.GetUsersRequest()
+            users_request.page = page
+            users_request.search = search
+            rsp: user_pb2.GetUserListResponce = await self._call("GetUserList", users_request)
+            return MessageToDict(rsp, including_default_value_fields=True) or None
+
+        return await self._read_through(f"users_{page}_{search}", fetch, default={'message': 'error'})
 
     async def get_users_by_role(self, role_id, page=1, search=''):
         users_request = user_pb2.GetUserByFilterRequst()
@@ -107,13 +275,11 @@ class UserRpcService:
         users_request.page = page
         users_request.search = search
         try:
-            rsp: user_pb2.GetUserListResponce = self.stub.GetUserListByRole(
-                users_request
-            )
+            rsp: user_pb2.GetUserListResponce = await self._call("GetUserListByRole", users_request)
             user_json = MessageToDict(rsp)
             return user_json
-        except:
-            print('ERROR')
+        except Exception as e:
+            logger.error(f"GetUserListByRole({role_id}) failed: {e}")
             return {'message': 'error'}
 
 user_rpc = UserRpcService()
@@ -0,0 +1,96 @@
+"""
+Локальный фейковый users-сервис для проверки клиента и предохранителя.
+
+    python -m src.grpc.fake_server --port 50051 --latency 2.0 --error-rate 0.3
+
+и API_RPC_HOST=127.0.0.1:50051 у веб-приложения. Задержку и долю ошибок
+можно менять на лету через атрибуты FakeUsersServicer.
+"""
+import argparse
+import asyncio
+import random
+
+import grpc
+from google.protobuf.struct_pb2 import Struct
+
+from src.grpc import user_pb2
+from src.grpc import user_pb2_grpc
+
+
+class FakeUsersServicer(user_pb2_grpc.UsersServicer):
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, users: int = 50):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.users = {f"user-{i}": self._make_user(f"user-{i}") for i in range(users)}
+
+    @staticmethod
+    def _make_user(uid: str) -> user_pb2.UserInfoResponce:
+        image = Struct()
+        image.update({"image_webp_200": f"/media/{uid}.webp", "alt": uid})
+        return user_pb2.UserInfoResponce(
+            id=uid,
+            first_name=f"Имя {uid}",
+            last_name=f"Фамилия {uid}",
+            slug=uid,
+            image=image,
+        )
+
+    async def _simulate(self, context):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "injected failure")
+
+    async def GetUsersById(self, request, context):
+        await self._simulate(context)
+        user = self.users.get(request.id)
+        if user is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "user not found")
+        return user
+
+    async def GetUsersByIds(self, request, context):
+        await self._simulate(context)
+        users = [self.users[uid] for uid in request.ids if uid in self.users]
+        return user_pb2.GetUserListResponce(users=users, total_users=len(users))
+
+    async def GetUsersBySlug(self, request, context):
+        await self._simulate(context)
+        user = self.users.get(request.slug)
+        if user is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "user not found")
+        return user
+
+    async def GetUserList(self, request, context):
+        await self._simulate(context)
+        users = list(self.users.values())
+        page = max(request.page, 1)
+        return user_pb2.GetUserListResponce(
+            users=users[(page - 1) * 20:page * 20],
+            total_users=len(users),
+        )
+
+
+async def serve(port: int, servicer: FakeUsersServicer) -> grpc.aio.Server:
+    server = grpc.aio.server()
+    user_pb2_grpc.add_UsersServicer_to_server(servicer, server)
+    server.add_insecure_port(f"127.0.0.1:{port}")
+    await server.start()
+    return server
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fake Users gRPC server")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов UNAVAILABLE")
+    args = parser.parse_args()
+
+    server = await serve(args.port, FakeUsersServicer(latency=args.latency, error_rate=args.error_rate))
+    print(f"Fake users service on 127.0.0.1:{args.port}")
+    await server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
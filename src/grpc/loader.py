@@ -0,0 +1,73 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class UserLoader:
+    """
+    DataLoader для авторов: все uid, запрошенные в пределах одного шага
+    event loop, уходят в users-сервис одним вызовом GetUsersByIds.
+    Живёт в рамках одного HTTP-запроса и заодно мемоизирует результаты.
+    """
+
+    def __init__(self, rpc):
+        self._rpc = rpc
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._queue: List[str] = []
+
+    def load(self, uid: str) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        future = self._futures.get(uid)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[uid] = future
+        self._queue.append(uid)
+        if len(self._queue) == 1:
+            # Отправка откладывается до следующего шага цикла, чтобы
+            # собрать uid из всех параллельных корутин запроса.
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, uids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        return list(await asyncio.gather(*(self.load(uid) for uid in uids)))
+
+    def _dispatch(self) -> None:
+        uids, self._queue = self._queue, []
+        asyncio.ensure_future(self._resolve(uids))
+
+    async def _resolve(self, uids: List[str]) -> None:
+        try:
+            users = await self._rpc.users_by_ids(uids)
+        except Exception:
+            users = {}
+        for uid in uids:
+            future = self._futures[uid]
+            if not future.done():
+                future.set_result(users.get(uid))
+
+
+_user_loader: ContextVar[Optional[UserLoader]] = ContextVar("user_loader", default=None)
+
+
+def get_user_loader(rpc) -> UserLoader:
+    """
+    Loader текущего HTTP-запроса. Вне запроса (фоновые задачи: SWR-обновление
+    страниц, наблюдатель) — новый одноразовый loader: в контексте задачи он
+    не сохраняется, иначе его мемо авторов жило бы столько же, сколько задача.
+    """
+    loader = _user_loader.get()
+    if loader is None:
+        return UserLoader(rpc)
+    return loader
+
+
+def new_user_loader(rpc) -> UserLoader:
+    """
+    Создаёт свежий UserLoader для текущего контекста (HTTP-запроса).
+    Контекст запроса отбрасывается вместе с задачей, сбрасывать не нужно.
+    """
+    loader = UserLoader(rpc)
+    _user_loader.set(loader)
+    return loader
@@ -19,6 +19,11 @@ class UsersStub(object):
                 request_serializer=user__pb2.GetUserByIdRequest.SerializeToString,
                 response_deserializer=user__pb2.UserInfoResponce.FromString,
                 )
+        self.GetUsersByIds = channel.unary_unary(
+                '/Users/GetUsersByIds',
+                request_serializer=user__pb2.GetUsersByIdsRequest.SerializeToString,
+                response_deserializer=user__pb2.GetUserListResponce.FromString,
+                )
         self.GetUsersBySlug = channel.unary_unary(
                 '/Users/GetUsersBySlug',
                 request_serializer=user__pb2.GetUserBySlugRequest.SerializeToString,
@@ -50,6 +55,12 @@ class UsersServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetUsersByIds(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetUsersBySlug(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -82,6 +93,11 @@ def add_UsersServicer_to_server(servicer, server):
                     request_deserializer=user__pb2.GetUserByIdRequest.FromString,
                     response_serializer=user__pb2.UserInfoResponce.SerializeToString,
             ),
+            'GetUsersByIds': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetUsersByIds,
+                    request_deserializer=user__pb2.GetUsersByIdsRequest.FromString,
+                    response_serializer=user__pb2.GetUserListResponce.SerializeToString,
+            ),
             'GetUsersBySlug': grpc.unary_unary_rpc_method_handler(
                     servicer.GetUsersBySlug,
                     request_deserializer=user__pb2.GetUserBySlugRequest.FromString,
@@ -129,6 +145,23 @@ class Users(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def GetUsersByIds(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Users/GetUsersByIds',
+            user__pb2.GetUsersByIdsRequest.SerializeToString,
+            user__pb2.GetUserListResponce.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def GetUsersBySlug(request,
             target,
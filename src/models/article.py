@@ -1,7 +1,7 @@
 # src/models/article.py
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import UUID, JSON, ARRAY
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy.dialects.postgresql import UUID, JSON, ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred, relationship, backref
 
 from src.models.base import Base, UUIDMixin, CreatedUpdatedMixin
 from src.models.category import Category
@@ -38,6 +38,16 @@ article_sitemap = sa.Table(
 )
 # ───────────────────────────────────────────────────────────────────────────────
 
+# Поисковый вектор (src/services/search.py): заголовок, анонс и текст без
+# HTML-тегов с весами A/B/C, русская конфигурация. Колонка генерируемая,
+# создаётся скриптом create_search_index.py вместе с индексами.
+SEARCH_CONFIG = "russian"
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', regexp_replace(coalesce(content, ''), '<[^>]+>', ' ', 'g')), 'C')"
+)
+
 
 class Article(UUIDMixin, CreatedUpdatedMixin, Base):
     __tablename__ = "news_article"
@@ -70,6 +80,9 @@ class Article(UUIDMixin, CreatedUpdatedMixin, Base):
     public_params = sa.Column(sa.Integer, default=0)
     public_types = sa.Column(ARRAY(sa.String), default=[])
     news_source = sa.Column(sa.JSON, nullable=True, default=None)
+
+    # поиск: только в WHERE/ORDER BY, в выборки сущностей не попадает
+    search_vector = deferred(sa.Column(TSVECTOR, sa.Computed(SEARCH_VECTOR_SQL, persisted=True)))
     # is_advertising = sa.Column(sa.Boolean, default=False)
 
     # связи
@@ -1,6 +1,7 @@
 # src/models/podcast.py
 import sqlalchemy as sa
 from sqlalchemy.dialects.postgresql import JSON, ARRAY
+from sqlalchemy.orm import deferred
 
 from src.models.base import Base, UUIDMixin, CreatedUpdatedMixin
 
@@ -24,5 +25,10 @@ class Podcast(UUIDMixin, CreatedUpdatedMixin, Base):
     # авторство
     author_ids = sa.Column(ARRAY(sa.String(36)))
 
+    # метрики: колонку пишет и читает только перенос просмотров
+    # (src/services/views.py); в select(Podcast) она не попадает, поэтому
+    # страницы работают и до ALTER из create_podcast_table.py
+    view_count = deferred(sa.Column(sa.Integer, default=0))
+
     def __repr__(self) -> str:  # pragma: no cover
         return f"<Podcast {self.title!r}>"
@@ -1,6 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
-from src.db.database import get_db
+from src.db.database import get_db, get_primary_db
+from src.grpc.client import user_rpc
+from src.grpc.loader import UserLoader, new_user_loader
 from typing import Annotated
 
 DBSessionDep = Annotated[AsyncSession, Depends(get_db)]
+# Чтение с primary: там, где отставание реплики недопустимо (предпросмотр)
+PrimaryDBSessionDep = Annotated[AsyncSession, Depends(get_primary_db)]
+
+
+async def get_user_loader() -> UserLoader:
+    # Один DataLoader авторов на HTTP-запрос
+    return new_user_loader(user_rpc)
@@ -18,20 +18,23 @@ from src.services import podcast as podcast_service
 from src.services.base import get_base
 from src.services.author import get_authors, author_detail, api_author
 from src.services.search import search_results
+from src.services import search_elastic, suggest, views
+from src.core import config
 from src.utils.decorators import cache_response
 from src.template_tags import pretty_date, format_number
 from src.db.redis import get_redis
 from src.db.elastic import get_elastic
-from src.routers.deps import DBSessionDep
+from src.routers.deps import DBSessionDep, PrimaryDBSessionDep, get_user_loader
 from src.db.database import db_session_manager
 from src.elastic.modules import ArticlesImprovedSearch
 from src.elastic.schema import PaginationResponse
 from elasticsearch import AsyncElasticsearch
 from src.services.search import search_results
 from src.utils.pagination import Pagination, paginate
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
+from src.grpc.client import user_rpc
 
-router = APIRouter(tags=["App"])
+router = APIRouter(tags=["App"], dependencies=[Depends(get_user_loader)])
 
 templates = Jinja2Templates(directory="templates")
 SITE_URL = os.getenv("SITE_URL", "https://nationalbusiness.kz")
@@ -51,8 +54,10 @@ async def search(
     q: str = "",
     page: int = Query(default=1, ge=1),
     s: str = None,
+    after: str = None,
+    before: str = None,
 ):
-    result = await search_results(db=db, page_number=page, q=q, sort=s)
+    result = await search_results(db=db, page_number=page, q=q, sort=s, after=after, before=before)
 
     context = {
         "total": result["page"].total,
@@ -64,8 +69,13 @@ async def search(
     return templates.TemplateResponse(request=request, name="pages/search-test.html", context=context)
 
 
+@router.get('/api/suggest')
+async def api_suggest(q: str = "", limit: int = Query(default=config.SUGGEST_LIMIT, ge=1, le=20)):
+    return JSONResponse({"q": q, "items": suggest.suggest(q, limit)})
+
+
 @router.get('/')
-@cache_response(redis_key_prefix="index_page", expiration=60)
+@cache_response(redis_key_prefix="index_page", expiration=300, schedule_aware=True)
 async def index(request: Request, db: DBSessionDep):
     context = await get_index(db=db)
     return templates.TemplateResponse(request=request, name="pages/index.html", context=context)
@@ -74,34 +84,40 @@ async def index(request: Request, db: DBSessionDep):
 @router.get('/news/{slug}/', name="article_detail")
 async def articles(request: Request, db: DBSessionDep, slug: str, response: Response, curr_redis=Depends(get_redis)):
     context = await article_service.article_detail(db=db, slug=slug, curr_redis=curr_redis)
+    views.record(request, "news_article", context["article"].id)
     return templates.TemplateResponse(request=request, name="pages/article.html", context=context)
 
 
 @router.get('/preview/{uid}/')
-async def articles_preview(request: Request, db: DBSessionDep, uid: str):
+async def articles_preview(request: Request, db: PrimaryDBSessionDep, uid: str):
     context = await article_service.article_preview(db=db, uid=uid)
     return templates.TemplateResponse(request=request, name="pages/article-preview.html", context=context)
 
 
 @router.get('/allnews/', name="allnews")
-async def allnews(request: Request, db: DBSessionDep, page: int = 1):
-    context = await article_service.get_all_articles(db=db, page=page)
+async def allnews(request: Request, db: DBSessionDep, page: int = Query(default=1, ge=1),
+                  after: str = None, before: str = None):
+    context = await article_service.get_all_articles(db=db, page=page, after=after, before=before)
     return templates.TemplateResponse(request=request,
                                       name="pages/allnews.html",
                                       context=context)
 
 
 @router.get('/category/{slug}/')
-@cache_response(redis_key_prefix="category_page", expiration=60)
-async def category(request: Request, db: DBSessionDep, slug: str, page: int = Query(default=1, ge=1)):
-    context = await get_category(db=db, slug=slug, page=page)
+@cache_response(redis_key_prefix="category_page", expiration=3600, schedule_aware=True,
+                key_args=("slug", "page"), bypass_args=("after", "before"))
+async def category(request: Request, db: DBSessionDep, slug: str, page: int = Query(default=1, ge=1),
+                   after: str = None, before: str = None):
+    context = await get_category(db=db, slug=slug, page=page, after=after, before=before)
     return templates.TemplateResponse(request=request, name="pages/category.html", context=context)
 
 
 @router.get('/tag/{slug}/')
-@cache_response(redis_key_prefix="tag_page", expiration=60)
-async def tag(request: Request, db: DBSessionDep, slug: str, page: int = Query(default=1, ge=1)):
-    context = await get_tag(db=db, slug=slug, page=page)
+@cache_response(redis_key_prefix="tag_page", expiration=3600, schedule_aware=True,
+                key_args=("slug", "page"), bypass_args=("after", "before"))
+async def tag(request: Request, db: DBSessionDep, slug: str, page: int = Query(default=1, ge=1),
+              after: str = None, before: str = None):
+    context = await get_tag(db=db, slug=slug, page=page, after=after, before=before)
     return templates.TemplateResponse(request=request, name="pages/tag.html", context=context)
 
 
@@ -115,9 +131,11 @@ async def authors(request: Request, db: DBSessionDep, page: int = Query(default=
 async def redirect_author(slug: str, page: int = Query(default=1, ge=1)):
     return RedirectResponse(url=f"/authors/{slug}/?page={page}", status_code=307)
 @router.get('/authors/{slug}/')
-@cache_response(redis_key_prefix="author_page", expiration=60)
-async def author(request: Request, db: DBSessionDep, slug: str, page: int = Query(default=1, ge=1)):
-    context = await author_detail(db=db, uid=slug, page=page)
+@cache_response(redis_key_prefix="author_page", expiration=3600, schedule_aware=True,
+                key_args=("slug", "page"), bypass_args=("after", "before"))
+async def author(request: Request, db: DBSessionDep, slug: str, page: int = Query(default=1, ge=1),
+                 after: str = None, before: str = None):
+    context = await author_detail(db=db, uid=slug, page=page, after=after, before=before)
     return templates.TemplateResponse(request=request, name="pages/author.html", context=context)
 
 
@@ -128,6 +146,7 @@ async def contacts(request: Request):
 @router.get('/podcasts/{slug}/', name="podcast_detail")
 async def podcast_page(request: Request, db: DBSessionDep, slug: str, curr_redis=Depends(get_redis)):
     context = await podcast_service.podcast_detail(db=db, slug=slug, curr_redis=curr_redis)
+    views.record(request, "news_podcast", context["podcast"].id)
     return templates.TemplateResponse(request=request, name="pages/podcast.html", context=context)
 
 @router.get('/about/')
@@ -138,6 +157,19 @@ async def about(request: Request):
 async def privacy_policy(request: Request):
     return templates.TemplateResponse(request=request, name="pages/privacy-policy.html", context={})
 
+@router.get('/health/users-rpc/', include_in_schema=False)
+async def users_rpc_health():
+    return JSONResponse(user_rpc.stats())
+
+@router.get('/health/search/', include_in_schema=False)
+async def search_health():
+    return JSONResponse({"backend": config.SEARCH_BACKEND, "breaker": search_elastic.breaker.snapshot()})
+
+@router.get('/health/db/', include_in_schema=False)
+async def db_health():
+    return JSONResponse(db_session_manager.stats())
+
+
 async def http_exception_handler(request: Request, exc: HTTPException):
     if exc.status_code == 404:
         async with db_session_manager.session() as db:
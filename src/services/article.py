@@ -2,6 +2,7 @@
 import logging
 import re
 from datetime import datetime, timedelta
+from typing import Optional
 from urllib import parse
 
 from redis.exceptions import RedisError
@@ -9,16 +10,20 @@ from sqlalchemy import and_
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import load_only, selectinload
-from sqlalchemy.ext.serializer import loads, dumps
 
+from src.core import config
 from src.db.database import get_db  # noqa: F401 (for DI-Depends)
 from src.grpc.client import user_rpc
 from src.models.article import Article, article_category
 from src.models.category import Category
 from src.models.fixed_material import FixedArticle  # noqa: F401 (используется через relationship)
+from src.services.author import hydrate_first_authors
+from src.services.cards import ArticleCard, card_query, hydrate_cards
+from src.services.loading import ARTICLE_DETAIL, ARTICLE_FEED
+from src.services.snapshots import ArticleSnapshot, dump_snapshot, load_snapshot
 from src.utils.error_handlers import get_object_or_404
-from src.utils.pagination import paginate, Pagination
+from src.utils.l1_cache import get_cached, set_cached
+from src.utils.pagination import keyset_paginate
 
 # Тайм-зона проекта (+5 ч. к UTC)
 TZ_SHIFT = timedelta(hours=5)
@@ -36,8 +41,7 @@ async def get_articles(db: AsyncSession):
     q = (
         select(Article)
         .filter(filters)
-        .options(load_only(Article.id, Article.title, Article.alias,
-                           Article.image, Article.published_date))
+        .options(*ARTICLE_FEED)
         .order_by(Article.published_date.desc())
         .limit(5)
     )
@@ -48,31 +52,42 @@ async def get_articles(db: AsyncSession):
 # --------------------------------------------------------------------------- #
 #  Детальная страница
 # --------------------------------------------------------------------------- #
+async def _article_snapshot(db: AsyncSession, slug: str, filters, curr_redis) -> ArticleSnapshot:
+    """
+    Снимок статьи: из кеша (ключ article_{slug}), а при промахе — из БД
+    с записью в кеш. Один снимок обслуживает и обычную, и AMP-страницу.
+    """
+    key = f"article_{slug}"
+    try:
+        article = load_snapshot(ArticleSnapshot, await get_cached(curr_redis, key))
+    except RedisError as e:
+        logging.error(f"Redis GET error: {e}")
+        article = None
+    if article is not None:
+        return article
+
+    query = (
+        select(Article)
+        .filter(filters, Article.alias == slug)
+        .options(*ARTICLE_DETAIL)
+    )
+    article = ArticleSnapshot.from_model(await get_object_or_404(query=query, session=db))
+    try:
+        await set_cached(curr_redis, key, dump_snapshot(article), ex=config.ARTICLE_CACHE_TTL)
+    except RedisError as e:
+        logging.error(f"Redis SET error: {e}")
+    return article
+
+
 async def article_detail(db: AsyncSession, slug: str, curr_redis):
     dt = datetime.now() + TZ_SHIFT
     filters = and_(Article.article_status == "P", Article.published_date <= dt)
 
-    # ── 1. Пытаемся вытащить из Redis ─────────────────────────────────────────
-    try:
-        cached = await curr_redis.get(f"article_{slug}")
-        if cached:
-            article: Article = loads(cached)
-        else:
-            raise KeyError
-    except Exception:
-        query = (
-            select(Article)
-            .filter(filters, Article.alias == slug)
-            .options(selectinload(Article.categories), selectinload(Article.tags))
-        )
-        article = await get_object_or_404(query=query, session=db)
-        try:
-            await curr_redis.set(f"article_{slug}", dumps(article))
-        except RedisError as e:
-            logging.error(f"Redis SET error: {e}")
+    # ── 1. Снимок статьи из кеша или БД ───────────────────────────────────────
+    article = await _article_snapshot(db, slug, filters, curr_redis)
 
     author_ids = article.author_ids or []
-    authors = [await user_rpc.user_by_uid(uid=author_id) for author_id in author_ids]
+    authors = await user_rpc.loader().load_many(author_ids)
     authors = [author for author in authors if author]
 
     # ── 3. Похожие статьи (по категориям) ─────────────────────────────────────
@@ -88,6 +103,7 @@ async def article_detail(db: AsyncSession, slug: str, curr_redis):
             Article.alias != slug,
             Category.id.in_(category_ids),
         )
+        .options(*ARTICLE_FEED)
         .order_by(Article.published_date.desc())
         .limit(5)
     )
@@ -108,12 +124,12 @@ async def article_preview(db: AsyncSession, uid: str):
     query = (
         select(Article)
         .filter(Article.id == uid, Article.article_status != "R")
-        .options(selectinload(Article.categories), selectinload(Article.tags))
+        .options(*ARTICLE_DETAIL)
     )
     article = await get_object_or_404(query=query, session=db)
 
     author_ids = article.author_ids or []
-    authors = [await user_rpc.user_by_uid(uid=author_id) for author_id in author_ids]
+    authors = await user_rpc.loader().load_many(author_ids)
     authors = [author for author in authors if author]
 
     category_ids = [cat.id for cat in article.categories]
@@ -123,6 +139,7 @@ async def article_preview(db: AsyncSession, uid: str):
         select(Article)
         .join(article_category).join(Category)
         .filter(filters, Article.id != uid, Category.id.in_(category_ids))
+        .options(*ARTICLE_FEED)
         .order_by(Article.published_date.desc())
         .limit(5)
     )
@@ -132,8 +149,7 @@ async def article_preview(db: AsyncSession, uid: str):
     latest_q = (
         select(Article)
         .filter(filters)
-        .options(load_only(Article.alias, Article.title,
-                           Article.image, Article.published_date))
+        .options(*ARTICLE_FEED)
         .order_by(Article.published_date.desc())
         .limit(5)
     )
@@ -155,24 +171,8 @@ async def article_amp(db: AsyncSession, slug: str, curr_redis):
     dt = datetime.now() + TZ_SHIFT
     filters = and_(Article.article_status == "P", Article.published_date <= dt)
 
-    # ── 1. Пытаемся вытащить из Redis ─────────────────────────────────────────
-    try:
-        cached = await curr_redis.get(f"article_amp_{slug}")
-        if cached:
-            article: Article = loads(cached)
-        else:
-            raise KeyError
-    except Exception:
-        query = (
-            select(Article)
-            .filter(filters, Article.alias == slug)
-            .options(selectinload(Article.categories), selectinload(Article.tags))
-        )
-        article = await get_object_or_404(query=query, session=db)
-        try:
-            await curr_redis.set(f"article_amp_{slug}", dumps(article))
-        except RedisError as e:
-            logging.error(f"Redis SET error: {e}")
+    # ── 1. Снимок статьи (общий с детальной страницей) ───────────────────────
+    article = await _article_snapshot(db, slug, filters, curr_redis)
 
     # ── 2. Преобразование контента в AMP ──────────────────────────────────────
     text = parse.unquote(article.content).replace("\n", "")
@@ -265,7 +265,7 @@ async def article_amp(db: AsyncSession, slug: str, curr_redis):
     text = re.sub(r'\snowrap(="[^"]*"|=\'[^\']*\'|)', "", text)
 
     # ── 3. Авторы и похожие статьи ────────────────────────────────────────────
-    authors = [await user_rpc.user_by_uid(uid) for uid in article.author_ids]
+    authors = await user_rpc.loader().load_many(article.author_ids or [])
     authors = [a for a in authors if a]
 
     category_ids = [cat.id for cat in article.categories]
@@ -274,6 +274,7 @@ async def article_amp(db: AsyncSession, slug: str, curr_redis):
         .join(article_category)
         .join(Category)
         .filter(filters, Article.id != article.id, Category.id.in_(category_ids))
+        .options(*ARTICLE_FEED)
         .order_by(Article.published_date.desc())
         .limit(5)
     )
@@ -300,9 +301,10 @@ async def article_amp(db: AsyncSession, slug: str, curr_redis):
 
     return context
 
-async def get_all_articles(db: AsyncSession, page: int):
+async def get_all_articles(db: AsyncSession, page: int, after: Optional[str] = None, before: Optional[str] = None):
     """
-    Лента всех опубликованных материалов.
+    Лента всех опубликованных материалов (keyset-пагинация, см.
+    src/utils/pagination.py::keyset_paginate).
     """
     dt = datetime.now() + TZ_SHIFT
     filters = and_(
@@ -310,15 +312,14 @@ async def get_all_articles(db: AsyncSession, page: int):
         Article.article_status == "P"
     )
 
-    query = (
-        select(Article)
-        .filter(filters)
-        .options(selectinload(Article.categories))
-        .order_by(Article.published_date.desc())
-    )
+    query = card_query().filter(filters)
 
-    pagination = Pagination(page=page, per_page=10)
-    page_obj = await paginate(db, pagination, query)
+    page_obj = await keyset_paginate(
+        db, query, per_page=10, page=page, after=after, before=before, index_key="allnews",
+        row_factory=ArticleCard.from_row,
+    )
+    await hydrate_cards(page_obj.items)
+    await hydrate_first_authors(page_obj.items)
 
     return {"page": page_obj}
 
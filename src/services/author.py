@@ -1,18 +1,51 @@
 # services/author.py
 from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 
 from fastapi import HTTPException
 from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 from src.grpc.client import user_rpc
 from src.models.article import Article
-from src.utils.pagination import paginate, Pagination
+from src.services.cards import ArticleCard, card_query, hydrate_cards
+from src.utils.pagination import keyset_paginate
 
 TZ_SHIFT = timedelta(hours=5)
 
 
+def map_author_for_template(user: Dict[str, Any]) -> Dict[str, Any]:
+    image = user.get("image") or {}
+    return {
+        "firstName": user.get("firstName", ""),
+        "lastName": user.get("lastName", ""),
+        "image": {
+            "image_200_webp": image.get("image_200_webp") or image.get("image_webp_200"),
+            "image_webp_200": image.get("image_webp_200") or image.get("image_200_webp"),
+            "alt": image.get("alt", ""),
+        },
+    }
+
+
+async def hydrate_first_authors(articles: List[Any]) -> None:
+    """
+    Проставляет карточкам first_author. Все первые авторы страницы
+    собираются DataLoader'ом запроса в один вызов GetUsersByIds.
+    """
+    first_ids = [a.author_ids[0] for a in articles if getattr(a, "author_ids", None)]
+    loader = user_rpc.loader()
+    users = await loader.load_many(uid for uid in first_ids if uid)
+    authors_map: Dict[str, Dict[str, Any]] = {u["id"]: u for u in users if u and u.get("id")}
+
+    for a in articles:
+        fa = None
+        author_ids = getattr(a, "author_ids", None)
+        if author_ids:
+            u = authors_map.get(author_ids[0])
+            if u:
+                fa = map_author_for_template(u)
+        setattr(a, "first_author", fa)
+
+
 async def get_authors(db: AsyncSession, page: int, q: str = ""):
     authors_data = await user_rpc.get_users(page=page)
     print(authors_data)
@@ -42,7 +75,13 @@ async def get_authors(db: AsyncSession, page: int, q: str = ""):
     return {"authors": authors, "page": page, "pages": pages}
 
 
-async def author_detail(db: AsyncSession, page: int = 1, uid: str = ""):
+async def author_detail(
+    db: AsyncSession,
+    page: int = 1,
+    uid: str = "",
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+):
     dt = datetime.now() + TZ_SHIFT
 
     filters = and_(
@@ -54,16 +93,14 @@ async def author_detail(db: AsyncSession, page: int = 1, uid: str = ""):
     if not author:
         raise HTTPException(status_code=404, detail="Not Found")
 
-    query = (
-        select(Article)
-        .options(selectinload(Article.categories))  # <-- ЭТО НУЖНО
-        .filter(filters, Article.author_ids.contains([author.get("id", "")]))
-        .order_by(Article.published_date.desc())
-    )
+    query = card_query().filter(filters, Article.author_ids.contains([author.get("id", "")]))
 
-    page_size = 10
-    pagination = Pagination(page=page, per_page=page_size)
-    page = await paginate(db, pagination, query)
+    page = await keyset_paginate(
+        db, query, per_page=10, page=page, after=after, before=before, index_key=f"author:{author.get('id', '')}",
+        row_factory=ArticleCard.from_row,
+    )
+    await hydrate_cards(page.items)
+    await hydrate_first_authors(page.items)
 
     context = {
         "author": author,
@@ -4,10 +4,10 @@ from datetime import datetime, timedelta
 from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import load_only
 
 from src.models.article import Article
 from src.models.fixed_material import FixedArticle
+from src.services.loading import ARTICLE_FEED
 from src.utils.pagination import paginate, Pagination
 
 TZ_SHIFT = timedelta(hours=5)
@@ -25,8 +25,7 @@ async def get_base(db: AsyncSession, title: str = "", year: str = "2025"):
         select(Article)
         .join(FixedArticle, Article.id == FixedArticle.article_id)
         .filter(filters)
-        .options(load_only(Article.alias, Article.title,
-                           Article.image, Article.published_date))
+        .options(*ARTICLE_FEED)
         .order_by(FixedArticle.order)
         .limit(5)
     )
@@ -36,8 +35,7 @@ async def get_base(db: AsyncSession, title: str = "", year: str = "2025"):
     latest_q = (
         select(Article)
         .filter(filters)
-        .options(load_only(Article.alias, Article.title,
-                           Article.image, Article.published_date))
+        .options(*ARTICLE_FEED)
         .order_by(Article.published_date.desc())
         .limit(6)
     )
@@ -0,0 +1,130 @@
+# services/cards.py
+"""
+Карточки списков без ORM.
+
+Ленты (все новости, категории, теги, автор, поиск, 404) показывают
+только карточку, поэтому вместо сущностей Article с identity map и
+загрузкой связей выбираются нужные колонки Core-запросом, а каждая
+строка превращается в ArticleCard со __slots__. id категорий статьи
+приходят в той же строке (array_agg), названия и slug берутся из дерева
+категорий в памяти (src/services/category_tree.py) — отдельного запроса
+за категориями нет.
+
+    q = card_query().filter(...)
+    page = await keyset_paginate(db, q, ..., row_factory=ArticleCard.from_row)
+    await hydrate_cards(page.items)
+    await hydrate_first_authors(page.items)   # src/services/author.py
+
+Полные сущности (ARTICLE_CARD в src/services/loading.py) остаются там,
+где нужны поля сверх карточки: главная, предпросмотр.
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from src.models.article import Article, article_category
+from src.services.category_tree import get_category_tree
+
+DEFAULT_BADGE = "Новости"
+
+
+class CategoryRef:
+    """Категория карточки: то, что нужно для бейджа и ссылки."""
+    __slots__ = ("id", "slug", "title")
+
+    def __init__(self, id: uuid.UUID, slug: str, title: str):
+        self.id = id
+        self.slug = slug
+        self.title = title
+
+
+class ArticleCard:
+    __slots__ = (
+        "id",
+        "alias",
+        "title",
+        "image",
+        "published_date",
+        "description",
+        "author_ids",
+        "category_ids",
+        "categories",
+        "badge_category",
+        "first_author",
+    )
+
+    def __init__(
+        self,
+        id: uuid.UUID,
+        alias: str,
+        title: str,
+        image: Optional[Dict[str, Any]],
+        published_date: Optional[datetime],
+        description: Optional[str],
+        author_ids: Optional[List[str]],
+        category_ids: Sequence[uuid.UUID] = (),
+    ):
+        self.id = id
+        self.alias = alias
+        self.title = title
+        self.image = image or {}
+        self.published_date = published_date
+        self.description = description
+        self.author_ids = author_ids or []
+        self.category_ids = tuple(category_ids or ())
+        self.categories: Tuple[CategoryRef, ...] = ()
+        self.badge_category = DEFAULT_BADGE
+        self.first_author: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_row(cls, row) -> "ArticleCard":
+        return cls(*row)
+
+
+class SearchCard(ArticleCard):
+    """Карточка результата поиска: плюс фрагмент с подсветкой."""
+    __slots__ = ("snippet",)
+
+    def __init__(self, *columns, snippet: Optional[str] = None):
+        super().__init__(*columns)
+        self.snippet = snippet
+
+    @classmethod
+    def from_row(cls, row) -> "SearchCard":
+        *columns, snippet = row
+        return cls(*columns, snippet=snippet)
+
+
+def card_query():
+    """
+    select колонок карточки в порядке аргументов ArticleCard; фильтры,
+    сортировка и лимит добавляются как к обычному select(Article).
+    """
+    category_ids = (
+        select(func.array_agg(article_category.c.category_id))
+        .where(article_category.c.article_id == Article.id)
+        .scalar_subquery()
+        .label("category_ids")
+    )
+    return select(
+        Article.id,
+        Article.alias,
+        Article.title,
+        Article.image,
+        Article.published_date,
+        Article.description,
+        Article.author_ids,
+        category_ids,
+    )
+
+
+async def hydrate_cards(cards: List[ArticleCard]) -> None:
+    """Категории и бейдж карточек — из дерева в памяти, без SQL."""
+    tree = await get_category_tree()
+    for card in cards:
+        nodes = [node for node in map(tree.get, card.category_ids) if node is not None]
+        card.categories = tuple(CategoryRef(n.id, n.slug, n.title) for n in nodes)
+        card.badge_category = nodes[-1].title if nodes else DEFAULT_BADGE
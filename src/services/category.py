@@ -4,27 +4,27 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 
+from fastapi import HTTPException
 from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload, load_only
 
 from src.models.article import Article
 from src.models.category import Category
-from src.utils.error_handlers import get_object_or_404
-from src.utils.pagination import paginate, Pagination
+from src.services.author import hydrate_first_authors
+from src.services.cards import ArticleCard, card_query, hydrate_cards
+from src.services.category_tree import CategoryNode, get_category_tree
+from src.utils.pagination import keyset_paginate
 
 TZ_SHIFT = timedelta(hours=5)
 
 
-def _last_category_title(art: Article) -> str:
-    try:
-        return art.categories[-1].title if art.categories else "Новости"
-    except Exception:
-        return "Новости"
-
-
-async def get_category(db: AsyncSession, page: int, slug: str) -> Dict[str, Any]:
+async def get_category(
+    db: AsyncSession,
+    page: int,
+    slug: str,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Категорийная страница.
     Parent (нет parent_category_id):
@@ -37,20 +37,16 @@ async def get_category(db: AsyncSession, page: int, slug: str) -> Dict[str, Any]
           last_list    = items[15:24]  (9)
     Subcategory (есть parent_category_id):
       - обычная лента по 10.
+    Пагинация keyset: page — нумерованные страницы, after/before — курсоры.
     """
-    # Категория + дети
-    category_q = (
-        select(Category)
-        .filter(Category.slug == slug)
-        .options(selectinload(Category.children))
-        .limit(1)
-    )
-    category: Category = await get_object_or_404(query=category_q, session=db)
+    # Категория + дети — из дерева в памяти, без SQL
+    tree = await get_category_tree()
+    category: Optional[CategoryNode] = tree.by_slug(slug)
+    if category is None:
+        raise HTTPException(status_code=404, detail="Not found")
 
     is_parent_category: bool = category.parent_category_id is None
-    subcategories: List[Category] = (
-        [c for c in (category.children or []) if c.is_active] if is_parent_category else []
-    )
+    subcategories: List[CategoryNode] = tree.children(category) if is_parent_category else []
 
     # Публикационные фильтры
     dt = datetime.now() + TZ_SHIFT
@@ -61,42 +57,30 @@ async def get_category(db: AsyncSession, page: int, slug: str) -> Dict[str, Any]
     )
 
     if is_parent_category:
-        # Родитель + дети
-        category_ids = [category.id] + [c.id for c in subcategories]
-
-        base_q = (
-            select(Article)
-            .join(Article.categories)
-            .filter(filters, Category.id.in_(category_ids))
-            .options(
-                selectinload(Article.categories),
-                load_only(
-                    Article.alias,
-                    Article.title,
-                    Article.image,
-                    Article.published_date,
-                    Article.description,
-                ),
-            )
-            .order_by(Article.published_date.desc())
-        )
+        # Родитель + активные прямые подкатегории
+        category_ids = tree.member_ids(category)
+
+        # EXISTS вместо join: статья из нескольких подкатегорий не дублируется
+        base_q = card_query().filter(filters, Article.categories.any(Category.id.in_(category_ids)))
 
         # Пагинация — строго 24 на страницу (в шаблоне раскладываем)
-        pagination = Pagination(page=page, per_page=24)
-        page_obj = await paginate(db, pagination, base_q)
+        page_obj = await keyset_paginate(
+            db, base_q, per_page=24, page=page, after=after, before=before, index_key=f"category:{slug}",
+            row_factory=ArticleCard.from_row,
+        )
 
-        items: List[Article] = page_obj.items or []
+        items: List[ArticleCard] = page_obj.items or []
 
-        # Бейджи категорий
-        for a in items:
-            a.badge_category = _last_category_title(a)
+        # Бейджи категорий и первые авторы
+        await hydrate_cards(items)
+        await hydrate_first_authors(items)
 
-        featured_top: Optional[Article] = items[0] if len(items) >= 1 else None
-        first_list: List[Article] = items[1:10] if len(items) > 1 else []
+        featured_top: Optional[ArticleCard] = items[0] if len(items) >= 1 else None
+        first_list: List[ArticleCard] = items[1:10] if len(items) > 1 else []
 
-        cards_list: List[Article] = items[10:14] if len(items) > 10 else []
-        featured_bottom: Optional[Article] = items[14] if len(items) >= 15 else None
-        last_list: List[Article] = items[15:24] if len(items) > 15 else []
+        cards_list: List[ArticleCard] = items[10:14] if len(items) > 10 else []
+        featured_bottom: Optional[ArticleCard] = items[14] if len(items) >= 15 else None
+        last_list: List[ArticleCard] = items[15:24] if len(items) > 15 else []
 
         return {
             "category": category,
@@ -114,27 +98,15 @@ async def get_category(db: AsyncSession, page: int, slug: str) -> Dict[str, Any]
         }
 
     # Subcategory: только текущая категория
-    list_q = (
-        select(Article)
-        .filter(filters, Article.categories.any(Category.slug == slug))
-        .options(
-            selectinload(Article.categories),
-            load_only(
-                Article.alias,
-                Article.title,
-                Article.image,
-                Article.published_date,
-                Article.description,
-            ),
-        )
-        .order_by(Article.published_date.desc())
-    )
+    list_q = card_query().filter(filters, Article.categories.any(Category.id == category.id))
 
-    pagination = Pagination(page=page, per_page=10)
-    page_obj = await paginate(db, pagination, list_q)
+    page_obj = await keyset_paginate(
+        db, list_q, per_page=10, page=page, after=after, before=before, index_key=f"category:{slug}",
+        row_factory=ArticleCard.from_row,
+    )
 
-    for a in page_obj.items:
-        a.badge_category = _last_category_title(a)
+    await hydrate_cards(page_obj.items)
+    await hydrate_first_authors(page_obj.items)
 
     return {
         "category": category,
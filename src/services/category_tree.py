@@ -0,0 +1,194 @@
+# services/category_tree.py
+"""
+Дерево категорий в памяти процесса.
+
+Категории меняются несколько раз в год, поэтому каждый воркер держит
+неизменяемый снимок всей таблицы news_category: по id, по slug, связи
+родитель/дети и флаги активности. Сервисы разрешают slug и наборы id
+подкатегорий без обращения к БД.
+
+Снимок помечен версией из Redis (CATEGORY_TREE_VERSION_KEY). Не чаще
+раза в CATEGORY_TREE_CHECK_INTERVAL секунд процесс сверяет версию и,
+если она выросла, перечитывает таблицу. Версию поднимает наблюдатель
+публикаций, когда меняется отпечаток таблицы (sync_version), либо
+вручную bump_version().
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import func, literal
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import noload
+
+from src.core import config
+from src.db import redis as redis_db
+from src.db.database import db_session_manager
+from src.models.category import Category
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_TREE_VERSION_KEY = "category_tree:version"
+CATEGORY_TREE_FINGERPRINT_KEY = "category_tree:fingerprint"
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryNode:
+    id: uuid.UUID
+    slug: str
+    title: str
+    seo_title: Optional[str]
+    description: Optional[str]
+    level: Optional[int]
+    is_active: bool
+    parent_category_id: Optional[uuid.UUID]
+    child_ids: Tuple[uuid.UUID, ...]
+
+
+class CategoryTree:
+    """Неизменяемый снимок категорий. Все методы работают без SQL."""
+
+    def __init__(self, nodes: List[CategoryNode], version: Optional[int]):
+        self.version = version
+        self._by_id: Dict[uuid.UUID, CategoryNode] = {n.id: n for n in nodes}
+        self._by_slug: Dict[str, CategoryNode] = {n.slug: n for n in nodes}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[CategoryNode]:
+        return iter(self._by_id.values())
+
+    def get(self, category_id: uuid.UUID) -> Optional[CategoryNode]:
+        return self._by_id.get(category_id)
+
+    def by_slug(self, slug: str) -> Optional[CategoryNode]:
+        return self._by_slug.get(slug)
+
+    def parent(self, node: CategoryNode) -> Optional[CategoryNode]:
+        return self._by_id.get(node.parent_category_id) if node.parent_category_id else None
+
+    def children(self, node: CategoryNode, active_only: bool = True) -> List[CategoryNode]:
+        children = (self._by_id[i] for i in node.child_ids)
+        return [c for c in children if c.is_active or not active_only]
+
+    def member_ids(self, node: CategoryNode) -> List[uuid.UUID]:
+        """
+        id категории и её активных прямых подкатегорий — набор, по которому
+        ленты и рубрики выбирают статьи. Внуки в ленту родителя не входят.
+        """
+        return [node.id] + [c.id for c in self.children(node)]
+
+
+async def load_category_tree(db: AsyncSession, version: Optional[int] = None) -> CategoryTree:
+    q = select(Category).options(noload(Category.children)).order_by(Category.title)
+    categories: List[Category] = (await db.execute(q)).scalars().all()
+
+    child_ids: Dict[uuid.UUID, List[uuid.UUID]] = {}
+    for c in categories:
+        if c.parent_category_id is not None:
+            child_ids.setdefault(c.parent_category_id, []).append(c.id)
+
+    nodes = [
+        CategoryNode(
+            id=c.id,
+            slug=c.slug,
+            title=c.title,
+            seo_title=c.seo_title,
+            description=c.description,
+            level=c.level,
+            is_active=bool(c.is_active),
+            parent_category_id=c.parent_category_id,
+            child_ids=tuple(child_ids.get(c.id, ())),
+        )
+        for c in categories
+    ]
+    return CategoryTree(nodes, version)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Снимок процесса
+# ─────────────────────────────────────────────────────────────────────────────
+_tree: Optional[CategoryTree] = None
+_checked_at = 0.0
+_lock = asyncio.Lock()
+
+
+async def _read_version() -> Optional[int]:
+    if redis_db.redis is None:
+        return None
+    try:
+        return int(await redis_db.redis.get(CATEGORY_TREE_VERSION_KEY) or 0)
+    except RedisError as e:
+        logger.error(f"Category tree version read failed: {e}")
+        return None
+
+
+async def _refresh() -> None:
+    global _tree, _checked_at
+    version = await _read_version()
+    if _tree is None or (version is not None and version != _tree.version):
+        try:
+            # с primary: отстающая реплика закрепила бы старое дерево за новой версией
+            async with db_session_manager.session(primary=True) as db:
+                _tree = await load_category_tree(db, version)
+            logger.info(f"Category tree loaded: {len(_tree)} categories, version {version}")
+        except Exception as e:
+            if _tree is None:
+                raise
+            logger.error(f"Category tree reload failed, keeping version {_tree.version}: {e}")
+    _checked_at = time.monotonic()
+
+
+def _is_fresh() -> bool:
+    return _tree is not None and time.monotonic() - _checked_at < config.CATEGORY_TREE_CHECK_INTERVAL
+
+
+async def get_category_tree() -> CategoryTree:
+    """Текущий снимок; при необходимости сверяет версию и перечитывает."""
+    if not _is_fresh():
+        async with _lock:
+            if not _is_fresh():
+                await _refresh()
+    return _tree
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Версия
+# ─────────────────────────────────────────────────────────────────────────────
+async def bump_version(redis: Redis) -> int:
+    return await redis.incr(CATEGORY_TREE_VERSION_KEY)
+
+
+async def fingerprint(db: AsyncSession) -> str:
+    """md5 от всех строк news_category — дешёвый способ заметить правку."""
+    row = func.concat_ws(
+        "|",
+        Category.id,
+        Category.slug,
+        Category.title,
+        Category.seo_title,
+        Category.description,
+        Category.level,
+        Category.is_active,
+        Category.parent_category_id,
+    )
+    q = select(func.md5(func.string_agg(row, aggregate_order_by(literal("\n"), Category.id))))
+    return (await db.execute(q)).scalar() or ""
+
+
+async def sync_version(redis: Redis, db: AsyncSession) -> bool:
+    """Поднимает версию, если таблица изменилась с прошлой проверки."""
+    current = await fingerprint(db)
+    previous = await redis.getset(CATEGORY_TREE_FINGERPRINT_KEY, current)
+    if previous is None or previous.decode() == current:
+        return False
+    await bump_version(redis)
+    return True
@@ -1,11 +1,9 @@
 from datetime import datetime, timedelta
 from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.orm import load_only, selectinload
 from src.db.database import get_db
 from src.models.article import Article
-from src.utils.pagination import paginate, Pagination
+from src.services.cards import ArticleCard, card_query, hydrate_cards
 
 
 async def get_articles_404(db: AsyncSession):
@@ -16,13 +14,13 @@ async def get_articles_404(db: AsyncSession):
         Article.article_status == "P"
     )
     articles_result = await db.execute(
-        select(Article)
+        card_query()
         .filter(filters)
-        .options(selectinload(Article.categories))
         .order_by(Article.published_date.desc())
         .limit(6)
     )
-    articles = articles_result.scalars().all()
+    articles = [ArticleCard.from_row(row) for row in articles_result]
+    await hydrate_cards(articles)
 
 
     context = {"articles": articles}
@@ -1,54 +1,46 @@
 # services/index.py
 from __future__ import annotations
 
+import asyncio
+import logging
+import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
-import asyncio
-from sqlalchemy import and_
+from sqlalchemy import Integer, String, and_, any_, cast, column, exists, true, values
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm import load_only
 
-from src.models.article import Article
+from src.core import config
+from src.db.database import db_session_manager
+from src.models.article import Article, article_category
 from src.models.fixed_material import FixedArticle
-from src.models.category import Category
 from src.models.podcast import Podcast  # ← добавили
-from src.grpc.client import user_rpc
+from src.services.author import hydrate_first_authors
+from src.services.category_tree import CategoryNode, CategoryTree, get_category_tree
+from src.services.loading import ARTICLE_CARD
 
 # Asia/Almaty (UTC+5)
 TZ_SHIFT = timedelta(hours=5)
 
+logger = logging.getLogger(__name__)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Вспомогательные
 # ─────────────────────────────────────────────────────────────────────────────
-async def _get_by_category(
-    db: AsyncSession,
-    base_filters,
-    slug: str,
-    limit: int,
-) -> List[Article]:
-    q = (
-        select(Article)
-        .join(Article.categories)
-        .filter(base_filters, Category.slug == slug)
-        .options(
-            selectinload(Article.categories),
-            load_only(
-                Article.alias,
-                Article.title,
-                Article.image,
-                Article.published_date,
-                Article.description,
-                Article.author_ids,
-                Article.quote,
-            ),
-        )
-        .order_by(Article.published_date.desc())
-        .limit(limit)
-    )
-    return (await db.execute(q)).scalars().all()
+# Рубрики главной: имя -> (slug категории, сколько статей, с подкатегориями).
+# Для рубрик с подкатегориями родитель и дети должны быть активны.
+SECTIONS: Dict[str, Tuple[str, int, bool]] = {
+    "interview": ("intervyu", 1, False),
+    "economy": ("ekonomika", 7, True),
+    "geopolitics": ("geopolitika", 5, True),
+    "research": ("issledovaniya", 7, True),
+    "lifestyle": ("life-style", 4, True),
+    "opinion": ("mnenie", 1, False),
+}
 
 
 def _last_category_title(art: Article) -> str:
@@ -58,103 +50,99 @@ def _last_category_title(art: Article) -> str:
         return "Новости"
 
 
-def _map_author_for_template(user: Dict[str, Any]) -> Dict[str, Any]:
-    image = user.get("image") or {}
-    return {
-        "firstName": user.get("firstName", ""),
-        "lastName": user.get("lastName", ""),
-        "image": {
-            "image_200_webp": image.get("image_200_webp") or image.get("image_webp_200"),
-            "image_webp_200": image.get("image_webp_200") or image.get("image_200_webp"),
-            "alt": image.get("alt", ""),
-        },
-    }
-
-
-async def _hydrate_first_authors(articles: List[Article]) -> None:
-    ids: List[str] = []
-    for a in articles:
-        author_ids = getattr(a, "author_ids", None)
-        if author_ids:
-            fid = author_ids[0]
-            if fid:
-                ids.append(fid)
-
-    unique_ids = list({i for i in ids if i})
-    if not unique_ids or not hasattr(user_rpc, "user_by_uid"):
-        return
-
-    async def fetch(uid: str):
-        try:
-            return await user_rpc.user_by_uid(uid=uid)
-        except Exception:
-            return None
-
-    results = await asyncio.gather(*(fetch(uid) for uid in unique_ids), return_exceptions=False)
-
-    authors_map: Dict[str, Dict[str, Any]] = {}
-    for u in results:
-        if isinstance(u, dict):
-            uid = u.get("id")
-            if uid:
-                authors_map[uid] = u
-
-    for a in articles:
-        fa = None
-        author_ids = getattr(a, "author_ids", None)
-        if author_ids:
-            u = authors_map.get(author_ids[0])
-            if u:
-                fa = _map_author_for_template(u)
-        setattr(a, "first_author", fa)
-
-
-async def _get_section_block(
+def _get_section_categories(
+    tree: CategoryTree,
+    sections: Dict[str, Tuple[str, int, bool]],
+) -> Dict[str, Tuple[Optional[CategoryNode], List[CategoryNode], List[uuid.UUID]]]:
+    """
+    Для каждой рубрики: категория, её активные подкатегории и id всех
+    категорий, по которым выбираются статьи. Из дерева в памяти, без SQL.
+    """
+    result = {}
+    for name, (slug, _, with_children) in sections.items():
+        category = tree.by_slug(slug)
+        if category is None or (with_children and not category.is_active):
+            result[name] = (None, [], [])
+        elif with_children:
+            result[name] = (category, tree.children(category), tree.member_ids(category))
+        else:
+            result[name] = (category, [], [category.id])
+    return result
+
+
+async def _get_sections(
     db: AsyncSession,
     base_filters,
-    parent_slug: str,
-    total_limit: int,
-    with_featured: bool = True,
-) -> Dict[str, Any]:
+    sections: Dict[str, Tuple[str, int, bool]] = SECTIONS,
+) -> Dict[str, Dict[str, Any]]:
     """
-    Возвращает блок: родительскую категорию, её детей, и последние статьи по ним.
-    - with_featured=True: 1 большая + остальной список
-    - with_featured=False: вся выборка в items, featured=None
+    Последние статьи сразу для нескольких рубрик. Вместо запроса на каждую
+    рубрику — один запрос: список (рубрика, лимит, id категорий) и на
+    каждую его строку LATERAL с ORDER BY published_date DESC LIMIT лимит,
+    то есть по каждой рубрике свой top-N, ограниченный индексом по дате,
+    без нумерации всех опубликованных статей. Плюс одна пакетная подгрузка
+    категорий найденных статей: два обращения к БД на все рубрики.
+    Категории рубрик берутся из дерева в памяти
+    (src/services/category_tree.py).
+
+    Возвращает имя рубрики -> {"parent", "subcats", "articles"}.
     """
-    parent_q = (
-        select(Category)
-        .filter(Category.slug == parent_slug, Category.is_active.is_(True))
-        .options(selectinload(Category.children))
-        .limit(1)
-    )
-    parent: Optional[Category] = (await db.execute(parent_q)).scalar_one_or_none()
-    if not parent:
-        return {"featured": None, "items": [], "parent": None, "subcats": []}
-
-    subcats: List[Category] = [c for c in (parent.children or []) if c.is_active]
-    category_ids = [parent.id] + [c.id for c in subcats]
+    categories = _get_section_categories(await get_category_tree(), sections)
+    result = {
+        name: {"parent": parent, "subcats": subcats, "articles": []}
+        for name, (parent, subcats, _) in categories.items()
+    }
 
-    arts_q = (
-        select(Article)
-        .join(Article.categories)
-        .filter(base_filters, Category.id.in_(category_ids))
-        .options(
-            selectinload(Article.categories),
-            load_only(
-                Article.alias,
-                Article.title,
-                Article.image,
-                Article.published_date,
-                Article.description,
-                Article.author_ids,
-                Article.quote,
-            ),
+    rows = [
+        (name, sections[name][1], category_ids)
+        for name, (_, _, category_ids) in categories.items()
+        if category_ids
+    ]
+    if not rows:
+        return result
+
+    sec = values(
+        column("section", String),
+        column("lim", Integer),
+        column("category_ids", ARRAY(UUID(as_uuid=True))),
+        name="sec",
+    ).data(rows)
+    # параметры внутри VALUES Postgres типизирует как text, отсюда CAST
+    in_section = (
+        exists()
+        .where(
+            article_category.c.article_id == Article.id,
+            article_category.c.category_id == any_(cast(sec.c.category_ids, ARRAY(UUID(as_uuid=True)))),
         )
-        .order_by(Article.published_date.desc())
-        .limit(total_limit)
+        .correlate(Article, sec)
+    )
+    top = (
+        select(Article.id.label("article_id"), Article.published_date)
+        .filter(base_filters, in_section)
+        .order_by(Article.published_date.desc(), Article.id)
+        .limit(cast(sec.c.lim, Integer))
+        .lateral("top")
     )
-    arts: List[Article] = (await db.execute(arts_q)).scalars().all()
+    q = (
+        select(Article, sec.c.section)
+        .select_from(sec)
+        .join(top, true())
+        .join(Article, Article.id == top.c.article_id)
+        .order_by(sec.c.section, top.c.published_date.desc(), top.c.article_id)
+        .options(*ARTICLE_CARD)
+    )
+    for art, name in (await db.execute(q)).all():
+        result[name]["articles"].append(art)
+    return result
 
+
+def _section_block(section: Dict[str, Any], with_featured: bool = True) -> Dict[str, Any]:
+    """
+    Блок рубрики для шаблона: родительская категория, её дети и статьи.
+    - with_featured=True: 1 большая + остальной список
+    - with_featured=False: вся выборка в items, featured=None
+    """
+    arts = section["articles"]
     for art in arts:
         art.badge_category = _last_category_title(art)
 
@@ -165,101 +153,59 @@ async def _get_section_block(
         featured = None
         items = arts
 
-    return {"featured": featured, "items": items, "parent": parent, "subcats": subcats}
+    return {"featured": featured, "items": items, "parent": section["parent"], "subcats": section["subcats"]}
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Главная страница
+# Блоки главной
 # ─────────────────────────────────────────────────────────────────────────────
-async def get_index(db: AsyncSession) -> Dict[str, Any]:
-    dt = datetime.now() + TZ_SHIFT
-    base_filters = and_(
-        Article.published_date <= dt,
-        Article.article_status == "P",
-        Article.public_params == 0,
-    )
+_EMPTY_SECTIONS = {name: {"parent": None, "subcats": [], "articles": []} for name in SECTIONS}
+
+# Общий для всех рендеров главной предел одновременных запросов, чтобы
+# промахи кеша не выбирали пул соединений
+_block_slots = asyncio.Semaphore(config.INDEX_QUERY_CONCURRENCY)
+
+
+async def _run_block(name: str, block, default):
+    """
+    Выполняет блок на собственной сессии (отдельное соединение из пула)
+    с ограничением по времени. Упавший или зависший блок логируется и
+    отдаётся пустым, страница рендерится без него.
+    """
+    try:
+        async with _block_slots:
+            async with db_session_manager.session() as db:
+                return await asyncio.wait_for(block(db), timeout=config.INDEX_BLOCK_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"Index block {name} timed out")
+    except Exception as e:
+        logger.error(f"Index block {name} failed: {e}")
+    return default
+
 
-    # 1) Закреплённые (order 1–6)
+async def _get_fixed(db: AsyncSession, base_filters) -> List[Article]:
     fixed_q = (
         select(Article)
         .join(FixedArticle, Article.id == FixedArticle.article_id)
         .filter(base_filters, FixedArticle.order <= 6)
-        .options(
-            selectinload(Article.fixed_article),
-            selectinload(Article.categories),
-            load_only(
-                Article.alias,
-                Article.title,
-                Article.image,
-                Article.published_date,
-                Article.description,
-                Article.author_ids,
-            ),
-        )
+        .options(*ARTICLE_CARD)
         .order_by(FixedArticle.order)
     )
-    fixed = (await db.execute(fixed_q)).scalars().all()
-
-    main_article: Optional[Article] = fixed[0] if fixed else None
-    secondary_articles: List[Article] = fixed[1:3]  # 2–3
-    third_articles: List[Article] = fixed[3:6]      # 4–6
+    return (await db.execute(fixed_q)).scalars().all()
 
-    if main_article:
-        main_article.badge_category = _last_category_title(main_article)
-    for art in secondary_articles:
-        art.badge_category = _last_category_title(art)
-    for art in third_articles:
-        art.badge_category = _last_category_title(art)
 
-    # 2) Последние 20
+async def _get_latest(db: AsyncSession, base_filters) -> List[Article]:
     latest_q = (
         select(Article)
         .filter(base_filters)
-        .options(
-            selectinload(Article.categories),
-            load_only(
-                Article.alias,
-                Article.title,
-                Article.image,
-                Article.published_date,
-                Article.description,
-                Article.public_types,
-                Article.author_ids,
-            ),
-        )
+        .options(*ARTICLE_CARD)
         .order_by(Article.published_date.desc())
         .limit(20)
     )
-    latest_articles = (await db.execute(latest_q)).scalars().all()
-    for art in latest_articles:
-        art.public_type_class = art.public_types[0] if art.public_types else ""
-
-    # 3) Интервью (1 шт. + автор)
-    interview_articles = await _get_by_category(db, base_filters, "intervyu", 1)
-    await _hydrate_first_authors(interview_articles)
-
-    # 4) Экономика (1 featured + 6)
-    economy = await _get_section_block(db, base_filters, parent_slug="ekonomika", total_limit=7, with_featured=True)
-
-    # 5) Геополитика (1 featured + 4 для грида)
-    geopolitics = await _get_section_block(db, base_filters, parent_slug="geopolitika", total_limit=5, with_featured=True)
-
-    # 6) Исследования (1 featured + 6)
-    research = await _get_section_block(db, base_filters, parent_slug="issledovaniya", total_limit=7, with_featured=True)
-
-    # 7) Life style (только грид из 4)
-    lifestyle = await _get_section_block(db, base_filters, parent_slug="life-style", total_limit=4, with_featured=False)
-
-    # 8) МНЕНИЕ (1 шт. + автор) — для блока в сайдбаре
-    opinion_articles = await _get_by_category(db, base_filters, "mnenie", 1)
-    await _hydrate_first_authors(opinion_articles)
+    return (await db.execute(latest_q)).scalars().all()
 
-    # 9) Элементы для мини-секции колонок
-    editor_focus_article = latest_articles[0] if latest_articles else None
-    opinion_article = opinion_articles[0] if opinion_articles else None
-    interview_article = interview_articles[0] if interview_articles else None
 
-    # 10) Подкасты (4 последних)
+async def _get_podcasts(db: AsyncSession, dt: datetime) -> List[Podcast]:
     podcasts_q = (
         select(Podcast)
         .filter(Podcast.published_date <= dt)
@@ -276,7 +222,70 @@ async def get_index(db: AsyncSession) -> Dict[str, Any]:
         .order_by(Podcast.published_date.desc())
         .limit(4)
     )
-    latest_podcasts: List[Podcast] = (await db.execute(podcasts_q)).scalars().all()
+    return (await db.execute(podcasts_q)).scalars().all()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Главная страница
+# ─────────────────────────────────────────────────────────────────────────────
+async def get_index(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Контекст главной. Независимые блоки запрашиваются параллельно, каждый
+    на своей сессии (см. _run_block); сессия запроса db здесь не нужна.
+    """
+    dt = datetime.now() + TZ_SHIFT
+    base_filters = and_(
+        Article.published_date <= dt,
+        Article.article_status == "P",
+        Article.public_params == 0,
+    )
+
+    fixed, latest_articles, sections, latest_podcasts = await asyncio.gather(
+        # 1) Закреплённые (order 1–6)
+        _run_block("fixed", lambda s: _get_fixed(s, base_filters), []),
+        # 2) Последние 20
+        _run_block("latest", lambda s: _get_latest(s, base_filters), []),
+        # 3–8) Рубрики: интервью, экономика, геополитика, исследования,
+        # life style, мнение — одним запросом (см. _get_sections)
+        _run_block("sections", lambda s: _get_sections(s, base_filters), _EMPTY_SECTIONS),
+        # 10) Подкасты (4 последних)
+        _run_block("podcasts", lambda s: _get_podcasts(s, dt), []),
+    )
+
+    # 3) Интервью (1 шт. + автор)
+    interview_articles = sections["interview"]["articles"]
+    # 4) Экономика (1 featured + 6)
+    economy = _section_block(sections["economy"], with_featured=True)
+    # 5) Геополитика (1 featured + 4 для грида)
+    geopolitics = _section_block(sections["geopolitics"], with_featured=True)
+    # 6) Исследования (1 featured + 6)
+    research = _section_block(sections["research"], with_featured=True)
+    # 7) Life style (только грид из 4)
+    lifestyle = _section_block(sections["lifestyle"], with_featured=False)
+    # 8) МНЕНИЕ (1 шт. + автор) — для блока в сайдбаре
+    opinion_articles = sections["opinion"]["articles"]
+
+    main_article: Optional[Article] = fixed[0] if fixed else None
+    secondary_articles: List[Article] = fixed[1:3]  # 2–3
+    third_articles: List[Article] = fixed[3:6]      # 4–6
+
+    if main_article:
+        main_article.badge_category = _last_category_title(main_article)
+    for art in secondary_articles:
+        art.badge_category = _last_category_title(art)
+    for art in third_articles:
+        art.badge_category = _last_category_title(art)
+
+    for art in latest_articles:
+        art.public_type_class = art.public_types[0] if art.public_types else ""
+
+    # Авторы интервью и мнения — одним пакетным RPC
+    await hydrate_first_authors(interview_articles + opinion_articles)
+
+    # 9) Элементы для мини-секции колонок
+    editor_focus_article = latest_articles[0] if latest_articles else None
+    opinion_article = opinion_articles[0] if opinion_articles else None
+    interview_article = interview_articles[0] if interview_articles else None
 
     return {
         # основные блоки
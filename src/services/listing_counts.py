@@ -0,0 +1,207 @@
+# services/listing_counts.py
+"""
+Число материалов в постраничных лентах.
+
+Счётчики лежат в хеше Redis LISTING_COUNTS_KEY; поле — тот же ключ
+ленты, что index_key у keyset_paginate:
+
+    allnews            все опубликованные
+    category:{slug}    категория; у корневой — вместе с активными потомками
+    tag:{slug}         тег
+    author:{id}        автор
+
+Наблюдатель публикаций ведёт их по ходу дела: наступившая отложенная
+публикация даёт +1 всем лентам статьи (increment), а правленые статьи
+(снятие с публикации, смена рубрик) пересчитываются точечно по своим
+лентам (recount). Раз в LISTING_COUNTS_RECONCILE_INTERVAL секунд хеш
+строится заново агрегирующими запросами (reconcile) — это исправляет
+всё, что инкрементальный путь не видит (например, старую категорию,
+из которой статью убрали) и лишнюю единицу, если наблюдатель обработал
+одну публикацию дважды.
+
+Фильтры лент повторяют сервисы article/category/tag/author.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import String, and_, column, func, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.core import config
+from src.db import redis as redis_db
+from src.models.article import Article, article_category, article_tag
+from src.models.category import Category
+from src.models.tags import Tag
+from src.services.category_tree import CategoryTree
+
+logger = logging.getLogger(__name__)
+
+LISTING_COUNTS_KEY = "listing_counts"
+RECONCILED_AT_KEY = "listing_counts:reconciled_at"
+
+ALL_NEWS = "allnews"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Фильтры лент
+# ─────────────────────────────────────────────────────────────────────────────
+def _published(now: datetime):
+    return and_(Article.published_date <= now, Article.article_status == "P")
+
+
+def _public(now: datetime):
+    """Категории и теги показывают только public_params 0 и 1."""
+    return and_(_published(now), Article.public_params.in_([0, 1]))
+
+
+def _category_ids(tree: CategoryTree, slug: str):
+    node = tree.by_slug(slug)
+    if node is None:
+        return []
+    return tree.member_ids(node) if node.parent_category_id is None else [node.id]
+
+
+def _listing_filter(listing: str, tree: CategoryTree, now: datetime):
+    kind, _, value = listing.partition(":")
+    if kind == ALL_NEWS:
+        return _published(now)
+    if kind == "category":
+        return and_(_public(now), Article.categories.any(Category.id.in_(_category_ids(tree, value))))
+    if kind == "tag":
+        return and_(_public(now), Article.tags.any(Tag.slug == value))
+    if kind == "author":
+        return and_(_published(now), Article.author_ids.contains([value]))
+    return None
+
+
+def listing_keys(article: Article, tree: CategoryTree) -> Set[str]:
+    """
+    Ленты, в которых статья видна при публикации. Нужны загруженные
+    public_params, author_ids, categories и tags.
+    """
+    keys = {ALL_NEWS}
+    keys.update(f"author:{author_id}" for author_id in article.author_ids or [])
+    if article.public_params not in (0, 1):
+        return keys
+    for category in article.categories:
+        keys.add(f"category:{category.slug}")
+        node = tree.get(category.id)
+        root = node
+        while root is not None and root.parent_category_id is not None:
+            root = tree.parent(root)
+        if root is not None and root is not node and node.id in tree.member_ids(root):
+            keys.add(f"category:{root.slug}")
+    keys.update(f"tag:{tag.slug}" for tag in article.tags)
+    return keys
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Чтение
+# ─────────────────────────────────────────────────────────────────────────────
+async def get_count(listing: Optional[str]) -> Optional[int]:
+    """Счётчик ленты или None, если его нет (ещё не посчитан, Redis недоступен)."""
+    if not listing or redis_db.redis is None:
+        return None
+    try:
+        value = await redis_db.redis.hget(LISTING_COUNTS_KEY, listing)
+    except RedisError as e:
+        logger.error(f"Listing count read failed: {e}")
+        return None
+    return max(int(value), 0) if value is not None else None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Обновление
+# ─────────────────────────────────────────────────────────────────────────────
+async def increment(redis: Redis, tree: CategoryTree, articles: Iterable[Article]) -> None:
+    """+1 лентам статей, которые только что стали видны."""
+    deltas: Dict[str, int] = {}
+    for article in articles:
+        for key in listing_keys(article, tree):
+            deltas[key] = deltas.get(key, 0) + 1
+    if not deltas:
+        return
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, delta in deltas.items():
+            pipe.hincrby(LISTING_COUNTS_KEY, key, delta)
+        await pipe.execute()
+
+
+async def recount(redis: Redis, db: AsyncSession, tree: CategoryTree, listings: Iterable[str], now: datetime) -> None:
+    """Точный пересчёт отдельных лент — по одному count(*) на ленту."""
+    counts: Dict[str, int] = {}
+    for listing in sorted(set(listings)):
+        criteria = _listing_filter(listing, tree, now)
+        if criteria is None:
+            continue
+        q = select(func.count()).select_from(Article).filter(criteria)
+        counts[listing] = (await db.execute(q)).scalar() or 0
+    if counts:
+        await redis.hset(LISTING_COUNTS_KEY, mapping=counts)
+
+
+async def _count_all(db: AsyncSession, tree: CategoryTree, now: datetime) -> Dict[str, int]:
+    counts: Dict[str, int] = {
+        ALL_NEWS: (await db.execute(select(func.count()).select_from(Article).filter(_published(now)))).scalar() or 0,
+    }
+
+    # Категории: (slug ленты, id категории из её состава) одной таблицей VALUES
+    pairs = [
+        (node.slug, category_id)
+        for node in tree
+        for category_id in _category_ids(tree, node.slug)
+    ]
+    if pairs:
+        membership = values(
+            column("listing", String), column("category_id", Category.id.type), name="membership",
+        ).data(pairs)
+        q = (
+            select(membership.c.listing, func.count(func.distinct(article_category.c.article_id)))
+            .select_from(membership)
+            .join(article_category, article_category.c.category_id == membership.c.category_id)
+            .join(Article, Article.id == article_category.c.article_id)
+            .filter(_public(now))
+            .group_by(membership.c.listing)
+        )
+        counts.update({f"category:{slug}": n for slug, n in (await db.execute(q)).all()})
+
+    q = (
+        select(Tag.slug, func.count(func.distinct(article_tag.c.article_id)))
+        .select_from(article_tag)
+        .join(Tag, Tag.id == article_tag.c.tag_id)
+        .join(Article, Article.id == article_tag.c.article_id)
+        .filter(_public(now))
+        .group_by(Tag.slug)
+    )
+    counts.update({f"tag:{slug}": n for slug, n in (await db.execute(q)).all()})
+
+    author_id = func.unnest(Article.author_ids).label("author_id")
+    authors = select(Article.id, author_id).filter(_published(now)).subquery()
+    q = select(authors.c.author_id, func.count(func.distinct(authors.c.id))).group_by(authors.c.author_id)
+    counts.update({f"author:{a}": n for a, n in (await db.execute(q)).all() if a})
+    return counts
+
+
+async def reconcile(redis: Redis, db: AsyncSession, tree: CategoryTree, now: datetime) -> int:
+    """Полный пересчёт всех лент; хеш подменяется целиком через RENAME."""
+    counts = await _count_all(db, tree, now)
+    tmp_key = f"{LISTING_COUNTS_KEY}:rebuild"
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(tmp_key)
+        pipe.hset(tmp_key, mapping=counts)
+        pipe.rename(tmp_key, LISTING_COUNTS_KEY)
+        pipe.set(RECONCILED_AT_KEY, time.time())
+        await pipe.execute()
+    return len(counts)
+
+
+async def reconcile_due(redis: Redis) -> bool:
+    reconciled_at = await redis.get(RECONCILED_AT_KEY)
+    if reconciled_at is None:
+        return True
+    return time.time() - float(reconciled_at) >= config.LISTING_COUNTS_RECONCILE_INTERVAL
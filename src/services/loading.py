@@ -0,0 +1,75 @@
+# services/loading.py
+"""
+Профили загрузки Article: какие колонки и связи нужны каждому типу
+страницы. Используются как .options(*ARTICLE_CARD).
+
+Всё, что профиль не перечисляет явно, не грузится: связи закрыты
+raiseload("*"), поэтому lazy="selectin" у Category.children и прочие
+неявные загрузки не срабатывают, а обращение к незагруженной связи
+сразу даёт ошибку, а не лишний запрос.
+"""
+from sqlalchemy.orm import load_only, raiseload, selectinload
+
+from src.models.article import Article
+from src.models.category import Category
+from src.models.fixed_material import FixedArticle  # noqa: F401 (маппер Article должен быть настроен)
+from src.models.tags import Tag
+
+# Категории карточки: бейдж рубрики и ссылка на неё
+_CARD_CATEGORIES = selectinload(Article.categories).options(
+    load_only(Category.slug, Category.title),
+    raiseload("*"),
+)
+
+# Карточка списка (главная, ленты, категории, теги, автор, поиск, 404)
+ARTICLE_CARD = (
+    load_only(
+        Article.alias,
+        Article.title,
+        Article.image,
+        Article.published_date,
+        Article.description,
+        Article.author_ids,
+        Article.quote,
+        Article.public_types,
+    ),
+    _CARD_CATEGORIES,
+    raiseload("*"),
+)
+
+# Короткая лента (анонсы, похожие статьи): без связей
+ARTICLE_FEED = (
+    load_only(
+        Article.alias,
+        Article.title,
+        Article.image,
+        Article.published_date,
+    ),
+    raiseload("*"),
+)
+
+# Детальная страница и предпросмотр: поля снимка (src/services/snapshots.py)
+ARTICLE_DETAIL = (
+    load_only(
+        Article.alias,
+        Article.title,
+        Article.description,
+        Article.content,
+        Article.image,
+        Article.published_date,
+        Article.datetime_updated,
+        Article.author_ids,
+    ),
+    selectinload(Article.categories).options(
+        load_only(Category.slug, Category.title),
+        raiseload("*"),
+    ),
+    selectinload(Article.tags).options(
+        load_only(Tag.slug, Tag.title),
+        raiseload("*"),
+    ),
+    raiseload("*"),
+)
+
+# AMP строится из того же снимка, что и детальная страница
+ARTICLE_AMP = ARTICLE_DETAIL
@@ -7,12 +7,14 @@ from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import load_only
-from sqlalchemy.ext.serializer import loads, dumps
 
+from src.core import config
 from src.db.database import get_db  # noqa: F401 (для DI-Depends)
 from src.grpc.client import user_rpc
 from src.models.podcast import Podcast
+from src.services.snapshots import PodcastSnapshot, dump_snapshot, load_snapshot
 from src.utils.error_handlers import get_object_or_404
+from src.utils.l1_cache import get_cached, set_cached
 
 # Тайм-зона проекта (+5 ч. к UTC), как в services/article.py
 TZ_SHIFT = timedelta(hours=5)
@@ -61,27 +63,27 @@ async def podcast_detail(db: AsyncSession, slug: str, curr_redis):
     dt = datetime.now() + TZ_SHIFT
     filters = and_(Podcast.published_date <= dt)
 
-    # 1) Пробуем из Redis
+    # 1) Снимок из Redis, при промахе — из БД
+    key = f"podcast_{slug}"
     try:
-        cached = await curr_redis.get(f"podcast_{slug}")
-        if cached:
-            podcast: Podcast = loads(cached)
-        else:
-            raise KeyError
-    except Exception:
+        podcast = load_snapshot(PodcastSnapshot, await get_cached(curr_redis, key))
+    except RedisError as e:
+        logging.error(f"Redis GET error: {e}")
+        podcast = None
+    if podcast is None:
         query = (
             select(Podcast)
             .filter(filters, Podcast.alias == slug)
         )
-        podcast = await get_object_or_404(query=query, session=db)
+        podcast = PodcastSnapshot.from_model(await get_object_or_404(query=query, session=db))
         try:
-            await curr_redis.set(f"podcast_{slug}", dumps(podcast))
+            await set_cached(curr_redis, key, dump_snapshot(podcast), ex=config.ARTICLE_CACHE_TTL)
         except RedisError as e:
             logging.error(f"Redis SET error: {e}")
 
     # 2) Авторы
     author_ids = podcast.author_ids or []
-    authors = [await user_rpc.user_by_uid(uid=author_id) for author_id in author_ids]
+    authors = await user_rpc.loader().load_many(author_ids)
     authors = [a for a in authors if a]
 
     # 3) Похожие (по category_title)
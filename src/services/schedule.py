@@ -0,0 +1,55 @@
+# services/schedule.py
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.db.database import db_session_manager
+from src.models.article import Article
+from src.models.podcast import Podcast
+
+TZ_SHIFT = timedelta(hours=5)
+
+# Результат запроса переиспользуется несколько секунд: при промахах
+# нескольких страниц подряд запрос к БД уходит один раз
+MEMO_TTL = 5.0
+
+_memo: Optional[tuple] = None  # (checked_at, next_publication)
+
+
+async def next_publication(db: AsyncSession) -> Optional[datetime]:
+    """
+    Ближайший published_date в будущем среди опубликованных статей и
+    подкастов. Оба запроса — MIN по индексу published_date.
+    """
+    dt = datetime.now() + TZ_SHIFT
+    article_q = select(func.min(Article.published_date)).filter(
+        Article.article_status == "P", Article.published_date > dt
+    )
+    podcast_q = select(func.min(Podcast.published_date)).filter(Podcast.published_date > dt)
+    candidates = [
+        (await db.execute(article_q)).scalar(),
+        (await db.execute(podcast_q)).scalar(),
+    ]
+    candidates = [c for c in candidates if c is not None]
+    return min(candidates) if candidates else None
+
+
+async def seconds_until_next_publication() -> Optional[float]:
+    """
+    Сколько секунд осталось до следующей отложенной публикации (None —
+    ничего не запланировано). Страницы-ленты кешируются не дольше этого.
+    """
+    global _memo
+    now = time.monotonic()
+    dt = datetime.now() + TZ_SHIFT
+    if _memo is None or now - _memo[0] > MEMO_TTL or (_memo[1] is not None and _memo[1] <= dt):
+        async with db_session_manager.session() as db:
+            _memo = (now, await next_publication(db))
+    upcoming = _memo[1]
+    if upcoming is None:
+        return None
+    return max((upcoming - dt).total_seconds(), 0.0)
@@ -1,43 +1,172 @@
 # services/search.py
+"""
+Поиск по статьям.
+
+Основной бэкенд — индекс articles в Elasticsearch
+(src/services/search_elastic.py, SEARCH_BACKEND=elastic). Если он
+выключен, недоступен или не уложился в ELASTIC_SEARCH_TIMEOUT, запрос
+обслуживает Postgres, как описано ниже.
+
+Совпадение — полнотекстовое по search_vector (заголовок, анонс и текст,
+русская конфигурация, GIN-индекс) или нечёткое по заголовку через
+pg_trgm (опечатки, GIN-индекс по lower(title)); схема создаётся
+скриптом create_search_index.py.
+
+Сортировка (параметр s):
+  - по умолчанию — по релевантности: ts_rank_cd + сходство заголовка.
+    Один запрос отбирает id первых SEARCH_MAX_RESULTS совпадений (без
+    count(*) и OFFSET), второй — карточки текущей страницы по id;
+  - s=date — по дате, обычная keyset-пагинация лент.
+
+Карточкам страницы добавляется snippet — фрагменты текста с
+подсвеченными (<mark>) совпадениями из ts_headline.
+
+Найденные страницы (id и snippet'ы) кешируются по нормализованному
+запросу, см. src/services/search_cache.py.
+"""
+import logging
+import math
 from datetime import datetime, timedelta
+from typing import Any, List, Optional
 
-from sqlalchemy import and_, desc
+from elasticsearch import ApiError, TransportError
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
-from src.models.article import Article
-from src.utils.pagination import paginate, Pagination
+from src.core import config
+from src.models.article import SEARCH_CONFIG, Article
+from src.grpc.breaker import CircuitOpenError
+from src.services import search_cache, search_elastic
+from src.services.cards import SearchCard, card_query, hydrate_cards
+from src.utils.pagination import KeysetPage, keyset_paginate
+
+logger = logging.getLogger(__name__)
 
 TZ_SHIFT = timedelta(hours=5)
 
+PER_PAGE = 6
+SORT_DATE = "date"
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter= … "
+
+
+def _ts_query(q: str):
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+
+def _title_lower():
+    return func.lower(Article.title)
+
+
+def _match(q: str):
+    return or_(
+        Article.search_vector.op("@@")(_ts_query(q)),
+        _title_lower().op("%")(q.lower()),
+    )
+
+
+def _rank(q: str):
+    # 32: rank / (rank + 1) — в [0, 1), как и similarity()
+    return func.ts_rank_cd(Article.search_vector, _ts_query(q), 32) + func.similarity(_title_lower(), q.lower())
+
+
+def _snippet(q: str):
+    text = func.coalesce(Article.description, "") + " " + func.regexp_replace(
+        func.coalesce(Article.content, ""), "<[^>]+>", " ", "g"
+    )
+    return func.ts_headline(SEARCH_CONFIG, text, _ts_query(q), HEADLINE_OPTIONS).label("snippet")
+
+
+def search_card_query(q: str):
+    return card_query().add_columns(_snippet(q))
+
+
+async def _by_relevance(db: AsyncSession, filters, q: str, page_number: int) -> KeysetPage:
+    ranked = (
+        select(Article.id)
+        .filter(filters)
+        .order_by(_rank(q).desc(), Article.published_date.desc(), Article.id.desc())
+        .limit(config.SEARCH_MAX_RESULTS)
+    )
+    ids: List[Any] = (await db.execute(ranked)).scalars().all()
+
+    total = len(ids)
+    pages = math.ceil(total / PER_PAGE)
+    if page_number > max(pages, 1):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    page_ids = ids[(page_number - 1) * PER_PAGE: page_number * PER_PAGE]
+    items: List[SearchCard] = []
+    if page_ids:
+        rows = await db.execute(search_card_query(q).filter(Article.id.in_(page_ids)))
+        by_id = {card.id: card for card in map(SearchCard.from_row, rows)}
+        items = [by_id[i] for i in page_ids if i in by_id]
+
+    return KeysetPage(
+        page=page_number,
+        per_page=PER_PAGE,
+        pages=pages,
+        total=total,
+        items=items,
+        has_previous=page_number > 1,
+        has_next=page_number < pages,
+    )
+
 
 async def search_results(
     db: AsyncSession,
     page_number: int,
     q: str = "",
     sort: str | None = None,
+    after: str | None = None,
+    before: str | None = None,
 ):
     """
-    Поиск только по Article.title (иллюстративно; можно добавить full-text).
+    Поиск по заголовку, анонсу и тексту (см. описание модуля).
+    Пустой запрос — пустая выдача без обращения к БД.
     """
+    q = " ".join(q.split())
+    if not q:
+        page_obj = KeysetPage(page=1, per_page=PER_PAGE, pages=0, total=0, items=[])
+        return {"q": q, "sort": sort, "page": page_obj, "page_number": page_number}
+
+    normalized = search_cache.normalize(q)
+    cache_key = await search_cache.result_key(normalized, sort, page_number, after, before)
+    page_obj = await search_cache.get_page(db, cache_key)
+    if page_obj is None:
+        page_obj = await _search(db, normalized, sort, page_number, after, before)
+        await search_cache.set_page(cache_key, page_obj)
+    await hydrate_cards(page_obj.items)
+
+    return {"q": q, "sort": sort, "page": page_obj, "page_number": page_number}
+
+
+async def _search(
+    db: AsyncSession,
+    q: str,
+    sort: Optional[str],
+    page_number: int,
+    after: Optional[str],
+    before: Optional[str],
+) -> KeysetPage:
+    if search_elastic.available():
+        try:
+            return await search_elastic.search_page(q, sort, page_number, PER_PAGE)
+        except (ApiError, TransportError, CircuitOpenError) as e:
+            logger.warning(f"Elasticsearch search failed, falling back to Postgres: {e!r}")
+
     dt = datetime.now() + TZ_SHIFT
     filters = and_(
         Article.published_date <= dt,
         Article.article_status == "P",
-        Article.public_params.in_([0, 1])  # SQLAlchemy метод, не int
+        Article.public_params.in_([0, 1]),  # SQLAlchemy метод, не int
+        _match(q),
     )
 
-    sanitized = f"%{q.lower()}%"
-    query = (
-        select(Article)
-        .options(selectinload(Article.categories))  # <== это добавляет prefetch
-        .filter(filters, Article.title.ilike(sanitized))
-    )
-
-    query = query.order_by(desc(Article.published_date))
-
-    pagination = Pagination(page=page_number, per_page=6)
-    page_obj = await paginate(db, pagination, query)
-
-    return {"q": q, "sort": sort, "page": page_obj, "page_number": page_number}
+    if sort == SORT_DATE:
+        return await keyset_paginate(
+            db, search_card_query(q).filter(filters), per_page=PER_PAGE, page=page_number,
+            after=after, before=before, index_key=f"search:{q}", row_factory=SearchCard.from_row,
+        )
+    return await _by_relevance(db, filters, q, page_number)
@@ -0,0 +1,175 @@
+# services/search_cache.py
+"""
+Кеш результатов поиска.
+
+Ключ — нормализованный запрос (normalize) плюс сортировка, страница и
+курсоры: «Курс  доллaра» с латинской «a» и «курс доллара» попадают в одну
+запись. В записи только метаданные страницы, id статей по порядку и
+snippet'ы (они зависят от запроса, из карточки их не взять); сами
+карточки лежат отдельно под article_card:{id} и общие для всех
+запросов. Попадание в кеш обходится без Elasticsearch и без БД, пока
+карточки тоже в кеше.
+
+Записи живут SEARCH_CACHE_TTL. В ключ входит поколение GENERATION_KEY:
+наблюдатель публикаций при любой правке или публикации статьи делает
+INCR, и все прежние записи разом перестают находиться (и истекают сами)
+— без обхода ключей Redis. Карточки изменённых статей он снимает
+по ключам (src/tasks/publication_watcher.py).
+"""
+import json
+import logging
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core import config
+from src.db import redis as redis_db
+from src.models.article import Article
+from src.services.cards import ArticleCard, SearchCard, card_query
+from src.utils.l1_cache import get_cached, set_cached
+from src.utils.pagination import KeysetPage
+
+logger = logging.getLogger(__name__)
+
+RESULTS_PREFIX = "search_results:"
+GENERATION_KEY = "search_results_gen"
+CARD_KEY = "article_card:{id}"
+
+# латинские буквы, которые в словах на кириллице выглядят как русские
+_LOOKALIKES = str.maketrans("aeopcxykmthb", "аеорсхукмтнв")
+_CYRILLIC_RE = re.compile(r"[а-яё]")
+
+
+def normalize(q: str) -> str:
+    """Регистр, пробелы и латинские «двойники» в кириллических словах."""
+    return " ".join(
+        word.translate(_LOOKALIKES) if _CYRILLIC_RE.search(word) else word
+        for word in q.casefold().split()
+    )
+
+
+async def result_key(q: str, sort: Optional[str], page: int, after: Optional[str], before: Optional[str]) -> Optional[str]:
+    """Ключ записи текущего поколения; None — Redis недоступен, кеш не используется."""
+    curr_redis = redis_db.redis
+    if curr_redis is None:
+        return None
+    try:
+        generation = int(await curr_redis.get(GENERATION_KEY) or 0)
+    except RedisError as e:
+        logger.error(f"Redis GET error: {e}")
+        return None
+    return f"{RESULTS_PREFIX}{generation}:{sort or 'relevance'}:{page}:{after or ''}:{before or ''}:{q}"
+
+
+async def bump_generation(redis) -> None:
+    await redis.incr(GENERATION_KEY)
+
+
+def card_key(article_id: Any) -> str:
+    return CARD_KEY.format(id=article_id)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Карточки
+# ─────────────────────────────────────────────────────────────────────────────
+def _dump_card(card: ArticleCard) -> bytes:
+    return json.dumps([
+        str(card.id),
+        card.alias,
+        card.title,
+        card.image,
+        card.published_date.isoformat() if card.published_date else None,
+        card.description,
+        card.author_ids,
+        [str(i) for i in card.category_ids],
+    ]).encode()
+
+
+def _load_card(value: bytes, snippet: Optional[str]) -> SearchCard:
+    id_, alias, title, image, published_date, description, author_ids, category_ids = json.loads(value)
+    return SearchCard(
+        uuid.UUID(id_),
+        alias,
+        title,
+        image,
+        datetime.fromisoformat(published_date) if published_date else None,
+        description,
+        author_ids,
+        [uuid.UUID(i) for i in category_ids],
+        snippet=snippet,
+    )
+
+
+async def _cards(db: AsyncSession, ids: Sequence[uuid.UUID], snippets: Dict[str, Optional[str]]) -> List[SearchCard]:
+    """Карточки по id в том же порядке: из кеша, промахи — одним запросом."""
+    curr_redis = redis_db.redis
+    cards: Dict[uuid.UUID, SearchCard] = {}
+    if curr_redis is not None and ids:
+        try:
+            values = await curr_redis.mget([card_key(i) for i in ids])
+        except RedisError as e:
+            logger.error(f"Redis MGET error: {e}")
+            values = [None] * len(ids)
+        for article_id, value in zip(ids, values):
+            if value is not None:
+                cards[article_id] = _load_card(value, snippets.get(str(article_id)))
+
+    missing = [i for i in ids if i not in cards]
+    if missing:
+        rows = await db.execute(card_query().filter(Article.id.in_(missing)))
+        fetched = [SearchCard(*row, snippet=snippets.get(str(row[0]))) for row in rows]
+        await _store_cards(fetched)
+        cards.update((card.id, card) for card in fetched)
+    # статья могла пропасть из БД — просто без неё
+    return [cards[i] for i in ids if i in cards]
+
+
+async def _store_cards(cards: Sequence[ArticleCard]) -> None:
+    curr_redis = redis_db.redis
+    if curr_redis is None or not cards:
+        return
+    try:
+        async with curr_redis.pipeline(transaction=False) as pipe:
+            for card in cards:
+                pipe.set(card_key(card.id), _dump_card(card), ex=config.SEARCH_CARD_CACHE_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.error(f"Redis SET error: {e}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Страницы
+# ─────────────────────────────────────────────────────────────────────────────
+async def get_page(db: AsyncSession, key: Optional[str]) -> Optional[KeysetPage]:
+    curr_redis = redis_db.redis
+    if curr_redis is None or key is None:
+        return None
+    try:
+        cached = await get_cached(curr_redis, key)
+    except RedisError as e:
+        logger.error(f"Redis GET error: {e}")
+        return None
+    if not cached:
+        return None
+    entry = json.loads(cached)
+    ids = [uuid.UUID(i) for i in entry.pop("ids")]
+    snippets = entry.pop("snippets")
+    return KeysetPage(**entry, items=await _cards(db, ids, snippets))
+
+
+async def set_page(key: Optional[str], page: KeysetPage) -> None:
+    curr_redis = redis_db.redis
+    if curr_redis is None or key is None:
+        return
+    entry = page.model_dump(exclude={"items"})
+    entry["ids"] = [str(card.id) for card in page.items]
+    entry["snippets"] = {str(card.id): getattr(card, "snippet", None) for card in page.items}
+    await _store_cards(page.items)
+    try:
+        await set_cached(curr_redis, key, json.dumps(entry).encode(), ex=config.SEARCH_CACHE_TTL)
+    except RedisError as e:
+        logger.error(f"Redis SET error: {e}")
@@ -0,0 +1,147 @@
+# services/search_elastic.py
+"""
+Поиск по индексу articles в Elasticsearch (ArticlesImprovedSearch).
+
+Страницы листаются через search_after, без from_. Для первой страницы
+хватает одного запроса; для N-й нужны значения sort последнего
+документа страницы N-1 — их, как индекс границ у keyset_paginate, даёт
+один запрос без _source по первым SEARCH_MAX_RESULTS документам,
+результат кешируется в Redis на PAGINATION_INDEX_TTL. preference по
+тексту запроса держит все страницы на одних копиях шардов, чтобы _score
+(и значит границы) совпадали между запросами.
+
+Карточки строятся прямо из _source, snippet — из подсветки. Ошибки и
+таймауты Elasticsearch считает предохранитель; при разомкнутой цепи
+search_page сразу бросает CircuitOpenError, и вызывающий код уходит на
+поиск в Postgres (src/services/search.py).
+"""
+import json
+import logging
+import math
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from elasticsearch import ApiError, TransportError
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from src.core import config
+from src.db import elastic
+from src.db import redis as redis_db
+from src.elastic.modules import ArticlesImprovedSearch
+from src.grpc.breaker import CircuitBreaker, CircuitOpenError
+from src.services.cards import SearchCard
+from src.utils.l1_cache import get_cached, set_cached
+from src.utils.pagination import KeysetPage
+
+logger = logging.getLogger(__name__)
+
+articles_search = ArticlesImprovedSearch()
+
+
+def _is_es_failure(exc: BaseException) -> bool:
+    # 4xx (кроме 429) — ошибка запроса, а не недоступность кластера
+    if isinstance(exc, ApiError):
+        return exc.meta.status >= 500 or exc.meta.status == 429
+    return isinstance(exc, TransportError)
+
+breaker = CircuitBreaker(
+    name="elastic_search",
+    window=config.ELASTIC_BREAKER_WINDOW,
+    min_calls=config.ELASTIC_BREAKER_MIN_CALLS,
+    failure_rate=config.ELASTIC_BREAKER_FAILURE_RATE,
+    open_timeout=config.ELASTIC_BREAKER_OPEN_TIMEOUT,
+    is_failure=_is_es_failure,
+)
+
+
+def available() -> bool:
+    return config.SEARCH_BACKEND == "elastic" and elastic.es is not None and breaker.allows_calls
+
+
+def _sort(sort: Optional[str]) -> List[Any]:
+    return articles_search.SORT_DATE if sort == "date" else articles_search.SORT_RELEVANCE
+
+
+async def _search(q: str, sort: Optional[str], size: int, **params) -> Dict[str, Any]:
+    if elastic.es is None:
+        raise CircuitOpenError("Elasticsearch client is not initialized")
+    return await breaker.call(
+        articles_search.get_after,
+        elastic.es,
+        size,
+        search_val=q,
+        sort=_sort(sort),
+        timeout=config.ELASTIC_SEARCH_TIMEOUT,
+        preference=q.lower(),
+        **params,
+    )
+
+
+async def _boundaries(q: str, sort: Optional[str], per_page: int) -> List[List[Any]]:
+    """Значения sort последнего документа каждой страницы."""
+    cache_key = f"search_index:es:{sort or 'relevance'}:{per_page}:{q.lower()}"
+    curr_redis = redis_db.redis
+    if curr_redis is not None:
+        try:
+            cached = await get_cached(curr_redis, cache_key)
+        except RedisError as e:
+            logger.error(f"Redis GET error: {e}")
+            cached = None
+        if cached:
+            return json.loads(cached)
+
+    response = await _search(q, sort, config.SEARCH_MAX_RESULTS, source=False, highlight=False, track_total_hits=False)
+    hits = response["hits"]["hits"]
+    boundaries = [hits[i]["sort"] for i in range(per_page - 1, len(hits), per_page)]
+
+    if curr_redis is not None:
+        try:
+            await set_cached(curr_redis, cache_key, json.dumps(boundaries).encode(), ex=config.PAGINATION_INDEX_TTL)
+        except RedisError as e:
+            logger.error(f"Redis SET error: {e}")
+    return boundaries
+
+
+def _card(hit: Dict[str, Any]) -> SearchCard:
+    source = hit["_source"]
+    highlight = hit.get("highlight", {})
+    fragments = highlight.get("description", []) + highlight.get("content", [])
+    published_date = source.get("published_date")
+    return SearchCard(
+        uuid.UUID(source["id"]),
+        source["alias"],
+        source["title"],
+        source.get("image"),
+        datetime.fromisoformat(published_date) if published_date else None,
+        source.get("description"),
+        source.get("author_ids"),
+        [uuid.UUID(c) for c in source.get("category_ids") or []],
+        snippet=" … ".join(fragments) or None,
+    )
+
+
+async def search_page(q: str, sort: Optional[str], page_number: int, per_page: int) -> KeysetPage:
+    search_after = None
+    if page_number > 1:
+        boundaries = await _boundaries(q, sort, per_page)
+        if page_number - 2 >= len(boundaries):
+            raise HTTPException(status_code=404, detail="Not found")
+        search_after = boundaries[page_number - 2]
+
+    response = await _search(q, sort, per_page, search_after=search_after, track_total_hits=config.SEARCH_MAX_RESULTS)
+    total = min(response["hits"]["total"]["value"], config.SEARCH_MAX_RESULTS)
+    pages = math.ceil(total / per_page)
+    if page_number > max(pages, 1):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    return KeysetPage(
+        page=page_number,
+        per_page=per_page,
+        pages=pages,
+        total=total,
+        items=[_card(hit) for hit in response["hits"]["hits"]],
+        has_previous=page_number > 1,
+        has_next=page_number < pages,
+    )
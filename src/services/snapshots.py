@@ -0,0 +1,191 @@
+# services/snapshots.py
+"""
+Компактные снимки статей и подкастов для кеша в Redis.
+
+Вместо pickle ORM-объектов (sqlalchemy.ext.serializer) в кеш кладётся
+JSON только с теми полями, которые нужны страницам. Формат записи:
+
+    b"SN" | версия схемы (1 байт) | кодек (b"j" — JSON, b"z" — JSON+zstd) | данные
+
+zstd используется, если установлен пакет zstandard, и только для
+крупных записей. При чтении запись с другой версией схемы, чужим
+форматом (в т.ч. старые pickle) или битыми данными считается промахом:
+после деплоя, меняющего модели, кеш просто перезаполняется из БД.
+"""
+import json
+import logging
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # сжатие необязательно
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SN"
+# Поднимается при любом несовместимом изменении полей снимков
+SCHEMA_VERSION = 1
+
+CODEC_JSON = b"j"
+CODEC_ZSTD = b"z"
+
+# Записи меньше этого размера не сжимаются: выигрыш не окупает CPU
+COMPRESS_MIN_BYTES = 4096
+ZSTD_LEVEL = 3
+
+_HEADER = MAGIC + bytes([SCHEMA_VERSION])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Снимки (только для чтения)
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True, slots=True)
+class CategorySnapshot:
+    id: uuid.UUID
+    slug: str
+    title: str
+
+
+@dataclass(frozen=True, slots=True)
+class TagSnapshot:
+    id: uuid.UUID
+    slug: str
+    title: str
+
+
+@dataclass(frozen=True, slots=True)
+class ArticleSnapshot:
+    id: uuid.UUID
+    alias: str
+    title: str
+    description: Optional[str]
+    content: Optional[str]
+    image: Dict[str, Any]
+    published_date: Optional[datetime]
+    datetime_updated: Optional[datetime]
+    author_ids: Tuple[str, ...]
+    categories: Tuple[CategorySnapshot, ...]
+    tags: Tuple[TagSnapshot, ...]
+
+    @classmethod
+    def from_model(cls, article) -> "ArticleSnapshot":
+        return cls(
+            id=article.id,
+            alias=article.alias,
+            title=article.title,
+            description=article.description,
+            content=article.content,
+            image=article.image or {},
+            published_date=article.published_date,
+            datetime_updated=article.datetime_updated,
+            author_ids=tuple(article.author_ids or ()),
+            categories=tuple(CategorySnapshot(c.id, c.slug, c.title) for c in article.categories),
+            tags=tuple(TagSnapshot(t.id, t.slug, t.title) for t in article.tags),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ArticleSnapshot":
+        return cls(
+            id=uuid.UUID(data["id"]),
+            alias=data["alias"],
+            title=data["title"],
+            description=data["description"],
+            content=data["content"],
+            image=data["image"],
+            published_date=_parse_dt(data["published_date"]),
+            datetime_updated=_parse_dt(data["datetime_updated"]),
+            author_ids=tuple(data["author_ids"]),
+            categories=tuple(CategorySnapshot(uuid.UUID(c["id"]), c["slug"], c["title"]) for c in data["categories"]),
+            tags=tuple(TagSnapshot(uuid.UUID(t["id"]), t["slug"], t["title"]) for t in data["tags"]),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class PodcastSnapshot:
+    id: uuid.UUID
+    alias: str
+    title: str
+    category_title: Optional[str]
+    description: Optional[str]
+    content: Optional[str]
+    image: Dict[str, Any]
+    podcast: Dict[str, Any]
+    published_date: Optional[datetime]
+    author_ids: Tuple[str, ...]
+
+    @classmethod
+    def from_model(cls, podcast) -> "PodcastSnapshot":
+        return cls(
+            id=podcast.id,
+            alias=podcast.alias,
+            title=podcast.title,
+            category_title=podcast.category_title,
+            description=podcast.description,
+            content=podcast.content,
+            image=podcast.image or {},
+            podcast=podcast.podcast or {},
+            published_date=podcast.published_date,
+            author_ids=tuple(podcast.author_ids or ()),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PodcastSnapshot":
+        return cls(
+            id=uuid.UUID(data["id"]),
+            alias=data["alias"],
+            title=data["title"],
+            category_title=data["category_title"],
+            description=data["description"],
+            content=data["content"],
+            image=data["image"],
+            podcast=data["podcast"],
+            published_date=_parse_dt(data["published_date"]),
+            author_ids=tuple(data["author_ids"]),
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Кодирование
+# ─────────────────────────────────────────────────────────────────────────────
+def _parse_dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_snapshot(snapshot) -> bytes:
+    payload = json.dumps(asdict(snapshot), default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+    if zstandard is not None and len(payload) >= COMPRESS_MIN_BYTES:
+        return _HEADER + CODEC_ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    return _HEADER + CODEC_JSON + payload
+
+
+def load_snapshot(cls, raw: Optional[bytes]):
+    """
+    Снимок из байтов Redis. None — промах: записи нет, она другой версии
+    схемы или другого формата, либо её не удалось разобрать.
+    """
+    if not raw or raw[:len(_HEADER)] != _HEADER:
+        return None
+    codec, payload = raw[len(_HEADER):len(_HEADER) + 1], raw[len(_HEADER) + 1:]
+    try:
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                return None
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif codec != CODEC_JSON:
+            return None
+        return cls.from_dict(json.loads(payload))
+    except Exception as e:
+        logger.warning(f"Broken {cls.__name__} cache entry: {e}")
+        return None
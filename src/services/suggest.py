@@ -0,0 +1,323 @@
+# services/suggest.py
+"""
+Подсказки поиска (/api/suggest) из префиксного индекса в памяти процесса.
+
+В индексе — заголовки опубликованных статей (последние
+SUGGEST_MAX_ARTICLES), тегов и активных категорий. Для каждого слова
+заголовка берутся префиксы длиной SUGGEST_MIN_PREFIX..SUGGEST_MAX_PREFIX,
+и по каждому префиксу хранится массив из не более SUGGEST_PREFIX_TOP
+номеров лучших записей, уже упорядоченный по score. Ответ — один поиск
+по словарю и проверка остальных слов запроса у десятка кандидатов, без
+SQL и без перебора.
+
+score = log(1 + популярность) + время / SUGGEST_DECAY: каждые
+SUGGEST_DECAY секунд возраста весят как популярность в e раз меньше.
+Порядок от текущего момента не зависит, поэтому посчитанный один раз
+score не устаревает. Популярность статьи — view_count, тега и категории —
+число опубликованных статей, время — дата последней из них.
+
+Индекс строится при старте (в фоне) и перестраивается раз в
+SUGGEST_REBUILD_INTERVAL. Между перестройками наблюдатель публикаций
+рассылает по каналу Redis изменённые и наступившие статьи (publish),
+слушатель на каждой реплике добавляет или убирает их.
+"""
+import asyncio
+import json
+import logging
+import math
+import re
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import and_, func
+from sqlalchemy.future import select
+
+from src.core import config
+from src.db.database import db_session_manager
+from src.models.article import Article, article_category, article_tag
+from src.models.tags import Tag
+from src.services.category_tree import get_category_tree
+
+logger = logging.getLogger(__name__)
+
+TZ_SHIFT = timedelta(hours=5)
+
+UPDATES_CHANNEL = "suggest_updates"
+
+_WORD_RE = re.compile(r"\w+")
+
+_index: Optional["SuggestIndex"] = None
+_pending: Optional[List[Dict[str, Any]]] = None
+_tasks: List[asyncio.Task] = []
+
+
+def words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower().replace("ё", "е"))
+
+
+def score(popularity: int, when: Optional[datetime]) -> float:
+    return math.log1p(popularity or 0) + (when.timestamp() if when else 0) / config.SUGGEST_DECAY
+
+
+class Suggestion:
+    __slots__ = ("kind", "title", "url", "score", "words")
+
+    def __init__(self, kind: str, title: str, url: str, score: float):
+        self.kind = kind
+        self.title = title
+        self.url = url
+        self.score = score
+        self.words = tuple(words(title))
+
+    def matches(self, tokens: Iterable[str]) -> bool:
+        return all(any(w.startswith(t) for w in self.words) for t in tokens)
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"type": self.kind, "title": self.title, "url": self.url}
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._entries: List[Optional[Suggestion]] = []
+        self._by_key: Dict[str, int] = {}
+        self._prefixes: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def add(self, key: str, suggestion: Suggestion) -> None:
+        self.remove(key)
+        idx = len(self._entries)
+        self._entries.append(suggestion)
+        self._by_key[key] = idx
+        prefixes = {
+            w[:n]
+            for w in suggestion.words
+            for n in range(config.SUGGEST_MIN_PREFIX, min(len(w), config.SUGGEST_MAX_PREFIX) + 1)
+        }
+        for prefix in prefixes:
+            top = self._prefixes.get(prefix)
+            if top is None:
+                self._prefixes[prefix] = array("I", (idx,))
+            else:
+                self._push(top, idx, suggestion.score)
+
+    def _push(self, top: array, idx: int, value: float) -> None:
+        limit = config.SUGGEST_PREFIX_TOP
+        # при построении записи идут по убыванию score: append или ничего
+        if self._score(top[-1]) >= value:
+            if len(top) < limit:
+                top.append(idx)
+            return
+        for pos, other in enumerate(top):
+            if self._score(other) < value:
+                top.insert(pos, idx)
+                break
+        else:
+            return
+        if len(top) > limit:
+            top.pop()
+
+    def _score(self, idx: int) -> float:
+        entry = self._entries[idx]
+        return entry.score if entry is not None else -math.inf
+
+    def remove(self, key: str) -> None:
+        # номер остаётся в массивах префиксов и пропускается при поиске
+        # до следующей перестройки
+        idx = self._by_key.pop(key, None)
+        if idx is not None:
+            self._entries[idx] = None
+
+    def search(self, q: str, limit: int) -> List[Suggestion]:
+        tokens = words(q)
+        if not tokens:
+            return []
+        # самое длинное слово — самый узкий список кандидатов
+        lookup = max(tokens, key=len)
+        if len(lookup) < config.SUGGEST_MIN_PREFIX:
+            return []
+        result = []
+        for idx in self._prefixes.get(lookup[:config.SUGGEST_MAX_PREFIX], ()):
+            entry = self._entries[idx]
+            if entry is not None and entry.matches(tokens):
+                result.append(entry)
+                if len(result) >= limit:
+                    break
+        return result
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Построение
+# ─────────────────────────────────────────────────────────────────────────────
+def _published(now: datetime):
+    return and_(
+        Article.published_date <= now,
+        Article.article_status == "P",
+        Article.public_params.in_([0, 1]),
+    )
+
+
+def _article_key(article_id: Any) -> str:
+    return f"article:{article_id}"
+
+
+def _article_suggestion(alias: str, title: str, view_count: Optional[int], published_date: Optional[datetime]) -> Suggestion:
+    return Suggestion("article", title, f"/news/{alias}/", score(view_count, published_date))
+
+
+async def _load(db, now: datetime) -> List[Tuple[str, Suggestion]]:
+    items: List[Tuple[str, Suggestion]] = []
+
+    q = (
+        select(Article.id, Article.alias, Article.title, Article.view_count, Article.published_date)
+        .filter(_published(now))
+        .order_by(Article.published_date.desc())
+        .limit(config.SUGGEST_MAX_ARTICLES)
+    )
+    for row in await db.execute(q):
+        items.append((_article_key(row.id), _article_suggestion(row.alias, row.title, row.view_count, row.published_date)))
+
+    q = (
+        select(Tag.id, Tag.title, Tag.slug, func.count(), func.max(Article.published_date))
+        .select_from(article_tag.join(Tag, Tag.id == article_tag.c.tag_id).join(Article, Article.id == article_tag.c.article_id))
+        .filter(_published(now))
+        .group_by(Tag.id)
+    )
+    for tag_id, title, slug, count, last in await db.execute(q):
+        items.append((f"tag:{tag_id}", Suggestion("tag", title, f"/tag/{slug}/", score(count, last))))
+
+    tree = await get_category_tree()
+    q = (
+        select(article_category.c.category_id, func.count(), func.max(Article.published_date))
+        .select_from(article_category.join(Article, Article.id == article_category.c.article_id))
+        .filter(_published(now))
+        .group_by(article_category.c.category_id)
+    )
+    for category_id, count, last in await db.execute(q):
+        node = tree.get(category_id)
+        if node is not None and node.is_active:
+            items.append((f"category:{category_id}", Suggestion("category", node.title, f"/category/{node.slug}/", score(count, last))))
+
+    return items
+
+
+async def build() -> SuggestIndex:
+    now = datetime.now() + TZ_SHIFT
+    async with db_session_manager.session() as db:
+        items = await _load(db, now)
+    items.sort(key=lambda item: item[1].score, reverse=True)
+    index = SuggestIndex()
+    for n, (key, suggestion) in enumerate(items):
+        index.add(key, suggestion)
+        if n % 1000 == 999:
+            # не держим цикл событий на всё построение
+            await asyncio.sleep(0)
+    return index
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Инкрементальные обновления
+# ─────────────────────────────────────────────────────────────────────────────
+async def publish(redis: Redis, articles: Iterable[Article], now: datetime) -> None:
+    """Рассылает изменённые статьи; вызывается наблюдателем публикаций."""
+    updates = [
+        {
+            "id": str(a.id),
+            "alias": a.alias,
+            "title": a.title,
+            "view_count": a.view_count,
+            "published_date": a.published_date.isoformat() if a.published_date else None,
+            "live": bool(
+                a.article_status == "P"
+                and a.public_params in (0, 1)
+                and a.published_date is not None
+                and a.published_date <= now
+            ),
+        }
+        for a in articles
+    ]
+    if updates:
+        await redis.publish(UPDATES_CHANNEL, json.dumps(updates))
+
+
+def _apply(index: SuggestIndex, updates: List[Dict[str, Any]]) -> None:
+    for update in updates:
+        key = _article_key(update["id"])
+        if not update["live"]:
+            index.remove(key)
+            continue
+        published_date = datetime.fromisoformat(update["published_date"])
+        index.add(key, _article_suggestion(update["alias"], update["title"], update["view_count"], published_date))
+
+
+def _apply_message(data: Any) -> None:
+    try:
+        updates = json.loads(data)
+    except (TypeError, ValueError):
+        logger.warning(f"Malformed suggest update: {data!r}")
+        return
+    if _pending is not None:
+        # идёт перестройка: применим и к новому индексу
+        _pending.extend(updates)
+    if _index is not None:
+        _apply(_index, updates)
+
+
+async def _listen(redis: Redis) -> None:
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(UPDATES_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        _apply_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except (RedisError, OSError) as e:
+            logger.error(f"Suggest listener disconnected: {e}")
+            await asyncio.sleep(1)
+
+
+async def _rebuild_loop() -> None:
+    global _index, _pending
+    while True:
+        _pending = []
+        try:
+            index = await build()
+            _apply(index, _pending)
+            _index = index
+            logger.info(f"Suggest index built: {len(index)} entries")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Suggest index build failed: {e}")
+        finally:
+            _pending = None
+        await asyncio.sleep(config.SUGGEST_REBUILD_INTERVAL if _index is not None else 30)
+
+
+def suggest(q: str, limit: int = config.SUGGEST_LIMIT) -> List[Dict[str, str]]:
+    """Пока индекс не построен — пустой ответ."""
+    if _index is None:
+        return []
+    return [s.as_dict() for s in _index.search(q, limit)]
+
+
+def start(redis: Redis) -> None:
+    if not any(not task.done() for task in _tasks):
+        _tasks[:] = [asyncio.create_task(_listen(redis)), asyncio.create_task(_rebuild_loop())]
+
+
+async def stop() -> None:
+    for task in _tasks:
+        task.cancel()
+    for task in _tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _tasks.clear()
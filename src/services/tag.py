@@ -7,28 +7,24 @@ from typing import Dict, Any
 from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload, load_only
 
 from src.models.article import Article
 from src.models.tags import Tag
 from src.models.category import Category
+from src.services.author import hydrate_first_authors
+from src.services.cards import ArticleCard, card_query, hydrate_cards
 from src.utils.error_handlers import get_object_or_404
-from src.utils.pagination import paginate, Pagination
+from src.utils.pagination import keyset_paginate
 
 TZ_SHIFT = timedelta(hours=5)
 
 
-def _last_category_title(art: Article) -> str:
-    try:
-        return art.categories[-1].title if art.categories else "Новости"
-    except Exception:
-        return "Новости"
-
-
 async def get_tag(
     db: AsyncSession,
     page: int = 1,
     slug: str | None = None,
+    after: str | None = None,
+    before: str | None = None,
 ) -> Dict[str, Any]:
     """
     Лента материалов по тегу.
@@ -44,28 +40,15 @@ async def get_tag(
         Article.public_params.in_([0, 1]),
     )
 
-    query = (
-        select(Article)
-        .filter(filters, Article.tags.any(Tag.slug == slug))
-        .options(
-            selectinload(Article.tags),
-            selectinload(Article.categories),
-            load_only(
-                Article.alias,
-                Article.title,
-                Article.image,
-                Article.published_date,
-                Article.description,
-            ),
-        )
-        .order_by(Article.published_date.desc())
-    )
+    query = card_query().filter(filters, Article.tags.any(Tag.slug == slug))
 
-    pagination = Pagination(page=page, per_page=18)
-    page_obj = await paginate(db, pagination, query)
+    page_obj = await keyset_paginate(
+        db, query, per_page=18, page=page, after=after, before=before, index_key=f"tag:{slug}",
+        row_factory=ArticleCard.from_row,
+    )
 
-    # предвычислим бейдж категории (на будущее; в шаблоне можно не использовать)
-    for a in page_obj.items:
-        a.badge_category = _last_category_title(a)
+    # бейдж категории (на будущее; в шаблоне можно не использовать)
+    await hydrate_cards(page_obj.items)
+    await hydrate_first_authors(page_obj.items)
 
     return {"tag": tag, "page": page_obj}
@@ -0,0 +1,198 @@
+# services/views.py
+"""
+Счётчики просмотров статей и подкастов (view_count).
+
+Просмотр страницы не пишет в БД. record() увеличивает счётчик в памяти
+процесса; раз в VIEWS_FLUSH_INTERVAL накопленное уходит в Redis одним
+конвейером HINCRBY в хеши views:{таблица} (поле — id материала). Раз в
+VIEWS_DB_FLUSH_INTERVAL одна реплика (лидер по ключу в Redis, как у
+наблюдателя публикаций) переносит хеши в Postgres пачками
+UPDATE ... FROM (VALUES ...).
+
+Перенос — «хотя бы один раз»: хеш переименовывается в
+views:{таблица}:flushing (новые просмотры копятся в свежем хеше), после
+коммита UPDATE удаляется. Если процесс упал между коммитом и удалением,
+следующий проход применит ту же пачку ещё раз — просмотры могут
+посчитаться дважды, но не пропадут. Незавершённый :flushing всегда
+доносится первым.
+
+Запросы ботов (по User-Agent), HEAD и предзагрузки браузера не
+считаются.
+
+news_podcast.view_count добавляет create_podcast_table.py. Пока колонки
+нет, перенос подкастов падает и повторяется на следующем проходе —
+накопленное ждёт в views:news_podcast:flushing, страницы это не задевает.
+"""
+import asyncio
+import logging
+import re
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import Integer, column, func, update, values
+from starlette.requests import Request
+
+from src.core import config
+from src.db.database import db_session_manager
+from src.models.article import Article
+from src.models.podcast import Podcast
+
+logger = logging.getLogger(__name__)
+
+VIEWS_KEY = "views:{table}"
+LEADER_KEY = "views:leader"
+
+MODELS = {model.__tablename__: model for model in (Article, Podcast)}
+
+_BOT_RE = re.compile(
+    r"bot|crawl|spider|slurp|scrap|fetch|preview|monitor|headless|lighthouse|"
+    r"curl|wget|python|java/|go-http|okhttp|axios|node-fetch|httpclient|libwww|feed|rss",
+    re.IGNORECASE,
+)
+
+_pending: Counter = Counter()
+_token = uuid.uuid4().hex
+_tasks: List[asyncio.Task] = []
+
+
+def is_bot(request: Request) -> bool:
+    if request.method != "GET":
+        return True
+    # предзагрузка/пререндер браузера — ещё не просмотр
+    if "prefetch" in request.headers.get("sec-purpose", "") or request.headers.get("purpose") == "prefetch":
+        return True
+    user_agent = request.headers.get("user-agent", "")
+    return not user_agent or bool(_BOT_RE.search(user_agent))
+
+
+def record(request: Request, table: str, object_id: uuid.UUID) -> None:
+    """Просмотр материала: только счётчик в памяти, без ввода-вывода."""
+    if not is_bot(request):
+        _pending[(table, str(object_id))] += 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Процесс → Redis
+# ─────────────────────────────────────────────────────────────────────────────
+async def flush_to_redis(redis: Redis) -> int:
+    global _pending
+    if not _pending:
+        return 0
+    batch, _pending = _pending, Counter()
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for (table, object_id), n in batch.items():
+                pipe.hincrby(VIEWS_KEY.format(table=table), object_id, n)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        # вернём в память: уйдут следующим проходом
+        _pending.update(batch)
+        logger.error(f"View counters flush to Redis failed: {e}")
+        return 0
+    return len(batch)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Redis → Postgres
+# ─────────────────────────────────────────────────────────────────────────────
+def _parse(counts: Dict[bytes, bytes]) -> List[Tuple[uuid.UUID, int]]:
+    rows = []
+    for object_id, n in counts.items():
+        try:
+            rows.append((uuid.UUID(object_id.decode()), int(n)))
+        except ValueError:
+            logger.warning(f"Skipping malformed view counter {object_id!r}={n!r}")
+    return rows
+
+
+def _update(model, rows: List[Tuple[uuid.UUID, int]]):
+    v = values(column("id", model.id.type), column("n", Integer), name="v").data(rows)
+    return (
+        update(model)
+        .where(model.id == v.c.id)
+        .values(
+            view_count=func.coalesce(model.view_count, 0) + v.c.n,
+            # без явного значения сработал бы onupdate=now(), и каждая
+            # порция просмотров выглядела бы для наблюдателя и индексатора как правка
+            datetime_updated=model.datetime_updated,
+        )
+    )
+
+
+async def flush_table(redis: Redis, table: str) -> int:
+    model = MODELS[table]
+    key = VIEWS_KEY.format(table=table)
+    flushing = f"{key}:flushing"
+    if not await redis.exists(flushing):
+        try:
+            await redis.rename(key, flushing)
+        except ResponseError:
+            return 0  # просмотров не было: хеша нет
+    rows = _parse(await redis.hgetall(flushing))
+    if rows:
+        async with db_session_manager.session(primary=True) as db:
+            for start in range(0, len(rows), config.VIEWS_DB_BATCH_SIZE):
+                await db.execute(_update(model, rows[start:start + config.VIEWS_DB_BATCH_SIZE]))
+            await db.commit()
+    await redis.delete(flushing)
+    return len(rows)
+
+
+async def flush_to_db(redis: Redis) -> int:
+    return sum([await flush_table(redis, table) for table in MODELS])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Фоновые задачи
+# ─────────────────────────────────────────────────────────────────────────────
+async def _is_leader(redis: Redis, ttl: int) -> bool:
+    if await redis.set(LEADER_KEY, _token, nx=True, ex=ttl):
+        return True
+    if (await redis.get(LEADER_KEY) or b"").decode() == _token:
+        await redis.expire(LEADER_KEY, ttl)
+        return True
+    return False
+
+
+async def _redis_loop(redis: Redis) -> None:
+    while True:
+        await asyncio.sleep(config.VIEWS_FLUSH_INTERVAL)
+        await flush_to_redis(redis)
+
+
+async def _db_loop(redis: Redis) -> None:
+    interval = config.VIEWS_DB_FLUSH_INTERVAL
+    leader_ttl = max(int(interval * 3), 1)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await _is_leader(redis, leader_ttl):
+                flushed = await flush_to_db(redis)
+                if flushed:
+                    logger.info(f"View counters flushed for {flushed} objects")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"View counters flush to DB failed: {e}")
+
+
+def start(redis: Redis) -> None:
+    if not any(not task.done() for task in _tasks):
+        _tasks[:] = [asyncio.create_task(_redis_loop(redis)), asyncio.create_task(_db_loop(redis))]
+
+
+async def stop(redis: Optional[Redis] = None) -> None:
+    for task in _tasks:
+        task.cancel()
+    for task in _tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _tasks.clear()
+    if redis is not None:
+        # не теряем накопленное за последний интервал
+        await flush_to_redis(redis)
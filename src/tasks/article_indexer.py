@@ -0,0 +1,373 @@
+"""
+Индексатор статей в Elasticsearch (индекс articles, src/elastic/modules.py).
+
+Статьи читаются из news_article серверным курсором пачками по
+INDEXER_BATCH_SIZE в порядке (datetime_updated, id), превращаются в
+документы и отправляются bulk-запросами; одновременно в полёте не
+больше INDEXER_CONCURRENCY пачек, поэтому в памяти лежит лишь несколько
+пачек, сколько бы статей ни было.
+
+    python -m src.tasks.article_indexer reindex   # полная пересборка
+    python -m src.tasks.article_indexer sync      # один проход по изменениям
+
+articles — алиас. Полная пересборка пишет в новый индекс articles_<время>
+(без реплик и refresh), затем одним update_aliases переключает алиас и
+удаляет прежние индексы: поиск всё время видит целый индекс. Отметка
+(datetime_updated, id) последней проиндексированной статьи хранится в
+Redis и сдвигается только за пачками, которые уже приняты кластером.
+
+Фоновая задача (start/stop, лидер выбирается ключом в Redis, как у
+наблюдателя публикаций) раз в INDEXER_INTERVAL отправляет статьи,
+изменённые после отметки. Снятые с публикации статьи остаются в индексе
+со своим status и отсекаются фильтром поиска; удалённые из БД строки
+уходят из индекса при следующей полной пересборке.
+"""
+import argparse
+import asyncio
+import html
+import json
+import logging
+import re
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_bulk
+from redis.asyncio import Redis
+from sqlalchemy import func, tuple_
+from sqlalchemy.future import select
+
+from src.core import config
+from src.db.database import db_session_manager
+from src.models.article import Article, article_category, article_tag
+from src.models.tags import Tag
+from src.services.category_tree import CategoryTree, get_category_tree
+
+logger = logging.getLogger(__name__)
+
+ALIAS = "articles"
+LEADER_KEY = "article_indexer:leader"
+MARK_KEY = "article_indexer:mark"
+
+Mark = Tuple[datetime, uuid.UUID]
+
+_token = uuid.uuid4().hex
+_task: Optional[asyncio.Task] = None
+
+_TAGS_RE = re.compile(r"<[^>]+>")
+_SPACES_RE = re.compile(r"\s+")
+
+INDEX_SETTINGS = {
+    "number_of_shards": 1,
+    "analysis": {
+        "analyzer": {
+            "russian_text": {
+                "tokenizer": "standard",
+                "filter": ["lowercase", "russian_stop", "russian_stemmer"],
+            },
+        },
+        "filter": {
+            "russian_stop": {"type": "stop", "stopwords": "_russian_"},
+            "russian_stemmer": {"type": "stemmer", "language": "russian"},
+        },
+    },
+}
+
+_keyword = {"type": "keyword"}
+_text_with_keyword = {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}}
+
+INDEX_MAPPINGS = {
+    "dynamic": "strict",
+    "properties": {
+        "id": _keyword,
+        "alias": _text_with_keyword,
+        "title": {"type": "text", "analyzer": "russian_text", "fields": {"keyword": {"type": "keyword", "ignore_above": 512}}},
+        "description": {"type": "text", "analyzer": "russian_text"},
+        "content": {"type": "text", "analyzer": "russian_text"},
+        "status": _text_with_keyword,
+        "published_date": {"type": "date"},
+        "datetime_updated": {"type": "date"},
+        "public_params": {"type": "integer"},
+        "author_ids": _text_with_keyword,
+        "category_ids": _keyword,
+        "categories": _keyword,
+        "tags": _text_with_keyword,
+        "image": {"type": "object", "enabled": False},
+    },
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Документы
+# ─────────────────────────────────────────────────────────────────────────────
+def _article_query():
+    """Колонки документа; категории и теги — массивами в той же строке."""
+    category_ids = (
+        select(func.array_agg(article_category.c.category_id))
+        .where(article_category.c.article_id == Article.id)
+        .scalar_subquery()
+    )
+    tags = (
+        select(func.array_agg(Tag.title).filter(Tag.title.isnot(None)))
+        .select_from(article_tag.join(Tag, Tag.id == article_tag.c.tag_id))
+        .where(article_tag.c.article_id == Article.id)
+        .scalar_subquery()
+    )
+    return select(
+        Article.id,
+        Article.alias,
+        Article.title,
+        Article.description,
+        Article.content,
+        Article.article_status,
+        Article.published_date,
+        Article.datetime_updated,
+        Article.public_params,
+        Article.author_ids,
+        Article.image,
+        category_ids.label("category_ids"),
+        tags.label("tags"),
+    ).order_by(Article.datetime_updated, Article.id)
+
+
+def plain_text(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    return _SPACES_RE.sub(" ", html.unescape(_TAGS_RE.sub(" ", value))).strip()
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def to_document(row, tree: CategoryTree) -> Dict[str, Any]:
+    category_ids = row.category_ids or []
+    nodes = [node for node in map(tree.get, category_ids) if node is not None]
+    return {
+        "id": str(row.id),
+        "alias": row.alias,
+        "title": row.title,
+        "description": plain_text(row.description),
+        "content": plain_text(row.content),
+        "status": row.article_status,
+        "published_date": _iso(row.published_date),
+        "datetime_updated": _iso(row.datetime_updated),
+        "public_params": row.public_params,
+        "author_ids": row.author_ids or [],
+        "category_ids": [str(i) for i in category_ids],
+        "categories": [node.slug for node in nodes],
+        "tags": row.tags or [],
+        "image": row.image or {},
+    }
+
+
+def _actions(index: str, rows: Iterable, tree: CategoryTree) -> List[Dict[str, Any]]:
+    return [{"_index": index, "_id": str(row.id), "_source": to_document(row, tree)} for row in rows]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Отметка
+# ─────────────────────────────────────────────────────────────────────────────
+async def load_mark(redis: Redis) -> Optional[Mark]:
+    value = await redis.get(MARK_KEY)
+    if not value:
+        return None
+    updated, article_id = json.loads(value)
+    return datetime.fromisoformat(updated), uuid.UUID(article_id)
+
+
+async def save_mark(redis: Redis, mark: Mark) -> None:
+    await redis.set(MARK_KEY, json.dumps([mark[0].isoformat(), str(mark[1])]))
+
+
+def _after(mark: Optional[Mark]):
+    if mark is None:
+        return None
+    updated, article_id = mark
+    # строки без datetime_updated (NULL) сюда не попадают — только в полную пересборку
+    return tuple_(Article.datetime_updated, Article.id) > tuple_(updated, article_id)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Поток пачек
+# ─────────────────────────────────────────────────────────────────────────────
+async def stream(
+    es: AsyncElasticsearch,
+    index: str,
+    mark: Optional[Mark] = None,
+    on_done=None,
+) -> int:
+    """
+    Отправляет в index статьи после mark. on_done(mark) вызывается по
+    порядку после каждой принятой пачки — за ней отметку можно сдвигать.
+    """
+    tree = await get_category_tree()
+    query = _article_query()
+    after = _after(mark)
+    if after is not None:
+        query = query.filter(after)
+
+    in_flight: Deque[Tuple[asyncio.Task, Optional[Mark]]] = deque()
+    total = 0
+
+    async def _complete_oldest() -> None:
+        nonlocal total
+        task, batch_mark = in_flight.popleft()
+        indexed, _ = await task
+        total += indexed
+        if on_done is not None and batch_mark is not None:
+            await on_done(batch_mark)
+
+    try:
+        async with db_session_manager.connect() as connection:
+            result = await connection.stream(query.execution_options(yield_per=config.INDEXER_BATCH_SIZE))
+            async for rows in result.partitions():
+                last = rows[-1]
+                batch_mark = (last.datetime_updated, last.id) if last.datetime_updated else None
+                task = asyncio.create_task(async_bulk(
+                    es,
+                    _actions(index, rows, tree),
+                    chunk_size=config.INDEXER_BATCH_SIZE,
+                    max_retries=3,
+                    refresh=False,
+                ))
+                in_flight.append((task, batch_mark))
+                if len(in_flight) >= config.INDEXER_CONCURRENCY:
+                    await _complete_oldest()
+        while in_flight:
+            await _complete_oldest()
+    finally:
+        for task, _ in in_flight:
+            task.cancel()
+    return total
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Полная пересборка и проход по изменениям
+# ─────────────────────────────────────────────────────────────────────────────
+async def _latest_mark() -> Optional[Mark]:
+    async with db_session_manager.session(primary=True) as db:
+        q = (
+            select(Article.datetime_updated, Article.id)
+            .filter(Article.datetime_updated.isnot(None))
+            .order_by(Article.datetime_updated.desc(), Article.id.desc())
+            .limit(1)
+        )
+        row = (await db.execute(q)).first()
+    return (row.datetime_updated, row.id) if row else None
+
+
+async def reindex(es: AsyncElasticsearch, redis: Redis) -> str:
+    """Собирает новый индекс и переключает на него алиас."""
+    index = f"{ALIAS}_{datetime.utcnow():%Y%m%d%H%M%S}"
+    # всё, что изменится во время сборки, догонит следующий sync
+    mark = await _latest_mark()
+
+    await es.indices.create(
+        index=index,
+        settings={**INDEX_SETTINGS, "number_of_replicas": 0, "refresh_interval": "-1"},
+        mappings=INDEX_MAPPINGS,
+    )
+    try:
+        total = await stream(es, index)
+        await es.indices.put_settings(
+            index=index,
+            settings={"number_of_replicas": config.INDEXER_REPLICAS, "refresh_interval": None},
+        )
+        await es.indices.refresh(index=index)
+    except Exception:
+        await es.indices.delete(index=index, ignore_unavailable=True)
+        raise
+
+    actions = [{"add": {"index": index, "alias": ALIAS}}]
+    if await es.indices.exists_alias(name=ALIAS):
+        old = list((await es.indices.get_alias(name=ALIAS)).keys())
+        actions += [{"remove_index": {"index": name}} for name in old]
+    elif await es.indices.exists(index=ALIAS):
+        # прежний индекс без алиаса: заменяется в том же атомарном запросе
+        actions.append({"remove_index": {"index": ALIAS}})
+    await es.indices.update_aliases(actions=actions)
+
+    if mark is not None:
+        await save_mark(redis, mark)
+    logger.info(f"Article index {index} built: {total} documents, alias {ALIAS} switched")
+    return index
+
+
+async def sync(es: AsyncElasticsearch, redis: Redis) -> int:
+    """Статьи, изменённые после отметки; без отметки — полная пересборка."""
+    mark = await load_mark(redis)
+    if mark is None or not await es.indices.exists(index=ALIAS):
+        await reindex(es, redis)
+        return 0
+    return await stream(es, ALIAS, mark, on_done=lambda m: save_mark(redis, m))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Фоновая задача
+# ─────────────────────────────────────────────────────────────────────────────
+async def _is_leader(redis: Redis, ttl: int) -> bool:
+    if await redis.set(LEADER_KEY, _token, nx=True, ex=ttl):
+        return True
+    if (await redis.get(LEADER_KEY) or b"").decode() == _token:
+        await redis.expire(LEADER_KEY, ttl)
+        return True
+    return False
+
+
+async def run(es: AsyncElasticsearch, redis: Redis, interval: float) -> None:
+    # пересборка может идти дольше интервала: лидерство держится с запасом
+    leader_ttl = max(int(interval * 3), config.INDEXER_LEADER_TTL)
+    while True:
+        try:
+            if await _is_leader(redis, leader_ttl):
+                indexed = await sync(es, redis)
+                if indexed:
+                    logger.info(f"Article indexer sent {indexed} documents")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Article indexer failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start(es: AsyncElasticsearch, redis: Redis) -> None:
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(run(es, redis, config.INDEXER_INTERVAL))
+
+
+async def stop() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Article indexer")
+    parser.add_argument("command", choices=("reindex", "sync"))
+    args = parser.parse_args()
+
+    es = AsyncElasticsearch(hosts=[config.ELASTIC_URL])
+    redis = Redis(host=config.REDIS_HOST, port=config.REDIS_PORT, password=config.REDIS_PASSWORD)
+    try:
+        if args.command == "reindex":
+            print(await reindex(es, redis))
+        else:
+            print(f"indexed {await sync(es, redis)} articles")
+    finally:
+        await es.close()
+        await redis.close()
+        await db_session_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,388 @@
+"""
+Фоновый наблюдатель публикаций.
+
+Опрашивает news_article и news_podcast: строки с datetime_updated новее
+сохранённой отметки (правки, снятие с публикации) и строки, у которых
+published_date только что наступил (отложенные публикации). Для каждой
+найденной статьи по карте зависимостей снимаются ровно те кеши, где она
+может быть видна: детальная и AMP-страница, главная, страницы её
+категорий (вместе с родительскими), тегов и авторов, а также индексы
+границ нумерованных страниц этих лент — и по нынешнему состоянию, и по
+прежнему: alias, категории, теги и авторы статьи на
+момент прошлой обработки лежат в хеше DEPS_KEY, так что правка, убравшая
+статью из рубрики или сменившая alias, снимает и старые страницы. Заодно сверяется
+отпечаток таблицы категорий (src/services/category_tree.py) и ведутся
+счётчики материалов в лентах (src/services/listing_counts.py), а
+изменённые статьи рассылаются индексам подсказок (src/services/suggest.py).
+
+Работает на одной реплике: лидер выбирается ключом в Redis с TTL.
+Отметки хранятся в Redis и сдвигаются только после успешной очистки,
+поэтому изменение может быть обработано повторно, но не потеряно.
+Отметка правок — пара (datetime_updated, id): пачка может оборваться
+посреди строк с одинаковым datetime_updated (массовые правки, миграции),
+и следующая продолжит ровно с того же места.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from redis.asyncio import Redis
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import load_only, selectinload
+
+from src.core import config
+from src.db.database import db_session_manager
+from src.models.article import Article, article_category, article_tag
+from src.models.category import Category
+from src.models.podcast import Podcast
+from src.models.tags import Tag
+from src.services import listing_counts, search_cache, suggest
+from src.services.category_tree import CategoryTree, get_category_tree, sync_version
+from src.utils.decorators import purge_pages
+from src.utils.l1_cache import invalidate
+from src.utils.pagination import purge_page_index
+
+logger = logging.getLogger(__name__)
+
+TZ_SHIFT = timedelta(hours=5)
+
+LEADER_KEY = "publication_watcher:leader"
+UPDATED_MARK_KEY = "publication_watcher:{table}:updated"
+LIVE_MARK_KEY = "publication_watcher:live"
+# id статьи -> {"alias", "categories", "tags", "authors"} на момент последней обработки
+DEPS_KEY = "publication_watcher:article_deps"
+
+BATCH_SIZE = 500
+
+Mark = Tuple[datetime, uuid.UUID]
+
+_token = uuid.uuid4().hex
+_task: Optional[asyncio.Task] = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Карта зависимостей
+# ─────────────────────────────────────────────────────────────────────────────
+def _deps(alias: str, categories: Iterable[str], tags: Iterable[str], authors: Iterable[str]) -> Dict[str, Any]:
+    return {"alias": alias, "categories": list(categories), "tags": list(tags), "authors": list(authors)}
+
+
+class Purge:
+    def __init__(self, tree: CategoryTree):
+        self.tree = tree
+        self.keys: Set[str] = set()
+        self.search_results = False
+        self.pages: Set[Tuple[str, Optional[str]]] = set()
+        # ленты (index_key у keyset_paginate), чьи индексы границ страниц сдвинулись
+        self.listings: Set[str] = set()
+        self.deps: Dict[str, Dict[str, Any]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.keys or self.search_results or self.pages)
+
+    def add_article(self, article: Article) -> None:
+        self.keys.add(search_cache.card_key(article.id))
+        # любая статья может войти в выдачу или уйти из неё
+        self.search_results = True
+        deps = _deps(
+            article.alias,
+            (c.slug for c in article.categories),
+            (t.slug for t in article.tags),
+            article.author_ids or [],
+        )
+        self.deps[str(article.id)] = deps
+        self._add_deps(deps)
+
+    def _add_deps(self, deps: Dict[str, Any]) -> None:
+        self.keys.add(f"article_{deps['alias']}")
+        self.pages.add(("index_page", None))
+        self.listings.add("allnews")
+        for slug in deps["categories"]:
+            self.pages.add(("category_page", slug))
+            self.listings.add(f"category:{slug}")
+            node = self.tree.by_slug(slug)
+            parent = self.tree.parent(node) if node is not None else None
+            if parent is not None:
+                self.pages.add(("category_page", parent.slug))
+                self.listings.add(f"category:{parent.slug}")
+        for slug in deps["tags"]:
+            self.pages.add(("tag_page", slug))
+            self.listings.add(f"tag:{slug}")
+        for author_id in deps["authors"]:
+            self.pages.add(("author_page", author_id))
+            self.listings.add(f"author:{author_id}")
+
+    async def add_previous(self, redis: Redis) -> None:
+        """Страницы, где статьи были видны до правки."""
+        if not self.deps:
+            return
+        for value in await redis.hmget(DEPS_KEY, list(self.deps)):
+            if value:
+                self._add_deps(json.loads(value))
+
+    async def save_deps(self, redis: Redis) -> None:
+        if self.deps:
+            await redis.hset(DEPS_KEY, mapping={k: json.dumps(v) for k, v in self.deps.items()})
+
+    def add_podcast(self, podcast: Podcast) -> None:
+        self.keys.add(f"podcast_{podcast.alias}")
+        self.pages.add(("index_page", None))
+
+    async def apply(self, redis: Redis) -> None:
+        if self.keys:
+            await invalidate(redis, keys=self.keys)
+        if self.search_results:
+            await search_cache.bump_generation(redis)
+        # индексы границ — до страниц, иначе пересборка возьмёт старые
+        if self.listings:
+            await purge_page_index(redis, self.listings)
+        for prefix, slug in self.pages:
+            await purge_pages(redis, prefix, slug)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Выборки
+# ─────────────────────────────────────────────────────────────────────────────
+def _article_query():
+    return select(Article).options(
+        load_only(
+            Article.alias,
+            Article.title,
+            Article.view_count,
+            Article.author_ids,
+            Article.datetime_updated,
+            Article.published_date,
+            Article.article_status,
+            Article.public_params,
+        ),
+        selectinload(Article.categories).noload(Category.children),
+        selectinload(Article.tags),
+    )
+
+
+def _podcast_query():
+    return select(Podcast).options(
+        load_only(Podcast.alias, Podcast.datetime_updated, Podcast.published_date),
+    )
+
+
+async def _updated_since(db: AsyncSession, model, query, mark: Mark) -> List:
+    q = (
+        query
+        .filter(tuple_(model.datetime_updated, model.id) > tuple_(*mark))
+        .order_by(model.datetime_updated, model.id)
+        .limit(BATCH_SIZE)
+    )
+    return (await db.execute(q)).scalars().all()
+
+
+async def _went_live(db: AsyncSession, model, query, since: datetime, now: datetime) -> List:
+    filters = [model.published_date > since, model.published_date <= now]
+    if model is Article:
+        filters.append(Article.article_status == "P")
+    return (await db.execute(query.filter(and_(*filters)))).scalars().all()
+
+
+async def _latest_update(db: AsyncSession, model) -> Optional[Mark]:
+    q = (
+        select(model.datetime_updated, model.id)
+        .filter(model.datetime_updated.isnot(None))
+        .order_by(model.datetime_updated.desc(), model.id.desc())
+        .limit(1)
+    )
+    row = (await db.execute(q)).first()
+    return (row.datetime_updated, row.id) if row else None
+
+
+async def _backfill_deps(redis: Redis, db: AsyncSession) -> int:
+    """
+    Первое заполнение DEPS_KEY по всем статьям: иначе первая правка
+    каждой статьи не знала бы её прежних страниц. Пишется во временный
+    хеш и подменяется целиком.
+    """
+    categories = (
+        select(func.array_agg(Category.slug))
+        .select_from(article_category.join(Category, Category.id == article_category.c.category_id))
+        .where(article_category.c.article_id == Article.id)
+        .scalar_subquery()
+    )
+    tags = (
+        select(func.array_agg(Tag.slug))
+        .select_from(article_tag.join(Tag, Tag.id == article_tag.c.tag_id))
+        .where(article_tag.c.article_id == Article.id)
+        .scalar_subquery()
+    )
+    q = select(Article.id, Article.alias, Article.author_ids, categories.label("categories"), tags.label("tags"))
+    tmp_key = f"{DEPS_KEY}:tmp"
+    await redis.delete(tmp_key)
+    total = 0
+    result = await db.stream(q.execution_options(yield_per=BATCH_SIZE))
+    async for rows in result.partitions():
+        await redis.hset(tmp_key, mapping={
+            str(row.id): json.dumps(_deps(row.alias, row.categories or [], row.tags or [], row.author_ids or []))
+            for row in rows
+        })
+        total += len(rows)
+    if total:
+        await redis.rename(tmp_key, DEPS_KEY)
+    return total
+
+
+def _parse(value: Optional[bytes]) -> Optional[datetime]:
+    return datetime.fromisoformat(value.decode()) if value else None
+
+
+def _parse_mark(value: Optional[bytes]) -> Optional[Mark]:
+    if not value:
+        return None
+    raw = value.decode()
+    if not raw.startswith("["):
+        # отметка прежнего формата (только время): строки с тем же
+        # datetime_updated будут обработаны ещё раз — это безопасно
+        return datetime.fromisoformat(raw), uuid.UUID(int=0)
+    updated, row_id = json.loads(raw)
+    return datetime.fromisoformat(updated), uuid.UUID(row_id)
+
+
+def _format_mark(mark: Mark) -> str:
+    return json.dumps([mark[0].isoformat(), str(mark[1])])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Цикл
+# ─────────────────────────────────────────────────────────────────────────────
+async def poll_once(redis: Redis, db: AsyncSession) -> int:
+    """Один проход: находит изменения, чистит кеши, сдвигает отметки."""
+    now = datetime.now() + TZ_SHIFT
+
+    if await sync_version(redis, db):
+        # категории изменились: воркеры перечитают дерево, а страницы с
+        # названиями и составом рубрик собираются заново
+        logger.info("Category tree changed, version bumped")
+        for prefix in ("index_page", "category_page"):
+            await purge_pages(redis, prefix)
+
+    if not await redis.exists(DEPS_KEY):
+        total = await _backfill_deps(redis, db)
+        logger.info(f"Article dependencies backfilled: {total} articles")
+
+    tree = await get_category_tree()
+    purge = Purge(tree)
+    marks: Dict[str, str] = {}
+    updated: List[Article] = []
+    went_live: List[Article] = []
+
+    for model, query, add in (
+        (Article, _article_query(), purge.add_article),
+        (Podcast, _podcast_query(), purge.add_podcast),
+    ):
+        mark_key = UPDATED_MARK_KEY.format(table=model.__tablename__)
+        mark = _parse_mark(await redis.get(mark_key))
+        if mark is None:
+            # первый запуск: историю не трогаем, начинаем с текущего состояния
+            latest = await _latest_update(db, model)
+            if latest is not None:
+                marks[mark_key] = _format_mark(latest)
+            continue
+        rows = await _updated_since(db, model, query, mark)
+        for row in rows:
+            add(row)
+        if model is Article:
+            updated.extend(rows)
+        if rows:
+            marks[mark_key] = _format_mark((rows[-1].datetime_updated, rows[-1].id))
+
+    live_since = _parse(await redis.get(LIVE_MARK_KEY)) or now
+    for model, query, add in (
+        (Article, _article_query(), purge.add_article),
+        (Podcast, _podcast_query(), purge.add_podcast),
+    ):
+        rows = await _went_live(db, model, query, live_since, now)
+        for row in rows:
+            add(row)
+        if model is Article:
+            went_live.extend(rows)
+    marks[LIVE_MARK_KEY] = now.isoformat()
+
+    await _update_counts(redis, db, tree, updated, went_live, now)
+    await suggest.publish(redis, updated + went_live, now)
+
+    await purge.add_previous(redis)
+    if purge:
+        await purge.apply(redis)
+        logger.info(f"Publication watcher purged {len(purge.keys)} keys and {len(purge.pages)} page groups")
+    await purge.save_deps(redis)
+    await redis.mset(marks)
+    return len(purge.keys) + len(purge.pages)
+
+
+async def _update_counts(
+    redis: Redis,
+    db: AsyncSession,
+    tree: CategoryTree,
+    updated: List[Article],
+    went_live: List[Article],
+    now: datetime,
+) -> None:
+    """
+    Счётчики лент. Полный пересчёт по расписанию уже учитывает всё до
+    now; иначе наступившие публикации дают +1, а ленты правленых статей
+    (их прежнее состояние неизвестно) пересчитываются точно.
+    """
+    if await listing_counts.reconcile_due(redis):
+        total = await listing_counts.reconcile(redis, db, tree, now)
+        logger.info(f"Listing counts reconciled: {total} listings")
+        return
+    updated_ids = {a.id for a in updated}
+    await listing_counts.increment(redis, tree, (a for a in went_live if a.id not in updated_ids))
+    listings = set()
+    for article in updated:
+        listings |= listing_counts.listing_keys(article, tree)
+    await listing_counts.recount(redis, db, tree, listings, now)
+
+
+async def _is_leader(redis: Redis, ttl: int) -> bool:
+    if await redis.set(LEADER_KEY, _token, nx=True, ex=ttl):
+        return True
+    if (await redis.get(LEADER_KEY) or b"").decode() == _token:
+        await redis.expire(LEADER_KEY, ttl)
+        return True
+    return False
+
+
+async def run(redis: Redis, interval: float) -> None:
+    leader_ttl = max(int(interval * 3), 1)
+    while True:
+        try:
+            if await _is_leader(redis, leader_ttl):
+                # отметки сверяются с primary: реплика может не видеть свежих правок
+                async with db_session_manager.session(primary=True) as db:
+                    await poll_once(redis, db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Publication watcher failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start(redis: Redis) -> None:
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(run(redis, config.PUBLICATION_WATCHER_INTERVAL))
+
+
+async def stop() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
@@ -1,39 +1,357 @@
+import asyncio
+import inspect
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlencode
+
 from fastapi import Request, Depends
 from fastapi.responses import Response
 from functools import wraps
 from redis.asyncio import Redis
-from src.db.database import get_db
+from src.core import config
+from src.db.database import db_session_manager, get_db
 from src.db.redis import get_redis
+from src.services.schedule import seconds_until_next_publication
+from src.utils.l1_cache import invalidate, local_cache
 from redis.exceptions import RedisError
 
-def cache_response(redis_key_prefix: str, expiration: int):
+logger = logging.getLogger(__name__)
+
+# Сколько живёт межрепличная блокировка на пересборку страницы
+# и как часто ведомые проверяют, не появилась ли свежая версия
+LOCK_TTL = 10
+LOCK_POLL_INTERVAL = 0.05
+
+# Заголовки ответа, которые сохраняются вместе с телом
+CACHED_HEADERS = ("cache-control", "content-language", "link", "x-robots-tag")
+
+# Индекс закешированных страниц префикса: ZSET ключ -> жёсткий срок записи.
+# (Прежние SET cache_keys:{prefix} истекают сами.)
+CACHE_INDEX_KEY = "cache_index:{prefix}"
+
+# Аргументы view, которые не участвуют в ключе кеша
+NON_KEY_ARGS = {"request", "db", "response", "curr_redis"}
+
+# Пересборки, идущие в этом процессе: ключ -> задача
+_inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+# Фоновые задачи держим явно, иначе их может собрать GC
+_background: Set[asyncio.Task] = set()
+
+
+class _Policy:
+    """Параметры кеширования одного view."""
+
+    def __init__(self, prefix: str, expiration: int, stale_ttl: int, max_keys: int, schedule_aware: bool):
+        self.prefix = prefix
+        self.expiration = expiration
+        self.stale_ttl = stale_ttl
+        self.max_keys = max_keys
+        self.schedule_aware = schedule_aware
+
+    async def deadlines(self, now: float) -> Tuple[float, float]:
+        """
+        Абсолютные мягкий и жёсткий сроки новой записи. Для лент оба
+        ограничены моментом следующей отложенной публикации: запись
+        истекает ровно тогда, когда страница должна измениться.
+        """
+        soft, hard = self.expiration, self.expiration + self.stale_ttl
+        if self.schedule_aware:
+            try:
+                delay = await seconds_until_next_publication()
+            except Exception as e:
+                logger.error(f"Next publication lookup failed: {e}")
+                delay = None
+            if delay is not None:
+                delay = max(math.ceil(delay), 1)
+                soft, hard = min(soft, delay), min(hard, delay)
+        return now + soft, now + hard
+
+
+def _envelope(response: Response) -> Dict[str, Any]:
+    return {
+        "status": response.status_code,
+        "media_type": response.media_type,
+        "headers": {k: v for k, v in response.headers.items() if k in CACHED_HEADERS},
+        "body": response.body,
+    }
+
+
+def _replay(envelope: Dict[str, Any]) -> Response:
+    """
+    Ответ из конверта. Тело уже в байтах, Response не перекодирует его —
+    один и тот же путь для свежей пересборки и для попадания в кеш.
+    """
+    return Response(
+        content=envelope["body"],
+        status_code=envelope["status"],
+        media_type=envelope["media_type"],
+        headers=envelope["headers"],
+    )
+
+
+def _remember(cache_key: str, entry: Dict[str, Any]) -> None:
+    """Кладёт конверт в локальный кеш на оставшуюся жизнь ключа в Redis."""
+    ttl = entry["hard"] - time.time()
+    if ttl > 0:
+        local_cache.set(cache_key, entry, size=len(entry["body"]) + 256, ttl=ttl)
+
+
+def page_cache_key(prefix: str, params: Dict[str, Any]) -> str:
+    """
+    Нормализованный ключ: префикс, slug страницы и отсортированные
+    остальные параметры — category_page:ekonomika?page=2. Значения берутся
+    уже провалидированные FastAPI, поэтому /tag/x/ и
+    /tag/x/?page=1&utm_source=... дают один ключ. slug идёт первым, чтобы
+    purge_pages могла снять все варианты одной страницы.
+    """
+    slug = params.get("slug")
+    rest = sorted(
+        (name, str(value).strip())
+        for name, value in params.items()
+        if name != "slug" and value not in (None, "")
+    )
+    key = f"{prefix}:{slug}" if slug else prefix
+    return f"{key}?{urlencode(rest)}" if rest else key
+
+
+async def purge_pages(redis: Redis, prefix: str, slug: Optional[str] = None) -> int:
+    """
+    Снимает из кеша (Redis и L1 всех реплик) все варианты страниц
+    префикса, либо только страницы одного slug. Ключи берутся из индекса
+    CACHE_INDEX_KEY, поэтому SCAN по всей базе не нужен.
+    """
+    index_key = CACHE_INDEX_KEY.format(prefix=prefix)
+    members = [m.decode() for m in await redis.zrange(index_key, 0, -1)]
+    if slug is not None:
+        base = f"{prefix}:{slug}"
+        members = [m for m in members if m == base or m.startswith(f"{base}?")]
+    if not members:
+        return 0
+    await invalidate(redis, keys=members)
+    await redis.zrem(index_key, *members)
+    return len(members)
+
+
+async def _render(func, request: Request, args, kwargs) -> Dict[str, Any]:
+    """
+    Выполняет view и возвращает конверт ответа. Пересборка общая для всех
+    ожидающих запросов и может пережить исходный, поэтому работает на
+    собственной сессии БД, а не на сессии из DBSessionDep.
+    """
+    if "db" in kwargs:
+        async with db_session_manager.session() as db:
+            response = await func(request, *args, **{**kwargs, "db": db})
+    else:
+        response = await func(request, *args, **kwargs)
+    return _envelope(response)
+
+
+async def _store(redis: Redis, policy: _Policy, cache_key: str, envelope: Dict[str, Any]) -> Dict[str, Any]:
+    now = time.time()
+    soft, hard = await policy.deadlines(now)
+    envelope = {**envelope, "t": now, "soft": soft, "hard": hard}
+    if envelope["status"] != 200:
+        return envelope
+    index_key = CACHE_INDEX_KEY.format(prefix=policy.prefix)
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            # истёкшие записи не занимают место под пределом max_keys
+            pipe.zremrangebyscore(index_key, "-inf", now)
+            pipe.zscore(index_key, cache_key)
+            pipe.zcard(index_key)
+            _, score, known_keys = await pipe.execute()
+        is_known = score is not None
+        if not is_known and known_keys >= policy.max_keys:
+            logger.warning(f"Cache key limit reached for {policy.prefix}, {cache_key} is not cached")
+            return envelope
+        async with redis.pipeline(transaction=True) as pipe:
+            # DEL снимает и ключи старого формата (строка вместо hash)
+            pipe.delete(cache_key)
+            pipe.hset(cache_key, mapping={
+                "body": envelope["body"],
+                "status": envelope["status"],
+                "media_type": envelope["media_type"] or "",
+                "headers": json.dumps(envelope["headers"]),
+                "t": now,
+                "soft": soft,
+                "hard": hard,
+            })
+            pipe.expireat(cache_key, math.ceil(hard))
+            pipe.zadd(index_key, {cache_key: hard})
+            # не короче самой долгой записи префикса
+            pipe.expire(index_key, policy.expiration + policy.stale_ttl)
+            await pipe.execute()
+        _remember(cache_key, envelope)
+    except RedisError as e:
+        logger.error(f"Redis write failed: {e}")
+    return envelope
+
+
+async def _load(redis: Redis, cache_key: str) -> Optional[Dict[str, Any]]:
+    try:
+        entry = await redis.hgetall(cache_key)
+    except RedisError as e:
+        logger.error(f"Redis read failed: {e}")
+        return None
+    if not entry or b"body" not in entry or b"soft" not in entry:
+        return None
+    return {
+        "status": int(entry[b"status"]),
+        "media_type": entry[b"media_type"].decode() or None,
+        "headers": json.loads(entry[b"headers"]),
+        "body": entry[b"body"],
+        "t": float(entry[b"t"]),
+        "soft": float(entry[b"soft"]),
+        "hard": float(entry[b"hard"]),
+    }
+
+
+def _single_flight(cache_key: str, coro) -> "asyncio.Task[Dict[str, Any]]":
+    task = _inflight.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(coro)
+        _inflight[cache_key] = task
+        task.add_done_callback(lambda _: _inflight.pop(cache_key, None))
+    else:
+        coro.close()
+    return task
+
+
+async def _refresh(redis: Redis, policy: _Policy, cache_key: str, func, request, args, kwargs) -> Dict[str, Any]:
+    lock = redis.lock(f"lock:{cache_key}", timeout=LOCK_TTL)
+    try:
+        acquired = await lock.acquire(blocking=False)
+    except RedisError:
+        acquired = True  # без Redis координировать нечего
+        lock = None
+    if not acquired:
+        # другая реплика уже пересобирает страницу — ждём её результат
+        started = time.time()
+        deadline = time.monotonic() + LOCK_TTL
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            entry = await _load(redis, cache_key)
+            if entry and entry["t"] >= started:
+                return entry
+    try:
+        envelope = await _render(func, request, args, kwargs)
+        return await _store(redis, policy, cache_key, envelope)
+    finally:
+        if lock is not None and acquired:
+            try:
+                await lock.release()
+            except Exception:
+                pass
+
+
+async def _background_refresh(redis: Redis, policy: _Policy, cache_key: str, func, request, args, kwargs) -> None:
+    if cache_key in _inflight:
+        return
+    lock = redis.lock(f"lock:{cache_key}", timeout=LOCK_TTL)
+    try:
+        if not await lock.acquire(blocking=False):
+            return  # обновляет другая реплика
+    except RedisError:
+        return
+
+    async def refresh() -> Dict[str, Any]:
+        try:
+            envelope = await _render(func, request, args, kwargs)
+            return await _store(redis, policy, cache_key, envelope)
+        finally:
+            try:
+                await lock.release()
+            except Exception:
+                pass
+
+    task = _single_flight(cache_key, refresh())
+    _background.add(task)
+
+    def done(t: asyncio.Task) -> None:
+        _background.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.error(f"Background refresh of {cache_key} failed: {t.exception()}")
+
+    task.add_done_callback(done)
+
+
+def cache_response(
+    redis_key_prefix: str,
+    expiration: int,
+    stale_ttl: int = 300,
+    key_args: Optional[Iterable[str]] = None,
+    max_keys: Optional[int] = None,
+    schedule_aware: bool = False,
+    bypass_args: Iterable[str] = (),
+):
+    """
+    Кеширует ответ страницы в Redis (stale-while-revalidate).
+
+    В Redis хранится конверт: статус, media type, заголовки из
+    CACHED_HEADERS и тело. Кешируются только ответы 200. Перед Redis
+    стоит локальный кеш процесса (src/utils/l1_cache.py), поэтому горячие
+    страницы отдаются без сетевого обращения.
+
+    expiration — мягкий TTL: пока запись моложе, она отдаётся как есть.
+    После него до expiration + stale_ttl (жёсткий TTL ключа) отдаётся
+    устаревшая версия, а страница пересобирается одной фоновой задачей.
+    Одновременные промахи ждут одну и ту же пересборку: внутри процесса —
+    общий asyncio future, между репликами — короткая блокировка в Redis.
+
+    key_args — аргументы view, входящие в ключ (по умолчанию все, кроме
+    NON_KEY_ARGS); прочие query-параметры ключ не меняют. max_keys —
+    предел числа ключей на префикс (PAGE_CACHE_MAX_KEYS), сверх него
+    страницы отдаются без кеширования.
+
+    bypass_args — аргументы view, при непустом значении которых страница
+    отдаётся мимо кеша (курсоры keyset-пагинации: их значения не
+    ограничены, и каждый дал бы свой ключ).
+
+    schedule_aware — для лент статей: оба TTL ограничиваются моментом
+    следующей отложенной публикации (src/services/schedule.py), поэтому
+    в тихие периоды expiration можно держать большим.
+    """
+    policy = _Policy(
+        prefix=redis_key_prefix,
+        expiration=expiration,
+        stale_ttl=stale_ttl,
+        max_keys=max_keys if max_keys is not None else config.PAGE_CACHE_MAX_KEYS,
+        schedule_aware=schedule_aware,
+    )
+
     def decorator(func):
+        names = tuple(key_args) if key_args is not None else tuple(
+            name for name in inspect.signature(func).parameters if name not in NON_KEY_ARGS
+        )
+
+        bypass = tuple(bypass_args)
+
         @wraps(func)
         async def wrapper(request: Request, *args, **kwargs):
+            if any(kwargs.get(name) for name in bypass):
+                return await func(request, *args, **kwargs)
             redis: Redis = await get_redis()
-            cache_key_parts = [
-                redis_key_prefix,
-                kwargs.get('slug', ''),
-                str(kwargs.get('page', '')),
-                kwargs.get('type', ''),
-                kwargs.get('q', ''),
-                str(kwargs.get('year', '')),
-            ]
-
-            cache_key = "_".join(filter(None, cache_key_parts))
-            print(cache_key)
-            cached_response = await redis.get(cache_key)
-            if cached_response:
-                print("from cache")
-                return Response(cached_response)
-            print("not from cache")
-            response = await func(request, *args, **kwargs)
-            #await redis.set(cache_key, response.body, ex=expiration)
-            try:
-                await redis.set(cache_key, response.body, ex=expiration)
-            except RedisError as e:
-                print(f"Redis write failed: {e}")
-            return response
+            cache_key = page_cache_key(redis_key_prefix, {name: kwargs.get(name) for name in names})
+
+            entry = local_cache.get(cache_key)
+            if entry is None or time.time() >= entry["soft"]:
+                # L1 пуст или устарел — возможно, другая реплика уже обновила Redis
+                entry = await _load(redis, cache_key) or entry
+                if entry:
+                    _remember(cache_key, entry)
+            if entry and time.time() < entry["hard"]:
+                if time.time() >= entry["soft"]:
+                    await _background_refresh(redis, policy, cache_key, func, request, args, kwargs)
+                return _replay(entry)
+
+            task = _single_flight(
+                cache_key, _refresh(redis, policy, cache_key, func, request, args, kwargs)
+            )
+            envelope = await asyncio.shield(task)
+            return _replay(envelope)
 
         return wrapper
 
@@ -0,0 +1,110 @@
+"""
+Локальный (in-process) уровень кеша перед Redis.
+
+Горячие ключи (страницы cache_response, article_{slug} и т.п.) отдаются
+из памяти воркера. Когерентность между репликами держится на канале
+Redis pub/sub: invalidate() удаляет ключи из Redis и рассылает их, а
+слушатель на каждой реплике вычищает их из локального LRU.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Iterable, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.core import config
+from src.utils.lru import SizedTTLCache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+local_cache = SizedTTLCache(max_bytes=config.L1_CACHE_MAX_BYTES, ttl=config.L1_CACHE_TTL)
+
+_listener: Optional[asyncio.Task] = None
+
+
+async def get_cached(redis: Redis, key: str) -> Optional[bytes]:
+    """GET с локальным уровнем: из Redis идём только при промахе L1."""
+    value = local_cache.get(key)
+    if value is not None:
+        return value
+    value = await redis.get(key)
+    if value is not None:
+        local_cache.set(key, value, size=len(value))
+    return value
+
+
+async def set_cached(redis: Redis, key: str, value: bytes, ex: Optional[int] = None) -> None:
+    local_cache.set(key, value, size=len(value), ttl=ex)
+    await redis.set(key, value, ex=ex)
+
+
+def _evict(keys: Iterable[str] = (), prefixes: Iterable[str] = ()) -> None:
+    for key in keys:
+        local_cache.pop(key)
+    for prefix in prefixes:
+        local_cache.pop_prefix(prefix)
+
+
+async def invalidate(redis: Redis, keys: Iterable[str] = (), prefixes: Iterable[str] = ()) -> None:
+    """
+    Удаляет ключи (и все ключи с данными префиксами) из Redis и рассылает
+    сообщение об инвалидации всем репликам.
+    """
+    keys, prefixes = list(keys), list(prefixes)
+    _evict(keys, prefixes)
+
+    to_delete = list(keys)
+    for prefix in prefixes:
+        async for key in redis.scan_iter(match=f"{prefix}*", count=500):
+            to_delete.append(key)
+    if to_delete:
+        await redis.delete(*to_delete)
+    await redis.publish(INVALIDATION_CHANNEL, json.dumps({"keys": keys, "prefixes": prefixes}))
+
+
+def _apply_message(data: Any) -> None:
+    try:
+        message = json.loads(data)
+    except (TypeError, ValueError):
+        logger.warning(f"Malformed invalidation message: {data!r}")
+        return
+    _evict(message.get("keys", ()), message.get("prefixes", ()))
+
+
+async def _listen(redis: Redis) -> None:
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        _apply_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except (RedisError, OSError) as e:
+            # пока подписки не было, сообщения могли потеряться — L1 сбрасываем
+            logger.error(f"Invalidation listener disconnected: {e}")
+            local_cache.clear()
+            await asyncio.sleep(1)
+
+
+def start_listener(redis: Redis) -> None:
+    global _listener
+    if _listener is None or _listener.done():
+        _listener = asyncio.create_task(_listen(redis))
+
+
+async def stop_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _listener.cancel()
+    try:
+        await _listener
+    except asyncio.CancelledError:
+        pass
+    _listener = None
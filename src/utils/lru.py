@@ -0,0 +1,97 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Простой in-process LRU-словарь. Не потокобезопасен — рассчитан на
+    использование из одного event loop воркера uvicorn.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SizedTTLCache:
+    """
+    LRU с ограничением по суммарному размеру значений (в байтах) и TTL
+    записи. Размер передаёт вызывающий код — для bytes это len(value).
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        # key -> (value, size, expires_at)
+        self._data: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if entry[2] <= time.monotonic():
+            self.pop(key)
+            return default
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: Optional[float] = None) -> None:
+        self.pop(key)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+        self._data[key] = (value, size, expires_at)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted_size, _) = self._data.popitem(last=False)
+            self.size -= evicted_size
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self.size -= entry[1]
+        return entry[0]
+
+    def pop_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._data if isinstance(key, str) and key.startswith(prefix)]
+        for key in keys:
+            self.pop(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,7 +1,26 @@
-from typing import List, Annotated
-from sqlalchemy import func, select
-from fastapi import Query
+import base64
+import json
+import logging
+import math
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Iterable, List, Annotated, Optional, Tuple
+from sqlalchemy import Row, func, or_, select, tuple_
+from fastapi import HTTPException, Query
 from pydantic import BaseModel, Field
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.core import config
+from src.db import redis as redis_db
+from src.models.article import Article
+from src.services.listing_counts import get_count
+from src.utils.l1_cache import get_cached, invalidate, set_cached
+
+logger = logging.getLogger(__name__)
+
+PAGE_INDEX_KEY = "page_index:{listing}:{per_page}"
+PAGE_INDEX_REGISTRY_KEY = "page_index_keys:{listing}"
 
 
 class Pagination(BaseModel):
@@ -19,9 +38,11 @@ class PaginationResponse(BaseModel):
     has_next: bool = False
 
 
-async def paginate(session, pagination, query):
-    count_query = select(func.count()).select_from(query)
-    total = (await session.execute(count_query)).scalar()
+async def paginate(session, pagination, query, count_key: Optional[str] = None):
+    total = await get_count(count_key)
+    if total is None:
+        count_query = select(func.count()).select_from(query)
+        total = (await session.execute(count_query)).scalar()
     query = query.offset((pagination.page - 1) * pagination.per_page).limit(pagination.per_page)
     result = (await session.execute(query)).scalars()
 
@@ -37,3 +58,193 @@ async def paginate(session, pagination, query):
         has_previous=has_previous,
         has_next=has_next,
     )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Keyset-пагинация
+# ─────────────────────────────────────────────────────────────────────────────
+class KeysetPage(PaginationResponse):
+    """
+    Страница keyset-пагинации. page — номер страницы, None при переходе
+    по курсору за пределы нумерованных страниц. total берётся из
+    счётчиков лент (src/services/listing_counts.py); для лент без
+    счётчика (поиск) он не точный: счёт останавливается на
+    PAGINATION_MAX_PAGES * per_page + 1.
+    """
+    page: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def _key_values(row, key) -> Tuple[datetime, uuid.UUID]:
+    return tuple(getattr(row, col.key) for col in key)
+
+
+def encode_cursor(values: Tuple[datetime, uuid.UUID]) -> str:
+    published_date, pk = values
+    raw = f"{published_date.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[datetime, uuid.UUID]]:
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        published_date, pk = raw.split("|")
+        return datetime.fromisoformat(published_date), uuid.UUID(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+async def purge_page_index(redis: Redis, listings: Iterable[str]) -> int:
+    """
+    Снимает индексы границ страниц лент (все per_page) в Redis и L1 всех
+    реплик. Вызывается наблюдателем публикаций: после публикации или
+    правки статьи старые границы сдвигают страницы, и статья на стыке
+    пропала бы с обеих.
+    """
+    registries = [PAGE_INDEX_REGISTRY_KEY.format(listing=listing) for listing in listings]
+    if not registries:
+        return 0
+    async with redis.pipeline(transaction=False) as pipe:
+        for registry in registries:
+            pipe.smembers(registry)
+        members = await pipe.execute()
+    keys = [key.decode() for group in members for key in group]
+    if keys:
+        await invalidate(redis, keys=keys)
+    await redis.delete(*registries)
+    return len(keys)
+
+
+async def _page_index(session, query, per_page: int, index_key: Optional[str], key):
+    """
+    Границы нумерованных страниц: ключ последней строки каждой страницы
+    и (ограниченное) число строк. Один запрос по первым
+    PAGINATION_MAX_PAGES страницам; результат кешируется в Redis.
+    """
+    cache_key = PAGE_INDEX_KEY.format(listing=index_key, per_page=per_page) if index_key else None
+    curr_redis = redis_db.redis
+    if cache_key and curr_redis is not None:
+        try:
+            cached = await get_cached(curr_redis, cache_key)
+        except RedisError as e:
+            logger.error(f"Redis GET error: {e}")
+            cached = None
+        if cached:
+            data = json.loads(cached)
+            return [decode_cursor(b) for b in data["b"]], data["total"]
+
+    pd, pk = key
+    inner = (
+        query.with_only_columns(pd, pk, maintain_column_froms=True)
+        .order_by(pd.desc(), pk.desc())
+        .limit(config.PAGINATION_MAX_PAGES * per_page + 1)
+        .subquery()
+    )
+    k1, k2 = inner.c[pd.key], inner.c[pk.key]
+    numbered = select(
+        k1.label("k1"),
+        k2.label("k2"),
+        func.row_number().over(order_by=(k1.desc(), k2.desc())).label("rn"),
+        func.count().over().label("total"),
+    ).subquery()
+    rows = (await session.execute(
+        select(numbered)
+        .filter(or_(numbered.c.rn % per_page == 0, numbered.c.rn == numbered.c.total))
+        .order_by(numbered.c.rn)
+    )).all()
+
+    total = rows[0].total if rows else 0
+    boundaries = [(r.k1, r.k2) for r in rows if r.rn % per_page == 0]
+
+    if cache_key and curr_redis is not None:
+        payload = json.dumps({"total": total, "b": [encode_cursor(b) for b in boundaries]}).encode()
+        registry = PAGE_INDEX_REGISTRY_KEY.format(listing=index_key)
+        try:
+            await set_cached(curr_redis, cache_key, payload, ex=config.PAGINATION_INDEX_TTL)
+            # варианты per_page одной ленты — для purge_page_index
+            async with curr_redis.pipeline(transaction=False) as pipe:
+                pipe.sadd(registry, cache_key)
+                pipe.expire(registry, config.PAGINATION_INDEX_TTL)
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Redis SET error: {e}")
+    return boundaries, total
+
+
+async def keyset_paginate(
+    session,
+    query,
+    per_page: int,
+    page: int = 1,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    index_key: Optional[str] = None,
+    key=None,
+    row_factory: Optional[Callable[[Row], Any]] = None,
+) -> KeysetPage:
+    """
+    Постраничная выборка по ключу (published_date, id) без OFFSET и
+    полного count(*).
+
+    query — select с фильтрами, без order_by/limit; строки должны быть
+    уникальны (фильтр по связям — через .any(), а не join). Нумерованные
+    страницы (page) находятся по индексу границ (_page_index, кеш по
+    index_key), дальше PAGINATION_MAX_PAGES — только по непрозрачным
+    курсорам after/before из next_cursor/prev_cursor предыдущей страницы.
+
+    По умолчанию items — сущности из .scalars(); для Core-выборки
+    колонок (src/services/cards.py) row_factory строит элемент из строки.
+    """
+    key = key or (Article.published_date, Article.id)
+    pd, pk = key
+    if (after or before) and decode_cursor(after or before) is None:
+        # битый курсор — 404, а не первая страница под чужим URL
+        raise HTTPException(status_code=404, detail="Not found")
+    boundaries, indexed = await _page_index(session, query, per_page, index_key, key)
+    total = await get_count(index_key)
+    if total is None:
+        total = indexed
+    # счётчик и индекс обновляются независимо: номер страницы без границы не выдаём
+    pages = min(math.ceil(total / per_page), config.PAGINATION_MAX_PAGES, len(boundaries) + 1)
+
+    async def fetch(q) -> List[Any]:
+        result = await session.execute(q.limit(per_page + 1))
+        return [row_factory(row) for row in result] if row_factory else result.scalars().all()
+
+    cursor = decode_cursor(after or before)
+    number: Optional[int]
+    if cursor is not None and after:
+        q = query.filter(tuple_(pd, pk) < tuple_(*cursor)).order_by(pd.desc(), pk.desc())
+        rows = await fetch(q)
+        has_previous, has_next = True, len(rows) > per_page
+        rows, number = rows[:per_page], None
+    elif cursor is not None and before:
+        q = query.filter(tuple_(pd, pk) > tuple_(*cursor)).order_by(pd.asc(), pk.asc())
+        rows = await fetch(q)
+        has_previous, has_next = len(rows) > per_page, True
+        rows = rows[:per_page][::-1]
+        number = None if has_previous else 1
+    else:
+        if page > max(pages, 1):
+            raise HTTPException(status_code=404, detail="Not found")
+        q = query
+        if page > 1:
+            q = q.filter(tuple_(pd, pk) < tuple_(*boundaries[page - 2]))
+        rows = await fetch(q.order_by(pd.desc(), pk.desc()))
+        has_previous, has_next = page > 1, len(rows) > per_page
+        rows, number = rows[:per_page], page
+
+    return KeysetPage(
+        page=number,
+        per_page=per_page,
+        pages=pages,
+        total=total,
+        items=rows,
+        has_previous=has_previous,
+        has_next=has_next,
+        next_cursor=encode_cursor(_key_values(rows[-1], key)) if has_next and rows else None,
+        prev_cursor=encode_cursor(_key_values(rows[0], key)) if has_previous and rows else None,
+    )
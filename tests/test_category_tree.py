@@ -0,0 +1,33 @@
+import uuid
+
+from src.services.category_tree import CategoryNode, CategoryTree
+
+
+def _node(slug, parent=None, children=(), active=True):
+    return CategoryNode(
+        id=uuid.uuid5(uuid.NAMESPACE_URL, slug),
+        slug=slug,
+        title=slug,
+        seo_title=None,
+        description=None,
+        level=None,
+        is_active=active,
+        parent_category_id=uuid.uuid5(uuid.NAMESPACE_URL, parent) if parent else None,
+        child_ids=tuple(uuid.uuid5(uuid.NAMESPACE_URL, c) for c in children),
+    )
+
+
+def test_member_ids_are_category_and_active_direct_children():
+    tree = CategoryTree(
+        [
+            _node("ekonomika", children=("finansy", "arhiv")),
+            _node("finansy", parent="ekonomika", children=("banki",)),
+            _node("arhiv", parent="ekonomika", active=False),
+            _node("banki", parent="finansy"),
+        ],
+        version=None,
+    )
+    root = tree.by_slug("ekonomika")
+    # внук banki и неактивный arhiv в ленту родителя не входят
+    assert tree.member_ids(root) == [root.id, tree.by_slug("finansy").id]
+    assert tree.member_ids(tree.by_slug("banki")) == [tree.by_slug("banki").id]
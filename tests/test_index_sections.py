@@ -0,0 +1,46 @@
+import asyncio
+
+import main  # noqa: F401 — настраивает все мапперы
+from sqlalchemy.dialects import postgresql
+
+from src.models.article import Article
+from src.services import index
+from src.services.category_tree import CategoryTree
+from tests.test_category_tree import _node
+
+
+class _Result:
+    def all(self):
+        return []
+
+
+class _Session:
+    def __init__(self):
+        self.queries = []
+
+    async def execute(self, q):
+        self.queries.append(q)
+        return _Result()
+
+
+def test_sections_are_one_lateral_top_n_per_section(monkeypatch):
+    tree = CategoryTree(
+        [_node("ekonomika", children=("finansy",)), _node("finansy", parent="ekonomika"), _node("intervyu")],
+        version=None,
+    )
+
+    async def get_tree():
+        return tree
+
+    monkeypatch.setattr(index, "get_category_tree", get_tree)
+    db = _Session()
+    result = asyncio.run(index._get_sections(db, Article.article_status == "P"))
+
+    assert [c.slug for c in result["economy"]["subcats"]] == ["finansy"]
+    assert len(db.queries) == 1
+    sql = str(db.queries[0].compile(dialect=postgresql.dialect()))
+    assert "JOIN LATERAL" in sql
+    assert "LIMIT CAST(sec.lim AS INTEGER)" in sql
+    assert "row_number" not in sql
+    # VALUES рубрик один раз — EXISTS ссылается на строку внешнего запроса
+    assert sql.count("VALUES") == 1
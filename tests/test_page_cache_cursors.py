@@ -0,0 +1,59 @@
+"""Курсоры keyset-пагинации не порождают записей в кеше страниц."""
+import asyncio
+
+import fakeredis.aioredis
+import main  # noqa: F401 — настраивает все мапперы
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.future import select
+from starlette.requests import Request
+
+from src.db import redis as redis_db
+from src.models.article import Article
+from src.utils.decorators import cache_response
+from src.utils.l1_cache import local_cache
+from src.utils.pagination import keyset_paginate
+
+
+@pytest.fixture(autouse=True)
+def fake_redis():
+    local_cache.clear()
+    redis_db.redis = fakeredis.aioredis.FakeRedis()
+    yield redis_db.redis
+    redis_db.redis = None
+    local_cache.clear()
+
+
+def _request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def test_cursor_pages_bypass_the_page_cache(fake_redis):
+    renders = []
+
+    @cache_response(redis_key_prefix="tag_page", expiration=3600, key_args=("slug", "page"), bypass_args=("after", "before"))
+    async def tag(request, slug: str, page: int = 1, after: str = None, before: str = None):
+        renders.append((slug, page, after))
+        return PlainTextResponse(f"{slug}:{page}:{after}")
+
+    async def scenario():
+        for _ in range(2):
+            response = await tag(_request("/tag/x/"), slug="x", page=2, after=None, before=None)
+            assert response.body == b"x:2:None"
+        assert len(renders) == 1
+
+        for token in ("junk-1", "junk-2", "junk-2"):
+            response = await tag(_request("/tag/x/"), slug="x", page=1, after=token, before=None)
+            assert response.body == f"x:1:{token}".encode()
+        assert len(renders) == 4
+
+        return await fake_redis.keys("tag_page*")
+
+    assert asyncio.run(scenario()) == [b"tag_page:x?page=2"]
+
+
+def test_undecodable_cursor_is_not_found():
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(keyset_paginate(None, select(Article), per_page=10, after="not-a-cursor"))
+    assert e.value.status_code == 404
@@ -0,0 +1,48 @@
+"""Индекс закешированных страниц префикса и предел max_keys."""
+import asyncio
+
+import fakeredis.aioredis
+import main  # noqa: F401 — настраивает все мапперы
+
+from src.utils import decorators
+from src.utils.decorators import CACHE_INDEX_KEY, _Policy, _store, purge_pages
+from src.utils.l1_cache import local_cache
+
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+def _envelope(body: bytes):
+    return {"status": 200, "media_type": "text/html", "headers": {}, "body": body}
+
+
+def test_expired_pages_free_the_key_cap(monkeypatch):
+    clock = _Clock(1_000_000.0)
+    monkeypatch.setattr(decorators, "time", clock)
+    redis = fakeredis.aioredis.FakeRedis()
+    policy = _Policy(prefix="tag_page", expiration=60, stale_ttl=30, max_keys=2, schedule_aware=False)
+    index_key = CACHE_INDEX_KEY.format(prefix="tag_page")
+
+    async def scenario():
+        await _store(redis, policy, "tag_page:a", _envelope(b"a"))
+        await _store(redis, policy, "tag_page:b", _envelope(b"b"))
+        await _store(redis, policy, "tag_page:c", _envelope(b"c"))
+        # предел достигнут: c не закеширована
+        assert sorted(await redis.zrange(index_key, 0, -1)) == [b"tag_page:a", b"tag_page:b"]
+        assert await redis.zscore(index_key, "tag_page:a") == clock.now + 90
+
+        # жёсткий срок a и b прошёл — место под пределом освобождается
+        clock.now += 91
+        await _store(redis, policy, "tag_page:c", _envelope(b"c"))
+        assert await redis.zrange(index_key, 0, -1) == [b"tag_page:c"]
+
+        assert await purge_pages(redis, "tag_page", "c") == 1
+        assert await redis.zcard(index_key) == 0
+
+    asyncio.run(scenario())
+    local_cache.clear()
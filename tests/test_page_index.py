@@ -0,0 +1,79 @@
+"""
+Индексы границ нумерованных страниц (src/utils/pagination.py) и их
+снятие наблюдателем публикаций.
+"""
+import asyncio
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import fakeredis.aioredis
+import main  # noqa: F401 — настраивает все мапперы
+import pytest
+from sqlalchemy.future import select
+
+from src.db import redis as redis_db
+from src.models.article import Article
+from src.services.category_tree import CategoryTree
+from src.tasks.publication_watcher import Purge, _deps
+from src.utils.l1_cache import local_cache
+from src.utils.pagination import _page_index
+from tests.test_category_tree import _node
+
+Row = namedtuple("Row", "k1 k2 rn total")
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class _Session:
+    def __init__(self, total):
+        start = datetime(2026, 1, 1)
+        self.rows = [Row(start - timedelta(hours=n), uuid.uuid4(), n, total) for n in range(1, total + 1)]
+        self.queries = 0
+
+    async def execute(self, q):
+        self.queries += 1
+        return _Result([r for r in self.rows if r.rn % 10 == 0 or r.rn == r.total])
+
+
+@pytest.fixture(autouse=True)
+def fake_redis():
+    local_cache.clear()
+    redis_db.redis = fakeredis.aioredis.FakeRedis()
+    yield redis_db.redis
+    redis_db.redis = None
+    local_cache.clear()
+
+
+def test_publish_drops_page_index_of_affected_listings(fake_redis):
+    tree = CategoryTree(
+        [_node("ekonomika", children=("finansy",)), _node("finansy", parent="ekonomika"), _node("sport")],
+        version=None,
+    )
+    key = (Article.published_date, Article.id)
+
+    async def scenario():
+        db = _Session(total=35)
+        for listing in ("category:finansy", "category:ekonomika", "category:sport"):
+            for per_page in (10, 24):
+                await _page_index(db, select(Article), per_page, listing, key)
+        await _page_index(db, select(Article), 10, "category:finansy", key)
+        assert db.queries == 6  # повтор — из кеша
+
+        purge = Purge(tree)
+        purge._add_deps(_deps("article", ["finansy"], [], ["user-1"]))
+        await purge.apply(fake_redis)
+
+        assert await fake_redis.exists("page_index:category:finansy:10", "page_index:category:ekonomika:24") == 0
+        assert await fake_redis.exists("page_index:category:sport:10", "page_index:category:sport:24") == 2
+        # L1 тоже снят: следующий рендер строит границы заново
+        await _page_index(db, select(Article), 10, "category:finansy", key)
+        assert db.queries == 7
+
+    asyncio.run(scenario())
@@ -0,0 +1,10 @@
+import main  # noqa: F401 — настраивает все мапперы
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.future import select
+
+from src.models.podcast import Podcast
+
+
+def test_view_count_is_not_selected_with_podcast():
+    sql = str(select(Podcast).compile(dialect=postgresql.dialect()))
+    assert "view_count" not in sql
@@ -0,0 +1,141 @@
+"""
+Бюджет SQL-запросов по маршрутам (src/bench/query_budget.py) на
+тестовой базе.
+
+    TEST_DATABASE_URL=postgresql+asyncpg://.../forbes_test pytest tests/test_query_budget.py
+
+База из TEST_DATABASE_URL пересоздаётся целиком (drop_all/create_all) и
+заполняется минимальным набором: рубрики главной, подкатегория, тег,
+статьи с автором, закреплённая статья и подкаст. Авторов отдаёт
+фейковый users-сервис (src/grpc/fake_server.py). Без TEST_DATABASE_URL
+тесты пропускаются.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import main  # noqa: F401 — настраивает все мапперы
+import pytest
+from sqlalchemy import insert, text
+
+from src.bench.query_budget import _routes, _samples
+from src.db.database import db_session_manager
+from src.db.query_counter import count_queries
+from src.grpc.client import user_rpc
+from src.grpc.fake_server import FakeUsersServicer, serve
+from src.models.article import Article, article_category, article_tag
+from src.models.base import Base
+from src.models.category import Category
+from src.models.fixed_material import FixedArticle
+from src.models.podcast import Podcast
+from src.models.tags import Tag
+from src.utils.l1_cache import local_cache
+
+pytestmark = pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL is not set")
+
+# маршруты и бюджеты известны без данных: вызовы понадобятся уже с базой
+ROUTES = [(route, budget) for route, budget, _ in _routes(defaultdict(lambda: None))]
+
+CATEGORIES = ["intervyu", "ekonomika", "geopolitika", "issledovaniya", "life-style", "mnenie"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _seed() -> None:
+    async with db_session_manager.connect() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    categories = {slug: uuid.uuid4() for slug in CATEGORIES + ["finansy"]}
+    tag_id = uuid.uuid4()
+    published = datetime.now() - timedelta(days=1)
+    async with db_session_manager.session(primary=True) as db:
+        await db.execute(insert(Category), [
+            {"id": category_id, "slug": slug, "title": slug, "is_active": True,
+             "parent_category_id": categories["ekonomika"] if slug == "finansy" else None}
+            for slug, category_id in categories.items()
+        ])
+        await db.execute(insert(Tag), [{"id": tag_id, "slug": "tag", "title": "Тег"}])
+
+        articles = []
+        for n, slug in enumerate(list(categories) * 3):
+            article_id = uuid.uuid4()
+            articles.append(article_id)
+            await db.execute(insert(Article).values(
+                id=article_id,
+                title=f"Статья {n}",
+                alias=f"article-{n}",
+                description="Описание",
+                content="<p>Текст статьи</p>",
+                published_date=published - timedelta(hours=n),
+                article_status="P",
+                public_params=0,
+                author_ids=["user-1"],
+            ))
+            await db.execute(insert(article_category).values(article_id=article_id, category_id=categories[slug]))
+            await db.execute(insert(article_tag).values(article_id=article_id, tag_id=tag_id, position=0))
+        await db.execute(insert(FixedArticle).values(article_id=articles[0], order=1))
+        await db.execute(insert(Podcast).values(
+            title="Подкаст",
+            category_title="Подкасты",
+            alias="podcast",
+            published_date=published,
+            author_ids=["user-1"],
+        ))
+        await db.commit()
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def routes(loop):
+    port = _free_port()
+    server = loop.run_until_complete(serve(port, FakeUsersServicer()))
+    rpc_host = user_rpc.API_RPC_HOST
+    user_rpc.API_RPC_HOST = f"127.0.0.1:{port}"
+
+    async def setup():
+        await _seed()
+        async with db_session_manager.session() as db:
+            return await _samples(db)
+
+    try:
+        samples = loop.run_until_complete(setup())
+        yield {route: (budget, call) for route, budget, call in _routes(samples)}
+    finally:
+        loop.run_until_complete(user_rpc.close())
+        user_rpc.API_RPC_HOST = rpc_host
+        loop.run_until_complete(server.stop(None))
+        # пулы привязаны к циклу событий этого модуля
+        for engine in db_session_manager.engines:
+            loop.run_until_complete(engine.dispose())
+
+
+@pytest.mark.parametrize("route,budget", ROUTES, ids=[route for route, _ in ROUTES])
+def test_route_stays_within_query_budget(loop, routes, route, budget):
+    _, call = routes[route]
+    assert call is not None, f"{route}: no fixture data"
+    local_cache.clear()
+
+    async def measure():
+        async with db_session_manager.session() as db:
+            with count_queries() as counter:
+                await call(db)
+        return counter
+
+    counter = loop.run_until_complete(measure())
+    statements = "\n".join(" ".join(s.split())[:200] for s in counter.statements)
+    assert counter.count <= budget, f"{route}: {counter.count} queries, budget {budget}\n{statements}"
@@ -0,0 +1,40 @@
+import asyncio
+import contextvars
+
+from src.grpc.loader import get_user_loader, new_user_loader
+
+
+class FakeRpc:
+    def __init__(self):
+        self.batches = []
+
+    async def users_by_ids(self, uids):
+        self.batches.append(list(uids))
+        return {uid: {"id": uid} for uid in uids}
+
+
+def test_request_loader_batches_and_memoizes():
+    async def request(rpc):
+        new_user_loader(rpc)
+        first = await get_user_loader(rpc).load_many(["a", "b", "a"])
+        second = await get_user_loader(rpc).load_many(["b"])
+        return first, second
+
+    rpc = FakeRpc()
+    first, second = asyncio.run(request(rpc))
+    assert [u["id"] for u in first] == ["a", "b", "a"]
+    assert second == [{"id": "b"}]
+    assert rpc.batches == [["a", "b"]]
+
+
+def test_no_request_context_gets_fresh_loader_each_time():
+    async def background(rpc):
+        loader = get_user_loader(rpc)
+        await loader.load_many(["a"])
+        assert get_user_loader(rpc) is not loader
+        await get_user_loader(rpc).load_many(["a"])
+
+    rpc = FakeRpc()
+    # как фоновая задача: свой контекст без loader'а запроса
+    contextvars.Context().run(asyncio.run, background(rpc))
+    assert rpc.batches == [["a"], ["a"]]
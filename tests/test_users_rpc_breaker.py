@@ -0,0 +1,147 @@
+"""
+Клиент users-сервиса против локального фейкового сервера
+(src/grpc/fake_server.py): дедлайны, предохранитель и отдача устаревшего
+кеша при разомкнутой цепи.
+"""
+import asyncio
+import json
+import socket
+import time
+
+import fakeredis.aioredis
+import pytest
+
+from src.db import redis as redis_db
+from src.grpc.breaker import CircuitBreaker
+from src.grpc.client import UserRpcService, _is_rpc_failure
+from src.grpc.fake_server import FakeUsersServicer, serve
+
+OPEN_TIMEOUT = 0.3
+MIN_CALLS = 4
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _service(port: int) -> UserRpcService:
+    service = UserRpcService()
+    service.API_RPC_HOST = f"127.0.0.1:{port}"
+    service.TIMEOUTS = {method: 0.2 for method in service.TIMEOUTS}
+    service.breaker = CircuitBreaker(
+        name="users_rpc_test",
+        window=30,
+        min_calls=MIN_CALLS,
+        failure_rate=0.5,
+        open_timeout=OPEN_TIMEOUT,
+        is_failure=_is_rpc_failure,
+    )
+    return service
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(autouse=True)
+def fake_redis():
+    redis_db.redis = fakeredis.aioredis.FakeRedis()
+    yield redis_db.redis
+    redis_db.redis = None
+
+
+async def _put_stale(key: str, value, age: float) -> None:
+    await redis_db.redis.set(key, json.dumps({"v": value, "t": time.time() - age}))
+
+
+def test_breaker_opens_on_latency_serves_stale_and_recovers():
+    async def scenario():
+        port = _free_port()
+        servicer = FakeUsersServicer(latency=1.0)
+        server = await serve(port, servicer)
+        service = _service(port)
+        try:
+            stale_user = {"id": "user-2", "firstName": "из кеша"}
+            await _put_stale("user_user-2", stale_user, age=service.CACHE_TTL + 60)
+
+            # дедлайн 0.2 с против задержки 1 с: каждый вызов — сбой
+            for _ in range(MIN_CALLS):
+                assert await service.user_by_uid("user-1") is None
+            assert service.breaker.state == CircuitBreaker.OPEN
+
+            # цепь разомкнута: сервис не вызывается, отдаётся устаревшая запись {"v","t"}
+            calls = servicer.calls
+            assert await service.user_by_uid("user-2") == stale_user
+            assert servicer.calls == calls
+            assert service.breaker.counters["rejected"] >= 1
+
+            # после OPEN_TIMEOUT один пробный вызов проходит (half-open)
+            await asyncio.sleep(OPEN_TIMEOUT + 0.05)
+            assert service.breaker.allows_calls
+            servicer.latency = 0.1
+            probe = asyncio.create_task(service.user_by_uid("user-3"))
+            await asyncio.sleep(0.03)
+            assert service.breaker.state == CircuitBreaker.HALF_OPEN
+            assert not service.breaker.allows_calls
+
+            # успешная проба замыкает цепь
+            user = await probe
+            assert user["id"] == "user-3"
+            assert service.breaker.state == CircuitBreaker.CLOSED
+        finally:
+            await service.close()
+            await server.stop(None)
+
+    run(scenario())
+
+
+def test_breaker_opens_at_failure_rate_and_failed_probe_reopens():
+    async def scenario():
+        port = _free_port()
+        servicer = FakeUsersServicer(error_rate=1.0)
+        server = await serve(port, servicer)
+        service = _service(port)
+        try:
+            # ниже min_calls цепь не размыкается
+            for _ in range(MIN_CALLS - 1):
+                await service.user_by_uid("user-1")
+            assert service.breaker.state == CircuitBreaker.CLOSED
+
+            await service.user_by_uid("user-1")
+            assert service.breaker.state == CircuitBreaker.OPEN
+            assert service.breaker.snapshot()["window_failure_rate"] >= 0.5
+
+            # без устаревшей записи — значение по умолчанию, без обращения к сервису
+            calls = servicer.calls
+            assert await service.user_by_uid("user-9") is None
+            assert servicer.calls == calls
+
+            # неудачная проба снова размыкает цепь
+            await asyncio.sleep(OPEN_TIMEOUT + 0.05)
+            await service.user_by_uid("user-1")
+            assert servicer.calls == calls + 1
+            assert service.breaker.state == CircuitBreaker.OPEN
+        finally:
+            await service.close()
+            await server.stop(None)
+
+    run(scenario())
+
+
+def test_not_found_is_not_a_failure():
+    async def scenario():
+        port = _free_port()
+        server = await serve(port, FakeUsersServicer())
+        service = _service(port)
+        try:
+            for _ in range(MIN_CALLS * 2):
+                assert await service.user_by_uid("missing") is None
+            assert service.breaker.state == CircuitBreaker.CLOSED
+            assert service.breaker.counters["failures"] == 0
+        finally:
+            await service.close()
+            await server.stop(None)
+
+    run(scenario())